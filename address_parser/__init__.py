@@ -0,0 +1,45 @@
+# -*- coding: utf-8 -*-
+""" Parse and match Michigan street addresses
+
+Submodules are imported on first use, so that
+    from address_parser import AddressParser
+does not load pandas, numpy or fuzzywuzzy. They are loaded when the
+matchers or the DataFrame helpers of address_methods are first used.
+"""
+
+### Import libraries
+import importlib
+
+# Public name to the submodule defining it
+_EXPORTS = {'AddressParser': 'address_parser_class',
+            'StandardAddressMatcher': 'matcher',
+            'BlockedAddressMatcher': 'matcher',
+            'compile_reference': 'reference_file',
+            'load_reference': 'reference_file',
+            'ReferenceStore': 'reference_store',
+            'run_pipeline': 'pipeline',
+            'AddressService': 'service'}
+_SUBMODULES = ['address_methods', 'address_parser_class', 'batch_parser',
+               'batch_ratio', 'candidate_index', 'instrumentation', 'matcher',
+               'pipeline', 'reference_file', 'reference_store',
+               'resource_manager', 'result_store', 'service']
+
+__all__ = list(_EXPORTS) + _SUBMODULES
+
+
+def __getattr__(name):
+    if name in _EXPORTS:
+        module = importlib.import_module('.' + _EXPORTS[name], __name__)
+        value = getattr(module, name)
+    elif name in _SUBMODULES:
+        value = importlib.import_module('.' + name, __name__)
+    else:
+        raise AttributeError("module {!r} has no attribute {!r}"\
+                             .format(__name__, name))
+    # Later lookups find it without calling __getattr__
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
@@ -1,32 +1,119 @@
 # -*- coding: utf-8 -*-
 
 ### Import libraries
-from fuzzywuzzy import fuzz
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import os, sys, inspect
+import os
 import pandas as pd
-import pickle
 import re
+import time
 
-# Import submodules
-cmd_folder = os.path.realpath(os.path.abspath(os.path.split(\
-                inspect.getfile( inspect.currentframe() ))[0]))
-if cmd_folder not in sys.path:
-     sys.path.insert(0, cmd_folder)
-
-import resource_manager
-from address_parser_class import AddressParser
+from . import instrumentation
+from . import resource_manager
+from .address_parser_class import AddressParser
+from .batch_parser import ParsedColumns, parse_street_batch
+from .matcher import BlockedAddressMatcher, StandardAddressMatcher
+from .reference_file import load_reference
 
 
 def load_sample():
     return ResourceManager().load_sample()
 
 
-def parse_street_series(series, target_df=None):
+# State of a worker process, set once by its initializer
+_worker = {}
+
+
+def _init_parse_worker():
+    _worker['parser'] = AddressParser()
+
+
+def _parse_chunk(values, vectorized):
+    parser = _worker['parser']
+    if vectorized:
+        return parse_street_batch(values, parser)
+    return tuple(zip(*map(parser.parse_street, values))) or \
+           tuple(() for _ in range(5))
+
+
+def _init_match_worker(standard_address_set, standard_name_set,
+                       name_to_suffix_dict, reference_file=None):
+    # A compiled reference is mapped, not sent to every worker
+    if reference_file is not None:
+        _worker['matcher'] = load_reference(reference_file).matcher()
+    else:
+        _worker['matcher'] = StandardAddressMatcher(
+            standard_address_set, standard_name_set, name_to_suffix_dict)
+
+
+def _match_chunk(names, suffixes):
+    return tuple(zip(*_worker['matcher'].match_many(names, suffixes))) or \
+           tuple(() for _ in range(3))
+
+
+def map_chunks(func, chunks, n_jobs=1, initializer=None, initargs=()):
+    """ Run func on every chunk, in worker processes
+    Args:
+        func (callable): called as func(*chunk). Must be picklable.
+        chunks (list): list of argument tuples.
+        n_jobs (int): number of processes. 1 runs in this process,
+                      None or -1 uses all cores.
+        initializer (callable): called once per process with initargs,
+                                before any chunk.
+        initargs (tuple): arguments of initializer.
+
+    Returns:
+        list of results, in the order of chunks
+    """
+    if n_jobs == -1:
+        n_jobs = None
+    if n_jobs == 1:
+        if initializer is not None:
+            initializer(*initargs)
+        return [func(*chunk) for chunk in chunks]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=initializer,
+                             initargs=initargs) as executor:
+        return list(executor.map(func, *zip(*chunks)))
+
+
+def split_chunks(n, n_jobs, chunk_size=None):
+    """ Split range(n) into chunks for map_chunks
+    Args:
+        n (int): number of rows.
+        n_jobs (int): number of processes, see map_chunks.
+        chunk_size (int): rows per chunk. Default gives each process
+                          about 4 chunks.
+
+    Returns:
+        list of (start, stop)
+    """
+    if chunk_size is None:
+        n_procs = os.cpu_count() if n_jobs in (None, -1) else n_jobs
+        chunk_size = -(-n // (4*n_procs)) if n else 1
+    return [(start, min(start+chunk_size, n))
+            for start in range(0, n, max(chunk_size, 1))]
+
+
+@instrumentation.timed('parse_street_series')
+def parse_street_series(series, target_df=None, vectorized=False, n_jobs=1,
+                        chunk_size=None, dedupe=None):
     """ Run AddressParser().parse_street
     Args:
         series (pd.Series): series containing address info
         target_df (pd.DataFrame): df containing results
+        vectorized (bool): parse the whole series at once with
+                           batch_parser.parse_street_batch. The result is
+                           the same. On 300,000 distinct synthetic
+                           addresses it is only about 1.4x faster than
+                           parsing row by row, and about 5x with the
+                           default dedupe when every address appears 10
+                           times. It does not reach 10x, see
+                           benchmarks/run_benchmarks.py.
+        n_jobs (int): number of processes parsing chunks of the series.
+                      None or -1 uses all cores.
+        chunk_size (int): rows per chunk when n_jobs is not 1.
+        dedupe (bool): parse every distinct address once and copy the
+                       results to all its rows. Default is vectorized.
 
     Returns:
         five pd.Series objects:
@@ -36,16 +123,46 @@ def parse_street_series(series, target_df=None):
             target_df['Street Prefix'], target_df['Street Suffix'],
             target_df['Other Address'])
     """
-    parse_street = AddressParser().parse_street
+    if dedupe is None:
+        dedupe = vectorized
+    if dedupe:
+        codes, uniques = pd.factorize(series.fillna(""))
+        parsed = list(_parse_street_columns(
+                        pd.Series(np.asarray(uniques, dtype=object)),
+                        vectorized, n_jobs, chunk_size)) or [()]*5
+        columns = tuple(pd.Series(np.asarray(column, dtype=object)[codes],
+                                  index=series.index) for column in parsed)
+    else:
+        columns = _parse_street_columns(series, vectorized, n_jobs,
+                                        chunk_size)
 
     if target_df is not None:
         target_df['Street Number'], target_df['Street Name'], \
         target_df['Street Prefix'], target_df['Street Suffix'], \
-        target_df['Other Address'] = \
-            zip(*series.fillna("").apply(parse_street))
+        target_df['Other Address'] = columns
         return target_df
-    else:
-        return zip(*series.fillna("").apply(parse_street))
+    return columns
+
+
+def _parse_street_columns(series, vectorized, n_jobs, chunk_size):
+    # Parsing part of parse_street_series, not timed on its own so that
+    # the dedupe path counts one call
+    if vectorized or n_jobs != 1:
+        values = series.fillna("").to_numpy(dtype=object)
+        if n_jobs == 1:
+            parsed = parse_street_batch(values)
+        else:
+            chunks = [(values[start:stop], vectorized)
+                      for start, stop in split_chunks(len(values), n_jobs,
+                                                      chunk_size)]
+            parsed = ParsedColumns.concat(map_chunks(_parse_chunk, chunks,
+                                                     n_jobs,
+                                                     _init_parse_worker))
+        return tuple(pd.Series(column, index=series.index)
+                     for column in parsed)
+
+    parse_street = AddressParser().parse_street
+    return zip(*series.fillna("").apply(parse_street))
 
 
 def combine_address_row(row):
@@ -87,6 +204,51 @@ def get_unique(df, col_name):
     return set(df[col_name].unique())
 
 
+def combination_codes(df, cols, dropna=True):
+    """ Distinct combinations of values in columns, from categorical codes
+    Args:
+        df (pd.DataFrame): input df.
+        cols (list): column names in df.
+        dropna (bool): leave out rows with a missing value, as groupby
+                       does. Otherwise missing values are a value of their
+                       own.
+
+    Returns:
+        (codes, uniques, counts). uniques[j] holds the sorted distinct
+        values of cols[j], and combination i is uniques[j][codes[i, j]] for
+        every j. Combinations are sorted as the groups of groupby(cols), and
+        counts[i] is the number of rows of combination i.
+    """
+    factorized = [pd.factorize(df[col], sort=True, use_na_sentinel=dropna)
+                  for col in cols]
+    keep = np.ones(len(df), dtype=bool)
+    if dropna:
+        for col_codes, _ in factorized:
+            keep &= col_codes >= 0
+    columns = [col_codes[keep] for col_codes, _ in factorized]
+
+    # One int64 key per row, in the order of the combinations
+    key = np.zeros(keep.sum(), dtype=np.int64)
+    for col_codes, (_, uniques) in zip(columns, factorized):
+        n = max(len(uniques), 1)
+        if key.max(initial=0) >= 2**62 // n:
+            # Replace keys by their ranks, in the same order
+            key = pd.factorize(key, sort=True)[0]
+        key = key * n + col_codes
+
+    # Hash the keys, then sort only the distinct ones
+    groups, keys = pd.factorize(key)
+    counts = np.bincount(groups, minlength=len(keys))
+    # Any row of every combination
+    rows = np.empty(len(keys), dtype=np.int64)
+    rows[groups] = np.arange(len(groups))
+    order = np.argsort(keys)
+    codes = np.stack([col_codes[rows[order]] for col_codes in columns],
+                     axis=1) if columns else \
+            np.zeros((len(keys), 0), dtype=np.int64)
+    return codes, [uniques for _, uniques in factorized], counts[order]
+
+
 def get_combinations_as_df(df, cols):
     """ Return all unique combinations of values in columns
     Args:
@@ -95,7 +257,13 @@ def get_combinations_as_df(df, cols):
     Returns:
         df containing all unique combinations with frequency of each
     """
-    return df[cols].groupby(cols).size().reset_index()
+    cols = list(cols)
+    codes, uniques, counts = combination_codes(df, cols)
+    # Object columns get the dtype groupby would infer for its keys
+    ans = pd.DataFrame({col: uniques[j].infer_objects().take(codes[:, j])
+                        for j, col in enumerate(cols)})
+    ans[0] = counts
+    return ans
 
 
 def get_combinations_as_set(df, cols):
@@ -104,10 +272,15 @@ def get_combinations_as_set(df, cols):
         df (pd.DataFrame): input df.
         cols (list): column names in df.
     Returns:
-        set containing all unique combinations. Each combination is a tuple
+        set containing all unique combinations. Each combination is a tuple,
+        or the value itself for a single column
     """
     cols = list(cols)
-    return set(df[cols].groupby(cols).size().index)
+    codes, uniques, _ = combination_codes(df, cols)
+    values = [uniques[j].take(codes[:, j]).tolist() for j in range(len(cols))]
+    if len(cols) == 1:
+        return set(values[0])
+    return set(zip(*values))
 
 
 def get_combinations_as_dict(df, cols):
@@ -116,12 +289,49 @@ def get_combinations_as_dict(df, cols):
         df (pd.DataFrame): input df.
         cols (list): 2 or more column names
     Returns:
-        d (dict): for a value v in cols[1:], d[v] = dict,
-                  where d[v][value] = set containing all distinct values of v correponsing to value
+        d (dict): d[value] = set containing all distinct values of cols[1]
+                  in the rows where cols[0] is value, for every value of
+                  cols[0] but missing ones
     """
+    codes, uniques, _ = combination_codes(df, cols[:2], dropna=False)
+    keys = uniques[0].take(codes[:, 0])
+    codes = codes[~pd.isna(keys)]
+    ans = {}
+    for key, value in zip(uniques[0].take(codes[:, 0]).tolist(),
+                          uniques[1].take(codes[:, 1]).tolist()):
+        ans.setdefault(key, set()).add(value)
+    return ans
+
+
+def street_key(values):
+    """ Street names or suffixes as close_match sees them
+    Args:
+        values (pd.Series): street names or suffixes
+
+    Returns:
+        pd.Series of stripped, title case str. Missing values are "".
+    """
+    return values.fillna("").astype(object).str.strip().str.title()
+
 
-    grouped = df[cols].groupby(cols[0])[cols[1:]].agg(lambda x: set(x))[cols[1]]
-    return grouped.to_dict()
+def factorize_pairs(names, suffixes):
+    """ Number the distinct (name, suffix) pairs
+    Args:
+        names (pd.Series): street names
+        suffixes (pd.Series): street suffixes, same length as names
+
+    Returns:
+        (codes, first). codes[i] is the number of the pair of row i, and
+        first[j] is the position of the first row with pair j. Missing
+        values are a value of their own.
+    """
+    name_codes, _ = pd.factorize(names, use_na_sentinel=False)
+    suffix_codes, suffix_uniques = pd.factorize(suffixes,
+                                                use_na_sentinel=False)
+    keys = name_codes.astype(np.int64) * max(len(suffix_uniques), 1) \
+           + suffix_codes
+    _, first, codes = np.unique(keys, return_index=True, return_inverse=True)
+    return codes.ravel(), first
 
 
 def gen_close_match_row(name_col, suffix_col,
@@ -139,14 +349,132 @@ def gen_close_match_row(name_col, suffix_col,
         a callable function that takes a row and returns the tuple
             (matched_name, matched_suffix, ratio)
     """
+    matcher = StandardAddressMatcher(standard_address_set, standard_name_set,
+                                     name_to_suffix_dict)
 
     def callable(row):
-        return AddressParser().close_match(
-                                row[name_col], row[suffix_col],
-                                standard_address_set, standard_name_set,
-                                name_to_suffix_dict)
+        return matcher.match(row[name_col], row[suffix_col])
     return callable
 
+@instrumentation.timed('close_match_df')
+def close_match_df(df, name_col, suffix_col,
+                   standard_address_set=None, standard_name_set=None,
+                   name_to_suffix_dict=None, target_df=None, n_jobs=1,
+                   chunk_size=None, reference_file=None):
+    """ Apply close_match method AddressParser() on every row of df
+    Args:
+        df (pd.DataFrame): df containing addresses
+        name_col (str): col containing Street Name
+        suffix_col (str): col containing Street Suffix
+        standard_address_set (set): all standard full addresses
+        standard_name_set (set): all standard full name
+        name_to_suffix_dict (dict): name to suffix dict
+        target_df (pd.DataFrame): df containing results
+        n_jobs (int): number of processes matching chunks of the distinct
+                      streets. Each one builds its StandardAddressMatcher
+                      once. None or -1 uses all cores.
+        chunk_size (int): distinct streets per chunk when n_jobs is not 1.
+        reference_file (str): file written by
+                              reference_file.compile_reference, used
+                              instead of the three reference arguments.
+                              Every process maps it, so they share one
+                              copy of its pages instead of each receiving
+                              and indexing the sets.
+
+    Returns:
+        three pd.Series objects: (matched_name, matched_suffix, ratio).
+            If target_df is not None, these will be stored in
+            (target_df['Suggested Name'], target_df['Suggested Suffix'],
+            target_df['Matching Ratio'])
+    """
+    # Every distinct street is matched once. close_match strips and title
+    # cases both values first, so streets only differing in that share
+    # their result.
+    assert (reference_file is not None or standard_address_set is not None), \
+        "Either the reference sets or reference_file are needed!"
+    names, suffixes = street_key(df[name_col]), street_key(df[suffix_col])
+    codes, first = factorize_pairs(names, suffixes)
+    instrumentation.count('close_match_df.unique_pairs', len(first))
+    names = names.to_numpy(dtype=object)[first]
+    suffixes = suffixes.to_numpy(dtype=object)[first]
+    chunks = [(names[start:stop], suffixes[start:stop])
+              for start, stop in split_chunks(len(first), n_jobs,
+                                              chunk_size)]
+    if reference_file is not None:
+        initargs = (None, None, None, reference_file)
+    else:
+        initargs = (standard_address_set, standard_name_set,
+                    name_to_suffix_dict)
+    results = map_chunks(_match_chunk, chunks, n_jobs, _init_match_worker,
+                         initargs)
+    columns = [pd.Series(np.array([x for r in results for x in r[i]],
+                                  dtype=dtype)[codes],
+                         index=df.index, dtype=dtype)
+               for i, dtype in enumerate([object, object, 'int64'])]
+
+    if target_df is not None:
+        target_df['Suggested Name'], target_df['Suggested Suffix'], \
+        target_df['Matching Ratio'] = columns
+        return target_df
+    return tuple(columns)
+
+
+@instrumentation.timed('close_match_blocked_df')
+def close_match_blocked_df(df, name_col, suffix_col, number_col, city_col,
+                           reference, target_df=None, **kwargs):
+    """ Apply BlockedAddressMatcher on every distinct street of every block
+    Args:
+        df (pd.DataFrame): df containing addresses
+        name_col (str): col containing Street Name
+        suffix_col (str): col containing Street Suffix
+        number_col (str): col containing Street Number
+        city_col (str): col containing City
+        reference (pd.DataFrame): standard addresses with the columns
+                                  'Street Name', 'Street Suffix',
+                                  'Street Number' and 'City'
+        target_df (pd.DataFrame): df containing results
+        **kwargs: kwargs to be passed into BlockedAddressMatcher
+
+    Returns:
+        three pd.Series objects: (matched_name, matched_suffix, ratio).
+            If target_df is not None, these will be stored in
+            (target_df['Suggested Name'], target_df['Suggested Suffix'],
+            target_df['Matching Ratio'])
+    """
+    matcher = BlockedAddressMatcher(reference, **kwargs)
+    # The narrowest block of an address decides all blocks it is matched
+    # in, so every distinct street is matched once per block, as in
+    # close_match_df
+    place_codes, place_first = factorize_pairs(df[number_col], df[city_col])
+    place_keys = [matcher.block_keys(number, city) for number, city
+                  in zip(df[number_col].to_numpy(dtype=object)[place_first],
+                         df[city_col].to_numpy(dtype=object)[place_first])]
+    narrowest = np.empty(len(place_keys), dtype=object)
+    for i, keys in enumerate(place_keys):
+        narrowest[i] = keys[0]
+    block_codes, _ = pd.factorize(narrowest)
+    names, suffixes = street_key(df[name_col]), street_key(df[suffix_col])
+    street_codes, _ = factorize_pairs(names, suffixes)
+    codes, first = factorize_pairs(pd.Series(street_codes),
+                                   pd.Series(block_codes[place_codes]))
+    instrumentation.count('close_match_blocked_df.unique_pairs', len(first))
+    matched = [matcher.match_in_blocks(name, suffix, place_keys[place])
+               for name, suffix, place
+               in zip(names.to_numpy(dtype=object)[first],
+                      suffixes.to_numpy(dtype=object)[first],
+                      place_codes[first])]
+    columns = [pd.Series(np.array([m[i] for m in matched],
+                                  dtype=dtype)[codes],
+                         index=df.index, dtype=dtype)
+               for i, dtype in enumerate([object, object, 'int64'])]
+
+    if target_df is not None:
+        target_df['Suggested Name'], target_df['Suggested Suffix'], \
+        target_df['Matching Ratio'] = columns
+        return target_df
+    return tuple(columns)
+
+
 def get_freq(series):
     """ Return frequency of values in series
     Args:
@@ -171,6 +499,8 @@ def gen_fill_suffix_row(row, name_to_suffix_dict,
 
     Returns:
         a callable that takes row as argument and returns suggested suffix
+
+    Builds a parser per row, use fill_suffix_column on whole DataFrames.
     """
 
     # If suffix is not missing, return suffix
@@ -199,6 +529,60 @@ def gen_fill_suffix_row(row, name_to_suffix_dict,
     return callable
 
 
+def unique_suffix_dict(name_to_suffix_dict):
+    """ Names with exactly one suffix
+    Args:
+        name_to_suffix_dict (dict): name to suffix dict
+
+    Returns:
+        dict from name to its only suffix, the suffix
+        AddressParser.fill_suffix suggests. Names whose only suffix is ""
+        are left out, fill_suffix suggests nothing for them either.
+    """
+    return {name: next(iter(suffixes))
+            for name, suffixes in name_to_suffix_dict.items()
+            if len(suffixes) == 1 and next(iter(suffixes)) != ""}
+
+
+@instrumentation.timed('fill_suffix_column')
+def fill_suffix_column(df, name_to_suffix_dict, street_name_col,
+                       street_suffix_col, suggested_name_col=None,
+                       suggested_suffix_col=None, unique_suffixes=None):
+    """ Fill missing suffixes of a DataFrame, vectorized gen_fill_suffix_row
+    Args:
+        df (pd.DataFrame)
+        name_to_suffix_dict (dict): name to suffix dict
+        street_name_col (str)
+        street_suffix_col (str)
+        suggested_name_col (str): looked up instead of street_name_col
+                                  where it is not empty
+        suggested_suffix_col (str): used where the name has no unique
+                                    suffix
+        unique_suffixes (dict): unique_suffix_dict of name_to_suffix_dict,
+                                to reuse it across calls. Computed if None.
+
+    Returns:
+        pd.Series of suffixes, same index as df. Non-empty suffixes are
+        kept. Missing ones get the only suffix of the (suggested) name, or
+        else the stripped suggested suffix, or "".
+    """
+    if unique_suffixes is None:
+        unique_suffixes = unique_suffix_dict(name_to_suffix_dict)
+    suffix = df[street_suffix_col].fillna("").astype(object)
+    name = df[street_name_col].fillna("").astype(object)
+    if suggested_name_col is not None:
+        suggested_name = df[suggested_name_col].fillna("").astype(object)
+        name = suggested_name.where(suggested_name != "", name)
+    fallback = pd.Series("", index=df.index, dtype=object)
+    if suggested_suffix_col is not None:
+        fallback = df[suggested_suffix_col].fillna("").astype(object)\
+                                           .str.strip()
+    # An empty suffix in the dict is no suggestion, as in fill_suffix
+    filled = name.map(unique_suffixes).fillna("")
+    filled = filled.where(filled != "", fallback)
+    return suffix.where(suffix != "", filled)
+
+
 def get_pin_len(df, pin_col_name='Parcel Number'):
     if pin_col_name not in df.columns:
         pin_col_name = 'PIN'
@@ -246,9 +630,315 @@ def split_PIN_list(df):
             for col in df.columns.drop('temp') })\
             .assign(**{'temp':np.concatenate(df['temp'].values)})[df.columns]
 
+def drop_prefix(values, n):
+    """ Drop the first n characters of every string
+    Args:
+        values (np.ndarray): fixed width unicode array, e.g. dtype '<U12'.
+        n (int): number of characters to drop.
+
+    Returns:
+        np.ndarray of dtype '<U(width-n)'
+    """
+    width = values.dtype.itemsize // 4
+    if width <= n:
+        return np.full(len(values), "", dtype='<U1')
+    chars = values.view('<U1').reshape(len(values), width)[:, n:]
+    return np.ascontiguousarray(chars).view('<U{}'.format(width-n)).ravel()
+
+
+def split_PIN_series(pins):
+    """ Vectorized split_mult_PIN
+    Args:
+        pins (np.ndarray): PINs, fixed width unicode array.
+
+    Returns:
+        pd.Series of single PINs. Its index is the position of the row each
+        PIN comes from, in row order, so rows without PIN are left out and
+        rows with several PINs are repeated.
+    """
+    # Most PINs are a single run of digits and are kept as they are
+    single = np.char.isdecimal(pins)
+    rest = pd.Series(pins[~single].astype(object),
+                     index=np.flatnonzero(~single))
+    has_digit = rest.str.contains(r'\d', regex=True).to_numpy(dtype=bool)
+
+    # Rows like "2215200012,013": every digit run replaces the end of the
+    # first run, as split_mult_PIN does
+    mult_pins = rest[has_digit]
+    first = mult_pins.str.extract(r'^(\d*)', expand=False)
+    parts = mult_pins.str.findall(r'\d+').explode()
+    first = first.reindex(parts.index)
+    keep = np.maximum(first.str.len().to_numpy() - parts.str.len().to_numpy(),
+                      0)
+    split = parts.astype(object)
+    for k in np.unique(keep[keep > 0]):
+        rows = (keep == k)
+        split[rows] = first[rows].str[:k] + parts[rows]
+
+    # Rows without digits are rare, split_mult_PIN decides if they are kept
+    others = rest[~has_digit].map(split_mult_PIN).explode().dropna()
+
+    ans = pd.concat([pd.Series(pins[single].astype(object),
+                               index=np.flatnonzero(single)),
+                     split, others])
+    return ans.sort_index(kind='stable')
+
+
+def clean_PIN_array(pin, pin_len=None):
+    """ Vectorized clean_PIN_by_row
+    Args:
+        pin (pd.Series): PINs of any dtype.
+        pin_len (pd.Series): 'PIN_len' column, see gen_PIN_len. The
+                             prefix is kept if None.
+
+    Returns:
+        np.ndarray of str(PIN), fixed width unicode, with the county prefix
+        "50" dropped from 12 character PINs
+    """
+    # str(x) of every PIN, including missing ones
+    text = pin.astype(str).to_numpy(dtype=object)
+    missing = pin.isna().to_numpy(dtype=bool)
+    if missing.any():
+        text[missing] = [str(x) for x in pin.to_numpy(dtype=object)[missing]]
+    pins = text.astype(str) if len(text) else np.zeros(0, dtype='<U1')
+
+    # Drop the county prefix
+    if pin_len is not None:
+        county = (pin_len == 12).to_numpy(dtype=bool) & \
+                 np.char.startswith(pins, '50')
+        pins = np.where(county, drop_prefix(pins, 2), pins)
+    return pins
+
+
+@instrumentation.timed('explode_PIN')
+def explode_PIN(df):
+    """ Vectorized split_PIN_list(gen_mult_PIN_list(df))
+    Args:
+        df (pd.DataFrame): transactions with a 'PIN' and optionally a
+                           'PIN_len' column, see gen_PIN_len.
+
+    Returns:
+        pd.DataFrame with a RangeIndex, one row per single PIN, the cleaned
+        PIN in 'PIN' and the single PIN in 'temp'. df is not modified, and
+        its other columns are only copied when a row has several PINs.
+    """
+    pins = clean_PIN_array(df['PIN'], df['PIN_len']
+                           if 'PIN_len' in df.columns else None)
+    split = split_PIN_series(pins)
+    positions = split.index.to_numpy()
+    if len(positions) == len(df) and \
+       (positions == np.arange(len(df))).all():
+        ans = df.reset_index(drop=True)
+    else:
+        ans = df.take(positions).reset_index(drop=True)
+    ans['PIN'] = pins[positions].astype(object)
+    ans['temp'] = split.to_numpy()
+    return ans
+
+
 def gen_index(df):
     return df.reset_index().rename(columns={'index':'index_clean'})
 
 def clean_temp_col(df):
     df['PIN'] = df['temp']
     return df.drop(columns=['PIN_len','temp']).drop_duplicates(subset=['Address_x', 'PIN'])
+
+
+# Separates the parts of a compound join key
+KEY_SEPARATOR = '\x1f'
+
+# Values of the 'Match Tier' column of merge_parcels
+MATCH_TIERS = ['pin', 'address', 'fuzzy', 'unmatched']
+
+
+def hash_join(left_keys, right_keys):
+    """ Inner join of two key arrays
+    Args:
+        left_keys (pd.Series): keys, missing values never match.
+        right_keys (pd.Series): keys, missing values never match.
+
+    Returns:
+        (left_positions, right_positions), np.ndarray of int. Every pair of
+        positions with equal keys, ordered by left position.
+    """
+    # Both sides share one factorization, so the join is on int codes
+    codes, _ = pd.factorize(pd.concat([pd.Series(left_keys, dtype=object),
+                                       pd.Series(right_keys, dtype=object)],
+                                      ignore_index=True))
+    left_codes, right_codes = codes[:len(left_keys)], codes[len(left_keys):]
+    left = pd.DataFrame({'key': left_codes,
+                         'left': np.arange(len(left_codes))})
+    right = pd.DataFrame({'key': right_codes,
+                          'right': np.arange(len(right_codes))})
+    joined = left[left_codes >= 0].merge(right[right_codes >= 0], on='key',
+                                         sort=False)\
+                                  .sort_values(['left', 'right'],
+                                               kind='stable')
+    return joined['left'].to_numpy(), joined['right'].to_numpy()
+
+
+def join_key(columns):
+    """ Compound key of several str columns
+    Args:
+        columns (list): list of pd.Series of str, same index.
+
+    Returns:
+        pd.Series of object, the parts joined by KEY_SEPARATOR
+    """
+    key = columns[0].astype(object)
+    for column in columns[1:]:
+        key = key + KEY_SEPARATOR + column.astype(object)
+    return key
+
+
+def parse_address_keys(series, street_name_abbr_dict):
+    """ Parse addresses into the parts used as join keys
+    Args:
+        series (pd.Series): full street addresses.
+        street_name_abbr_dict (dict): suffix to its standard abbreviation.
+
+    Returns:
+        pd.DataFrame with the columns 'number', 'prefix', 'name' (upper
+        case) and 'suffix' (standard abbreviation), same index as series
+    """
+    number, name, prefix, suffix, _ = parse_street_series(series,
+                                                          vectorized=True,
+                                                          dedupe=True)
+    suffix = suffix.astype(object)
+    return pd.DataFrame({'number': number.astype(object),
+                         'prefix': prefix.astype(object),
+                         'name': name.astype(object).str.upper(),
+                         'suffix': suffix.map(street_name_abbr_dict)\
+                                         .fillna(suffix)})
+
+
+@instrumentation.timed('merge_parcels')
+def merge_parcels(transactions, parcels, address_col='Address_x',
+                  parcel_address_col='Address', pin_col='PIN',
+                  parcel_pin_col='PIN', fuzzy=True, score_cutoff=90):
+    """ Join transactions to parcel records, cheapest match first
+    Args:
+        transactions (pd.DataFrame): transaction data. A 'PIN_len' column,
+                                     see gen_PIN_len, enables the removal of
+                                     the county prefix as clean_PIN_by_row.
+        parcels (pd.DataFrame): public records, one row per parcel.
+        address_col (str): full street address of transactions
+        parcel_address_col (str): full street address of parcels
+        pin_col (str): PIN of transactions, may list several parcels
+        parcel_pin_col (str): PIN of parcels
+        fuzzy (bool): close match the street of the rows left after the
+                      exact tiers
+        score_cutoff (int): lowest ratio accepted by the fuzzy tier
+
+    Returns:
+        pd.DataFrame with one row per matched (transaction, parcel) pair and
+        one row per unmatched transaction, in transaction order. Columns of
+        both frames are kept, the ones in both get the suffixes '_x' and
+        '_y' as in pd.merge. 'Match Tier' is one of MATCH_TIERS:
+            'pin': a PIN of the transaction equals the parcel PIN,
+            'address': same parsed number, prefix, name and suffix,
+            'fuzzy': same number, and the street is the close match of the
+                     transaction street among parcel streets,
+            'unmatched': no parcel found.
+        'Matching Ratio' is 100 for the exact tiers.
+    """
+    transactions = transactions.reset_index(drop=True)
+    parcels = parcels.reset_index(drop=True)
+    left_pos, right_pos, tiers, ratios = [], [], [], []
+
+    def add_pairs(t_pos, p_pos, tier, ratio):
+        left_pos.append(np.asarray(t_pos, dtype=np.int64))
+        right_pos.append(np.asarray(p_pos, dtype=np.int64))
+        tiers.append(np.full(len(t_pos), MATCH_TIERS.index(tier),
+                             dtype=np.int8))
+        ratios.append(np.broadcast_to(np.asarray(ratio, dtype=np.int64),
+                                      (len(t_pos),)))
+        instrumentation.count('merge_parcels.' + tier, len(t_pos))
+
+    # Tier 1: exact PIN, every single PIN of a transaction is a key
+    start = time.perf_counter()
+    pin_len = transactions['PIN_len'] \
+              if 'PIN_len' in transactions.columns else None
+    pins = split_PIN_series(clean_PIN_array(transactions[pin_col], pin_len))
+    pins = pins.where(pins.str.contains(r'\d', regex=True))
+    parcel_pins = pd.Series(clean_PIN_array(parcels[parcel_pin_col]),
+                            dtype=object)
+    parcel_pins = parcel_pins.where(parcel_pins.str.contains(r'\d',
+                                                             regex=True))
+    li, ri = hash_join(pins, parcel_pins)
+    pairs = pd.DataFrame({'t': pins.index.to_numpy()[li], 'p': ri})\
+              .drop_duplicates()
+    add_pairs(pairs['t'], pairs['p'], 'pin', 100)
+    remaining = np.setdiff1d(np.arange(len(transactions)), pairs['t'])
+    start = instrumentation.lap('merge_parcels.pin', start)
+
+    # Tier 2: exact parsed address
+    abbr = AddressParser().street_name_abbr_dict
+    parcel_keys = parse_address_keys(parcels[parcel_address_col], abbr)
+    valid = (parcel_keys['number'] != "") & (parcel_keys['name'] != "")
+    keys = parse_address_keys(transactions[address_col].iloc[remaining],
+                              abbr)
+    has_street = (keys['number'] != "") & (keys['name'] != "")
+    cols = ['number', 'prefix', 'name', 'suffix']
+    li, ri = hash_join(join_key([keys[c] for c in cols]).where(has_street),
+                       join_key([parcel_keys[c] for c in cols]).where(valid))
+    add_pairs(remaining[li], ri, 'address', 100)
+    remaining_mask = np.ones(len(remaining), dtype=bool)
+    remaining_mask[li] = False
+    keys = keys[remaining_mask & has_street.to_numpy(dtype=bool)]
+    start = instrumentation.lap('merge_parcels.address', start)
+
+    # Tier 3: close match of the street, then exact number and street
+    if fuzzy and len(keys) and valid.any():
+        streets = parcel_keys.loc[valid, ['name', 'suffix']]
+        streets = streets.assign(name=streets['name'].str.title())
+        standard_address_set = set(zip(streets['name'], streets['suffix']))
+        standard_name_set = set(streets['name'])
+        name_to_suffix_dict = {}
+        for name, suffix in standard_address_set:
+            name_to_suffix_dict.setdefault(name, set()).add(suffix)
+        matcher = StandardAddressMatcher(standard_address_set,
+                                         standard_name_set,
+                                         name_to_suffix_dict)
+
+        # Every distinct street is matched once
+        queries = keys[['name', 'suffix']].drop_duplicates()
+        matched = pd.DataFrame(matcher.match_many(queries['name'],
+                                                  queries['suffix']),
+                               columns=['m_name', 'm_suffix', 'ratio'],
+                               index=queries.index)
+        matched = keys.merge(pd.concat([queries, matched], axis=1),
+                             on=['name', 'suffix'], how='left')
+        matched.index = keys.index
+        matched = matched[matched['ratio'] >= score_cutoff]
+
+        li, ri = hash_join(
+            join_key([matched['number'], matched['m_name'].str.upper(),
+                      matched['m_suffix']]),
+            join_key([parcel_keys['number'], parcel_keys['name'],
+                      parcel_keys['suffix']]).where(valid))
+        add_pairs(matched.index.to_numpy()[li], ri, 'fuzzy',
+                  matched['ratio'].to_numpy()[li])
+        instrumentation.lap('merge_parcels.fuzzy', start)
+
+    # Transactions without any parcel
+    matched_pos = np.concatenate(left_pos)
+    unmatched = np.setdiff1d(np.arange(len(transactions)), matched_pos)
+    add_pairs(unmatched, np.full(len(unmatched), -1), 'unmatched', 0)
+
+    # Assemble in transaction order, then tier order
+    left_pos, right_pos = np.concatenate(left_pos), np.concatenate(right_pos)
+    tiers, ratios = np.concatenate(tiers), np.concatenate(ratios)
+    order = np.lexsort((tiers, left_pos))
+    left_pos, right_pos = left_pos[order], right_pos[order]
+
+    left = transactions.take(left_pos).reset_index(drop=True)
+    right = parcels.reindex(right_pos).reset_index(drop=True)
+    common = left.columns.intersection(right.columns)
+    ans = pd.concat([left.rename(columns={c: c+'_x' for c in common}),
+                     right.rename(columns={c: c+'_y' for c in common})],
+                    axis=1)
+    ans['Match Tier'] = pd.Categorical.from_codes(tiers[order],
+                                                  categories=MATCH_TIERS)
+    ans['Matching Ratio'] = ratios[order]
+    return ans
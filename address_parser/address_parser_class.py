@@ -1,31 +1,79 @@
 # -*- coding: utf-8 -*-
 
 ### Import libraries
-from fuzzywuzzy import fuzz
-import numpy as np
-import os, sys, inspect
-import pandas as pd
-import pickle
-import re
+import collections
+import functools
+import time
 
-cmd_folder = os.path.realpath(os.path.abspath(os.path.split(\
-                inspect.getfile( inspect.currentframe() ))[0]))
-if cmd_folder not in sys.path:
-     sys.path.insert(0, cmd_folder)
-
-import resource_manager
+from . import instrumentation
+from . import resource_manager
 
+# fuzzywuzzy, and numpy through candidate_index, are only imported when
+# close_match is first used, so parsing alone does not load them.
 # !pip install -q fuzzywuzzy
 # !pip install -q fuzzywuzzy[speedup]
 
+# Upper case spellings of street prefixes
+DIRECTIONS = frozenset(["E", "W", "S", "N", "EAST", "WEST", "NORTH", "SOUTH"])
+
+# DataFrame columns of the components returned by parse_street
+PARSED_COLUMNS = ['Street Number', 'Street Name', 'Street Prefix',
+                  'Street Suffix', 'Other Address']
+
+
+class ParsedAddress(collections.namedtuple('ParsedAddress', [
+        'street_number', 'street_name', 'street_prefix', 'street_suffix',
+        'other'])):
+    """ Components of a street address, see AddressParser.parse
+
+    A tuple with named fields and no instance dict, equal to the tuple
+    parse_street returns for the same address.
+    """
+    __slots__ = ()
+
+    def to_dict(self):
+        """ Components keyed by PARSED_COLUMNS """
+        return dict(zip(PARSED_COLUMNS, self))
+
+
 class AddressParser:
 
-    def __init__(self):
+    def __init__(self, cache_size=None):
+        """ Parser of Michigan street addresses
+        Args:
+            cache_size (int): if set, parse_street remembers the components
+                              of up to cache_size distinct addresses, least
+                              recently used first out. See cache_info.
+        """
+        # Loaded once per process and shared by all parsers
         self.street_name_abbr_dict = resource_manager.load_resource(\
                                             "street_name_abbr_dict.pickle")
         self.mile_road_dict = resource_manager.load_resource(\
                                             "mile_road_dict.pickle")
 
+        self._parse_cache = None
+        if cache_size:
+            self._parse_cache = functools.lru_cache(maxsize=cache_size)(\
+                                            self._parse_components)
+
+
+    def cache_info(self):
+        """ Statistics of the parse_street cache
+        Returns:
+            functools._CacheInfo with hits, misses, maxsize and currsize,
+            or None if the parser has no cache.
+        """
+        if self._parse_cache is None:
+            return None
+        return self._parse_cache.cache_info()
+
+
+    def cache_clear(self):
+        """ Empty the parse_street cache and reset its statistics
+        """
+        if self._parse_cache is not None:
+            self._parse_cache.cache_clear()
+
 
     def to_first_upper(self,x):
         """ Capitalize first letter in string, keep the remaining lowercase.
@@ -67,75 +115,100 @@ class AddressParser:
         if not address:
             return ("", "", "", "", "")
 
+        # Timers, see instrumentation.enable
+        inst = instrumentation.active()
+        if inst is not None:
+            start = time.perf_counter()
+
         # Replace irrelevant information
         address = address.replace('.',' ').replace('#',' ').replace('-',' ')
 
-        # Initiate return variables
-        street_number, street_name, street_prefix, street_suffix, other = \
-                      None, "", '', "", ""
-
         # Analyze each component in address
-        all_componenets = address.strip().split()
+        all_componenets = address.split()
+        if inst is not None:
+            tokenized = time.perf_counter()
+            inst.add_time('parse_street.tokenize', tokenized - start)
+        if self._parse_cache is not None:
+            ans = self._parse_cache(tuple(all_componenets))
+        else:
+            ans = self._parse_components(all_componenets)
+        if inst is not None:
+            inst.add_time('parse_street.classify',
+                          time.perf_counter() - tokenized)
+        return ans
+
+
+    def parse(self, address):
+        """ Split street address into named components
+        Args:
+            address (str): address to be parsed.
+
+        Returns:
+            ParsedAddress. parse_street returns the same values as a plain
+            tuple, which is cheaper to build for many addresses.
+        """
+        return ParsedAddress._make(self.parse_street(address))
+
+
+    def _parse_components(self, all_componenets):
+        """ Split the components of a street address, see parse_street
+        Args:
+            all_componenets (list or tuple): whitespace separated parts of
+                                             the address.
+
+        Returns:
+            (steet_number, street_name, street_prefix, street_suffix, other)
+        """
+        abbr = self.street_name_abbr_dict
         N = len(all_componenets)
 
         # Find last potential candidate for street_suffix
-        last_suffix_pos = None
-        for i,c in enumerate(all_componenets[::-1]):
-            if self.to_first_upper(c) in self.street_name_abbr_dict:
-              last_suffix_pos = N-1-i
-              break
-
-        # Parse all components
-        for i,c in enumerate(all_componenets):
+        last_suffix_pos = -1
+        for i in range(N-1, -1, -1):
+            if all_componenets[i].title() in abbr:
+                last_suffix_pos = i
+                break
+
+        # Classify every component once
+        street_number, street_prefix, street_suffix = "", "", ""
+        name, other = [], []
+        for i, c in enumerate(all_componenets):
             # find numeric component
             if c.isnumeric():
-            # check if it's [Number] Mile Road
-                if i+1<N and all_componenets[i+1] == "Mile":
-                    street_name += self.mile_road_dict[c.strip()]+' '
+                # check if it's [Number] Mile Road
+                if i+1 < N and all_componenets[i+1] == "Mile":
+                    name.append(self.mile_road_dict[c])
                 # record street_number
-                elif i==0:
+                elif i == 0:
                     street_number = c
                 else:
-                    other += c+' '
-            # Find other components
+                    other.append(c)
+            # Find prefix
+            elif c.upper() in DIRECTIONS:
+                if street_prefix == "":
+                    street_prefix = c[0].upper()
+                # already found street_prefix
+                else:
+                    other.append(c)
+            # After suffix
+            # deals with cases like "11 Michigan Ave Unit 12"
+            elif last_suffix_pos != -1 and i > last_suffix_pos:
+                other.append(c)
+            # At suffix position with a valid street name --> this is suffix
+            # deals with cases like "11 Street"
+            elif i == last_suffix_pos and name:
+                street_suffix = c.title()
+            # Otherwise, this is street name
             else:
-                # Find prefix
-                if c.upper() in ["E","W","S","N", "EAST", "WEST", "NORTH",
-                                 "SOUTH"]:
-                    # if this is street prefix
-                    if street_prefix == "":
-                        street_prefix = c[0].upper()
-                    # already found street_prefix
-                    else:
-                        other += (c+' ')
-                    continue
-
-                # After suffix
-                # deals with cases like "11 Michigan Ave Unit 12"
-                if (last_suffix_pos is not None) and i > last_suffix_pos:
-                    other += (c+' ')
-                    continue
-
-                # At suffix position --> check if it's suffix
-                # deals with cases like "11 Street"
-                if (i==last_suffix_pos):
-                    # haven't found street name yet --> this is street name
-                    if (street_name==""):
-                        street_name += (c+' ')
-                    # have a valid street name --> this is suffix
-                    else:
-                        street_suffix = self.to_first_upper(c)
-                    continue
-                # Otherwise, this is street name
-                street_name += (c+' ')
-
-        return tuple(map(self.strip,
-                [street_number, street_name, street_prefix, street_suffix, other]))
+                name.append(c)
+
+        return (street_number, ' '.join(name), street_prefix, street_suffix,
+                ' '.join(other))
 
 
     def close_match(self, street_name, street_suffix,
                          standard_address_set, standard_name_set,
-                         name_to_suffix_dict):
+                         name_to_suffix_dict, index=None, exact_index=None):
         """ Find closest match with standard addresses
         Args:
             street_name (str): street name of address
@@ -143,6 +216,20 @@ class AddressParser:
             standard_address_set (set): all standard full addresses
             standard_name_set (set): all standard full name
             name_to_suffix_dict (dict): name to suffix dict
+            index (MatchIndex): optional index built by build_match_index
+                                from the same sets. Only candidates that can
+                                beat the best ratio so far are scored; the
+                                result is the same as without index. A
+                                reference_store.ReferenceStore can also be
+                                passed; it scans in the order of its slots,
+                                so candidates with the same ratio may be
+                                chosen differently.
+            exact_index (ExactKeyIndex): optional index built by
+                                build_exact_index from the same sets.
+                                Addresses equal to a standard address up to
+                                case, whitespace and suffix abbreviation
+                                are then matched with ratio 100 without
+                                fuzzy scoring.
 
         Returns:
             (matched_name, matched_suffix, ratio)
@@ -156,22 +243,31 @@ class AddressParser:
         matched_suffix = ""
         ratio = 0
 
-        # Look for exact match
-        if (street_name, street_suffix) in standard_address_set: 
-            return (street_name,street_suffix,100)
+        # Timers and counters, see instrumentation.enable
+        inst = instrumentation.active()
+        if inst is not None:
+            inst.count('close_match.calls')
+            start = time.perf_counter()
 
-        if tuple(street_name.split(' ')) in standard_address_set: 
-            return (street_name.split(' ')[0],street_name.split(' ')[1],100)
-
-        if (street_name+" "+street_suffix) in standard_name_set:
-            matched_name = (street_name+" "+street_suffix)
-            if len(name_to_suffix_dict[matched_name])==1:
-                matched_suffix = list(name_to_suffix_dict[matched_name])[0]
-            else:
-                matched_suffix = ''
-            return (matched_name, matched_suffix, 100)
+        # Look for exact match
+        exact = self._exact_match(street_name, street_suffix,
+                                  standard_address_set, standard_name_set,
+                                  name_to_suffix_dict, exact_index)
+        if inst is not None:
+            inst.add_time('close_match.exact', time.perf_counter() - start)
+        if exact is not None:
+            if inst is not None:
+                inst.count('close_match.exact_hits')
+            return exact
+
+        if index is not None:
+            return self._indexed_close_match(street_name, street_suffix,
+                                             name_to_suffix_dict, index, inst)
 
         # Look for full street address match
+        from fuzzywuzzy import fuzz
+        if inst is not None:
+            start = time.perf_counter()
         for standard_name, standard_suffix in standard_address_set:
             potential_ratio = fuzz.ratio( \
                 (street_name+' '+street_suffix).lower(),
@@ -180,18 +276,233 @@ class AddressParser:
                 matched_name = standard_name
                 matched_suffix = standard_suffix
                 ratio = potential_ratio
+        if inst is not None:
+            inst.add_time('close_match.address_scan',
+                          time.perf_counter() - start)
+            inst.count('fuzzy_comparisons', len(standard_address_set))
 
         # Look for street address match
         # only when ratio is not good enough
         if (ratio < 90):
+            if inst is not None:
+                start = time.perf_counter()
             for standard_name in standard_name_set:
                 potential_ratio = fuzz.ratio( street_name.lower(),
                                               standard_name.lower() )
                 if (potential_ratio > ratio):
                     matched_name = standard_name
                     if len(name_to_suffix_dict[matched_name])==1: 
-                        matched_suffix = list(name_to_suffix_dict[matched_name])[0]
+                        matched_suffix = next(iter(name_to_suffix_dict[matched_name]))
                     ratio = potential_ratio
+            if inst is not None:
+                inst.add_time('close_match.name_scan',
+                              time.perf_counter() - start)
+                inst.count('close_match.fallback_scans')
+                inst.count('fuzzy_comparisons', len(standard_name_set))
+        return (self.strip(matched_name), self.strip(matched_suffix), ratio)
+
+
+    def _exact_match(self, street_name, street_suffix,
+                     standard_address_set, standard_name_set,
+                     name_to_suffix_dict, exact_index=None):
+        """ Exact part of close_match
+        Args:
+            street_name (str): normalized street name of address
+            street_suffix (str): normalized street suffix of address
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+            exact_index (ExactKeyIndex): if set, also looked up when the
+                                         address is not an exact match
+
+        Returns:
+            (matched_name, matched_suffix, 100), or None if there is no
+            exact match
+        """
+        if (street_name, street_suffix) in standard_address_set: 
+            return (street_name,street_suffix,100)
+
+        words = tuple(street_name.split(' '))
+        if words in standard_address_set: 
+            return (words[0],words[1],100)
+
+        matched_name = street_name+" "+street_suffix
+        if matched_name in standard_name_set:
+            suffixes = name_to_suffix_dict[matched_name]
+            if len(suffixes)==1:
+                matched_suffix = next(iter(suffixes))
+            else:
+                matched_suffix = ''
+            return (matched_name, matched_suffix, 100)
+
+        if exact_index is not None:
+            matched = exact_index.lookup(street_name, street_suffix)
+            if matched is not None:
+                return (self.strip(matched[0]), self.strip(matched[1]), 100)
+        return None
+
+
+    def close_match_topk(self, street_name, street_suffix,
+                         standard_address_set, standard_name_set,
+                         name_to_suffix_dict, k=5, score_cutoff=0,
+                         index=None, exact_index=None):
+        """ Find the k closest matches with standard addresses
+        Args:
+            street_name (str): street name of address
+            street_suffix (str): street suffix of address
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+            k (int): maximum number of candidates returned
+            score_cutoff (int): candidates with a lower ratio are dropped
+            index (MatchIndex): index built by build_match_index from the
+                                same sets. It is built here if None, so pass
+                                one (or use StandardAddressMatcher) when
+                                matching many addresses.
+            exact_index (ExactKeyIndex): see close_match
+
+        Returns:
+            list of (matched_name, matched_suffix, ratio), best first.
+            An exact match is returned alone, as in close_match. Otherwise
+            full addresses are ranked by the ratio of name and suffix, and
+            if none reaches 90, street names are ranked by the ratio of the
+            name with the only suffix of the name, or '', as suffix. On
+            equal ratios full addresses come first, then the scan order of
+            close_match.
+        """
+        street_name = self.strip(street_name).title()
+        street_suffix = self.strip(street_suffix).title()
+
+        exact = self._exact_match(street_name, street_suffix,
+                                  standard_address_set, standard_name_set,
+                                  name_to_suffix_dict, exact_index)
+        if exact is not None:
+            return [exact] if (k > 0 and score_cutoff <= 100) else []
+
+        if index is None:
+            index = self.build_match_index(standard_address_set,
+                                           standard_name_set)
+
+        # Look for full street address match
+        candidates = [index.addresses[pos] + (score,) for pos, score in
+                      index.address_index.top_k(
+                          (street_name+' '+street_suffix).lower(), k,
+                          score_cutoff)]
+
+        # Look for street address match
+        # only when ratio is not good enough
+        if (not candidates) or candidates[0][2] < 90:
+            # Names need a higher ratio than the k-th full address
+            name_cutoff = score_cutoff
+            if len(candidates) == k:
+                name_cutoff = max(name_cutoff, candidates[-1][2] + 1)
+            for pos, score in index.name_index.top_k(street_name.lower(), k,
+                                                     name_cutoff):
+                suffixes = name_to_suffix_dict[index.names[pos]]
+                suffix = next(iter(suffixes)) if len(suffixes) == 1 else ''
+                candidates.append((index.names[pos], suffix, score))
+
+        # Stable sort keeps full addresses first on equal ratios
+        candidates.sort(key=lambda x: -x[2])
+        ans, seen = [], set()
+        for name, suffix, score in candidates:
+            name, suffix = self.strip(name), self.strip(suffix)
+            if (name, suffix) not in seen:
+                seen.add((name, suffix))
+                ans.append((name, suffix, score))
+        return ans[:k]
+
+
+    def build_match_index(self, standard_address_set, standard_name_set):
+        """ Build a candidate index to be passed to close_match
+        Args:
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+
+        Returns:
+            MatchIndex. It is only valid as long as both sets are unchanged.
+        """
+        from .candidate_index import MatchIndex
+        return MatchIndex(standard_address_set, standard_name_set)
+
+
+    def build_exact_index(self, standard_address_set, standard_name_set,
+                          name_to_suffix_dict):
+        """ Build a normalized exact match index to be passed to close_match
+        Args:
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+
+        Returns:
+            ExactKeyIndex. It is only valid as long as the sets and dict are
+            unchanged.
+        """
+        from .candidate_index import ExactKeyIndex
+        return ExactKeyIndex(standard_address_set, standard_name_set,
+                             name_to_suffix_dict, self.street_name_abbr_dict)
+
+
+    def _indexed_close_match(self, street_name, street_suffix,
+                             name_to_suffix_dict, index, inst=None):
+        """ Fuzzy part of close_match, using a MatchIndex
+        Args:
+            street_name (str): normalized street name of address
+            street_suffix (str): normalized street suffix of address
+            name_to_suffix_dict (dict): name to suffix dict
+            index (MatchIndex)
+            inst (Instrumentation): active instrumentation, if any
+
+        Returns:
+            (matched_name, matched_suffix, ratio)
+        """
+        matched_name = ""
+        matched_suffix = ""
+        ratio = 0
+
+        # Look for full street address match
+        if inst is not None:
+            start = time.perf_counter()
+            n_scored = index.address_index.n_scored + \
+                       index.name_index.n_scored
+        pos, score = index.address_index.best_match(
+                        (street_name+' '+street_suffix).lower())
+        if pos >= 0:
+            matched_name, matched_suffix = index.addresses[pos]
+            ratio = score
+        if inst is not None:
+            inst.add_time('close_match.address_scan',
+                          time.perf_counter() - start)
+
+        # Look for street address match
+        # only when ratio is not good enough
+        if (ratio < 90):
+            if inst is not None:
+                start = time.perf_counter()
+                inst.count('close_match.fallback_scans')
+            name_query = street_name.lower()
+            pos, score = index.name_index.best_match(name_query,
+                                                     score_cutoff=ratio)
+            if pos >= 0:
+                # The linear scan keeps the suffix of the last improving
+                # name that has a unique suffix
+                records = [(pos, score)]
+                if len(name_to_suffix_dict[index.names[pos]]) != 1:
+                    records = index.name_index.records(name_query, ratio,
+                                                       pos) + records
+                for p, _ in reversed(records):
+                    suffixes = name_to_suffix_dict[index.names[p]]
+                    if len(suffixes) == 1:
+                        matched_suffix = next(iter(suffixes))
+                        break
+                matched_name = index.names[pos]
+                ratio = score
+            if inst is not None:
+                inst.add_time('close_match.name_scan',
+                              time.perf_counter() - start)
+        if inst is not None:
+            inst.count('fuzzy_comparisons', index.address_index.n_scored +
+                       index.name_index.n_scored - n_scored)
         return (self.strip(matched_name), self.strip(matched_suffix), ratio)
 
 
@@ -209,6 +520,5 @@ class AddressParser:
         """
         if street_name in name_to_suffix_dict:
             if ( len(name_to_suffix_dict[street_name]) == 1 ):
-                return list(name_to_suffix_dict[street_name])[0]
-        else:
-            return ""
+                return next(iter(name_to_suffix_dict[street_name]))
+        return ""
@@ -0,0 +1,335 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import collections
+import numpy as np
+import pandas as pd
+
+from .address_parser_class import AddressParser, ParsedAddress, PARSED_COLUMNS
+
+DIRECTIONS = ["E", "W", "S", "N", "EAST", "WEST", "NORTH", "SOUTH"]
+CHUNK_SIZE = 50000
+
+# Rows are separated by this token when a whole chunk of strings is
+# tokenized at once. It is not whitespace for str.split.
+ROW_SEPARATOR = '\uffff'
+
+class ParsedColumns(collections.namedtuple('ParsedColumns',
+                                           ParsedAddress._fields)):
+    """ Components of many addresses as five parallel np.ndarray of str,
+    see parse_street_batch
+
+    Unpacks into the five columns like the tuple parse_street_batch used to
+    return. Row i is row(i), and to_frame wraps the arrays in a DataFrame
+    without copying them.
+    """
+    __slots__ = ()
+
+    @property
+    def n_rows(self):
+        return len(self.street_number)
+
+
+    def row(self, i):
+        """ Components of row i
+        Returns:
+            ParsedAddress
+        """
+        return ParsedAddress._make(column[i] for column in self)
+
+
+    def to_frame(self, index=None, categorical=()):
+        """ DataFrame of the components
+        Args:
+            index (pd.Index): index of the DataFrame, default is a
+                              RangeIndex.
+            categorical (iterable): columns stored as pd.Categorical,
+                                    e.g. ['Street Prefix', 'Street Suffix'],
+                                    which only have a few distinct values.
+
+        Returns:
+            pd.DataFrame with the columns PARSED_COLUMNS. Columns that are
+            not categorical share the arrays of self.
+        """
+        columns = dict(zip(PARSED_COLUMNS, self))
+        for col in categorical:
+            columns[col] = pd.Categorical(columns[col])
+        return pd.DataFrame(columns, index=index, copy=False)
+
+
+    @classmethod
+    def concat(cls, parts):
+        """ Rows of several ParsedColumns, or 5-tuples of columns, in order
+        Returns:
+            ParsedColumns
+        """
+        parts = list(parts)
+        if not parts:
+            return cls._make(np.zeros(0, dtype=object) for _ in range(5))
+        return cls._make(np.concatenate([np.asarray(part[i], dtype=object)
+                                         for part in parts])
+                         for i in range(5))
+
+
+######################################################################
+########## Token classification
+######################################################################
+
+def row_starts(rows):
+    """ Index of the first value of each group of equal rows
+    Args:
+        rows (np.ndarray): row of each value, non-decreasing.
+
+    Returns:
+        (first, starts): boolean mask of first values and their indices
+    """
+    first = np.r_[True, rows[1:] != rows[:-1]] if len(rows) else \
+            np.zeros(0, dtype=bool)
+    return first, np.flatnonzero(first)
+
+
+def positions_in_row(rows):
+    """ Position of each value within its row
+    Args:
+        rows (np.ndarray): row of each value, non-decreasing.
+
+    Returns:
+        np.ndarray of int
+    """
+    _, starts = row_starts(rows)
+    return np.arange(len(rows)) - np.repeat(starts,
+                                            np.diff(np.r_[starts, len(rows)]))
+
+
+def first_by_row(mask, rows):
+    """ Mask of the first True value in each row
+    Args:
+        mask (np.ndarray): boolean array.
+        rows (np.ndarray): row of each value, non-decreasing.
+
+    Returns:
+        boolean np.ndarray
+    """
+    idx = np.flatnonzero(mask)
+    _, starts = row_starts(rows[idx])
+    ans = np.zeros(len(mask), dtype=bool)
+    ans[idx[starts]] = True
+    return ans
+
+
+def count_before_in_row(mask, rows):
+    """ Number of True values before each position, within its row
+    Args:
+        mask (np.ndarray): boolean array.
+        rows (np.ndarray): row of each value, non-decreasing.
+
+    Returns:
+        np.ndarray of int
+    """
+    total = np.cumsum(mask) - mask
+    _, starts = row_starts(rows)
+    return total - np.repeat(total[starts], np.diff(np.r_[starts, len(rows)]))
+
+
+def classify(n, rows, positions, is_numeric, is_suffix, is_direction,
+             is_mile, has_mile_name):
+    """ Assign every token to a component, as AddressParser.parse_street
+    Args:
+        n (int): number of rows.
+        rows (np.ndarray): row of each token, non-decreasing.
+        positions (np.ndarray): position of each token within its row.
+        is_numeric (np.ndarray): token.isnumeric()
+        is_suffix (np.ndarray): token.title() is in street_name_abbr_dict
+        is_direction (np.ndarray): token.upper() is in DIRECTIONS
+        is_mile (np.ndarray): token == "Mile"
+        has_mile_name (np.ndarray): token is in mile_road_dict
+
+    Returns:
+        dict of boolean masks over tokens: 'number', 'prefix', 'suffix',
+        'name', 'mile' (part of name, replaced by its mile road name) and
+        'other'. 'failed' is a boolean mask over rows on which
+        parse_street raises.
+    """
+    same_row_next = np.r_[rows[1:] == rows[:-1], False]
+    next_is_mile = np.r_[is_mile[1:], False] & same_row_next
+
+    # Numeric components
+    mile = is_numeric & next_is_mile
+    number = is_numeric & ~next_is_mile & (positions == 0)
+    other = is_numeric & ~next_is_mile & (positions != 0)
+
+    # Prefix: first direction in the row, other directions are other
+    direction = ~is_numeric & is_direction
+    prefix = first_by_row(direction, rows)
+    other |= direction & ~prefix
+
+    # Position of the last potential suffix of each row
+    last_suffix_pos = np.full(n, -1, dtype=np.int64)
+    np.maximum.at(last_suffix_pos, rows[is_suffix], positions[is_suffix])
+    last_suffix_pos = last_suffix_pos[rows]
+    rest = ~is_numeric & ~is_direction
+    after_suffix = rest & (last_suffix_pos >= 0) & \
+                   (positions > last_suffix_pos)
+    at_suffix = rest & (positions == last_suffix_pos)
+    name = (rest & ~after_suffix & ~at_suffix) | mile
+    other |= after_suffix
+
+    # At suffix position, it is a suffix only if a street name was found
+    has_name = count_before_in_row(name, rows) > 0
+    suffix = at_suffix & has_name
+    name |= at_suffix & ~has_name
+
+    failed = np.zeros(n, dtype=bool)
+    failed[rows[mile & ~has_mile_name]] = True
+    return {'number': number, 'prefix': prefix, 'suffix': suffix,
+            'name': name, 'mile': mile, 'other': other, 'failed': failed}
+
+
+######################################################################
+########## Tokenizer
+######################################################################
+
+def join_by_row(parts, rows, n):
+    """ Join strings with a single space, per row
+    Args:
+        parts (np.ndarray): strings to be joined, in row order.
+        rows (np.ndarray): row of each string, non-decreasing.
+        n (int): number of rows.
+
+    Returns:
+        np.ndarray of n strings. Rows without parts are "".
+    """
+    ans = np.full(n, "", dtype=object)
+    if len(parts) == 0:
+        return ans
+    first, starts = row_starts(rows)
+    parts = parts.copy()
+    parts[~first] = np.add(' ', parts[~first])
+    ans[rows[starts]] = np.add.reduceat(parts, starts)
+    return ans
+
+
+def tokenize(values):
+    """ Tokenize many addresses in one pass
+    Args:
+        values (list): list of str.
+
+    Returns:
+        (codes, uniques, rows) such that uniques[codes] are all tokens, in
+        order, and rows is the row of each token. None if a value contains
+        ROW_SEPARATOR as a token of its own.
+    """
+    text = (' '+ROW_SEPARATOR+' ').join(values)
+    text = text.replace('.',' ').replace('#',' ').replace('-',' ')
+    codes, uniques = pd.factorize(np.array(text.split(), dtype=object))
+    uniques = np.asarray(uniques, dtype=object)
+
+    separator = np.flatnonzero(uniques == ROW_SEPARATOR)
+    is_separator = codes == (separator[0] if len(separator) else -1)
+    if is_separator.sum() != max(len(values)-1, 0):
+        return None
+    rows = np.cumsum(is_separator)[~is_separator]
+    return codes[~is_separator], uniques, rows
+
+
+def parse_chunk(values, street_name_abbr_dict, mile_road_dict):
+    """ Parse a chunk of addresses, see parse_street_batch
+    Args:
+        values (list): list of str.
+        street_name_abbr_dict (dict): suffix dictionary of the parser.
+        mile_road_dict (dict): mile road dictionary of the parser.
+
+    Returns:
+        (street_number, street_name, street_prefix, street_suffix, other,
+         failed): five np.ndarray of str and a boolean mask of the rows that
+        must be parsed one by one instead.
+    """
+    n = len(values)
+    tokenized = tokenize(values)
+    if tokenized is None:
+        return tuple(np.full(n, "", dtype=object) for _ in range(5)) + \
+               (np.ones(n, dtype=bool),)
+    codes, uniques, rows = tokenized
+
+    # Classify every distinct token once, then look up by code
+    tokens = pd.Series(uniques, dtype=object)
+    titled = tokens.str.title()
+    is_direction = tokens.str.upper().isin(DIRECTIONS).to_numpy(dtype=bool)
+    initial = np.full(len(uniques), "", dtype=object)
+    initial[is_direction] = tokens[is_direction].str[0].str.upper()
+    mile_name = tokens.map(mile_road_dict).to_numpy(dtype=object)
+    has_mile_name = ~pd.isna(mile_name)
+
+    masks = classify(
+        n, rows, positions_in_row(rows),
+        tokens.str.isnumeric().to_numpy(dtype=bool)[codes],
+        titled.isin(street_name_abbr_dict).to_numpy(dtype=bool)[codes],
+        is_direction[codes],
+        (uniques == "Mile")[codes],
+        has_mile_name[codes])
+
+    street_number = np.full(n, "", dtype=object)
+    number = masks['number']
+    street_number[rows[number]] = uniques[codes[number]]
+    street_prefix = np.full(n, "", dtype=object)
+    prefix = masks['prefix']
+    street_prefix[rows[prefix]] = initial[codes[prefix]]
+    street_suffix = np.full(n, "", dtype=object)
+    suffix = masks['suffix']
+    street_suffix[rows[suffix]] = titled.to_numpy(dtype=object)[codes[suffix]]
+
+    # Mile numbers without a mile road name are in failed rows, which are
+    # parsed again one by one
+    name = masks['name']
+    parts = np.where((masks['mile'] & has_mile_name[codes])[name],
+                     mile_name[codes[name]], uniques[codes[name]])
+    street_name = join_by_row(parts, rows[name], n)
+    other = masks['other']
+    other = join_by_row(uniques[codes[other]], rows[other], n)
+
+    return (street_number, street_name, street_prefix, street_suffix, other,
+            masks['failed'])
+
+
+def parse_street_batch(values, parser=None, chunk_size=CHUNK_SIZE):
+    """ Split many street addresses into components at once
+    Args:
+        values (iterable): addresses to be parsed, e.g. a pd.Series.
+        parser (AddressParser): parser whose dictionaries are used. A new
+                                one is created if None.
+        chunk_size (int): number of addresses tokenized at once.
+
+    Returns:
+        ParsedColumns, five np.ndarray of str:
+            (steet_number, street_name, street_prefix, street_suffix, other)
+        Row i is equal to parser.parse_street(values[i]).
+    """
+    if parser is None:
+        parser = AddressParser()
+    values = np.asarray(values, dtype=object)
+    n = len(values)
+    ans = tuple(np.full(n, "", dtype=object) for _ in range(5))
+
+    # Values that are not plain strings go through parse_street directly
+    if pd.api.types.infer_dtype(values, skipna=False) == 'string':
+        is_str = np.ones(n, dtype=bool)
+    else:
+        is_str = np.fromiter((type(v) is str for v in values),
+                             dtype=bool, count=n)
+
+    for start in range(0, n, chunk_size):
+        idx = np.arange(start, min(start+chunk_size, n))
+        idx = idx[is_str[idx]]
+        if len(idx) == 0:
+            continue
+        *columns, failed = parse_chunk(values[idx].tolist(),
+                                       parser.street_name_abbr_dict,
+                                       parser.mile_road_dict)
+        for target, column in zip(ans, columns):
+            target[idx] = column
+        is_str[idx[failed]] = False
+
+    for i in np.flatnonzero(~is_str):
+        for target, value in zip(ans, parser.parse_street(values[i])):
+            target[i] = value
+    return ParsedColumns._make(ans)
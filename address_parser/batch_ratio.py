@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import difflib
+from fuzzywuzzy import fuzz
+import numpy as np
+
+# Keys up to WORD_BITS characters are scored by the kernel, one bit per
+# character. Longer keys are scored one by one.
+WORD_BITS = 64
+ALL_BITS = np.uint64(2**64 - 1)
+POPCOUNT_TABLE = np.array([bin(i).count('1') for i in range(256)],
+                          dtype=np.uint8)
+
+
+def levenshtein_backend():
+    """ Whether fuzz.ratio is computed by python-Levenshtein
+    Returns:
+        bool. Without python-Levenshtein, fuzzywuzzy falls back to difflib,
+        whose ratio is not the indel ratio computed by BatchRatio.
+    """
+    return fuzz.SequenceMatcher is not difflib.SequenceMatcher
+
+
+def popcount(x):
+    """ Number of set bits of every element of a np.ndarray of uint64 """
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(x)
+    return POPCOUNT_TABLE[x.view(np.uint8).reshape(len(x), 8)].sum(axis=1)
+
+
+def low_bits(n):
+    """ Masks of the lowest n bits, n <= WORD_BITS """
+    n = np.asarray(n, dtype=np.uint64)
+    shifted = np.left_shift(np.uint64(1),
+                            np.minimum(n, np.uint64(WORD_BITS - 1)))
+    return np.where(n >= WORD_BITS, ALL_BITS, shifted - np.uint64(1))
+
+
+class BatchRatio:
+
+    def __init__(self, keys, scorer=None):
+        """ Scores one query against many keys in one vectorized pass
+        Args:
+            keys (list): list of str.
+            scorer (callable): scorer(query, key) used for keys longer than
+                               WORD_BITS and for the rare scores that lie on
+                               a rounding boundary. Default is fuzz.ratio.
+
+        Each key is encoded once as one uint64 bit mask per character of
+        the alphabet of all keys, the positions of that character in the
+        key. scores() then computes the longest common subsequence of the
+        query with every key at once, one step per query character
+        (Hyyro's bit-parallel LCS), and from it the indel ratio
+            round(100 * (1 - (m + n - 2*LCS) / (m + n)))
+        which is fuzz.ratio when python-Levenshtein is installed, see
+        levenshtein_backend.
+        """
+        self.keys = keys
+        self.scorer = fuzz.ratio if scorer is None else scorer
+        self.lengths = np.fromiter(map(len, keys), dtype=np.int64,
+                                   count=len(keys))
+        self.is_long = self.lengths > WORD_BITS
+
+        # Alphabet of the keys, as sorted code points
+        codes = np.frombuffer(''.join(keys).encode('utf-32-le'),
+                              dtype=np.uint32)
+        self.alphabet = np.unique(codes)
+
+        # masks[c, j]: bit i is set iff key j has character c at position i.
+        # The last row stays zero, for characters outside of the alphabet.
+        self.masks = np.zeros((len(self.alphabet)+1, len(keys)),
+                              dtype=np.uint64)
+        rows = np.repeat(np.arange(len(keys)), self.lengths)
+        starts = np.cumsum(self.lengths) - self.lengths
+        positions = np.arange(len(codes)) - np.repeat(starts, self.lengths)
+        short = ~self.is_long[rows]
+        np.bitwise_or.at(self.masks,
+                         (np.searchsorted(self.alphabet, codes[short]),
+                          rows[short]),
+                         np.left_shift(np.uint64(1),
+                                       positions[short].astype(np.uint64)))
+
+
+    def __len__(self):
+        return len(self.keys)
+
+
+    def lcs(self, query, rows):
+        """ Length of the longest common subsequence of query and the keys
+        of rows, which must not be longer than WORD_BITS
+        Args:
+            query (str): string to be matched.
+            rows (np.ndarray): positions of keys.
+
+        Returns:
+            np.ndarray of int64
+        """
+        codes = np.frombuffer(query.encode('utf-32-le'), dtype=np.uint32)
+        slots = np.searchsorted(self.alphabet, codes)
+        found = slots < len(self.alphabet)
+        found[found] = self.alphabet[slots[found]] == codes[found]
+        slots[~found] = len(self.alphabet)
+
+        # Only the masks of the characters of the query are gathered
+        distinct, inverse = np.unique(slots, return_inverse=True)
+        masks = self.masks[distinct][:, rows]
+        v = np.full(len(rows), ALL_BITS, dtype=np.uint64)
+        for i in inverse.ravel().tolist():
+            u = v & masks[i]
+            v = (v + u) | (v - u)
+        return popcount(~v & low_bits(self.lengths[rows])).astype(np.int64)
+
+
+    def scores(self, query, rows=None):
+        """ Ratios of query with keys
+        Args:
+            query (str): string to be matched.
+            rows (np.ndarray): positions of the keys to score. All keys
+                               if None.
+
+        Returns:
+            np.ndarray of int64, scores[i] == scorer(query, keys[rows[i]])
+            when scorer is fuzz.ratio with python-Levenshtein.
+        """
+        rows = np.arange(len(self.keys)) if rows is None else \
+               np.asarray(rows, dtype=np.int64)
+        lengths = self.lengths[rows]
+        short = ~self.is_long[rows]
+        total = lengths + len(query)
+
+        common = np.zeros(len(rows), dtype=np.int64)
+        common[short] = self.lcs(query, rows[short])
+        ratio = 1.0 - (total - 2*common) / np.maximum(total, 1)
+        scaled = 100 * ratio
+        ans = np.rint(scaled).astype(np.int64)
+        # fuzz.ratio: equal strings score 100, an empty one 0
+        ans[lengths == 0] = 0
+        if not query:
+            ans[:] = 0
+            ans[lengths == 0] = 100
+
+        # Long keys, and scores whose rounding depends on the last bit of
+        # the division, are left to the scorer
+        check = ~short | (np.abs(scaled - np.floor(scaled) - 0.5) < 1e-9)
+        for i in np.flatnonzero(check & (total > 0)).tolist():
+            ans[i] = self.scorer(query, self.keys[rows[i]])
+        return ans
@@ -0,0 +1,530 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+from fuzzywuzzy import fuzz
+import heapq
+import numpy as np
+
+from .batch_ratio import BatchRatio, levenshtein_backend
+
+# Characters are counted in the slots of a fixed alphabet. Everything outside
+# of it shares the last slot, which can only over-estimate the number of
+# common characters, so the bounds below stay valid upper bounds.
+ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789 .-'&/,"
+N_SLOTS = len(ALPHABET) + 1
+CHAR_SLOT = np.full(128, N_SLOTS - 1, dtype=np.int64)
+CHAR_SLOT[[ord(c) for c in ALPHABET]] = np.arange(len(ALPHABET))
+
+# Number of rows counted at once when building an index
+COUNT_CHUNK_SIZE = 65536
+
+
+def char_slots(x):
+    """ Map every character of a string to its alphabet slot
+    Args:
+        x (str): string to be mapped.
+
+    Returns:
+        np.ndarray of slot numbers, one per character
+    """
+    codes = np.frombuffer(x.encode('utf-32-le'), dtype=np.uint32)
+    return CHAR_SLOT[np.minimum(codes, 127)]
+
+
+def char_counts(x):
+    """ Count characters of a string per alphabet slot
+    Args:
+        x (str): string to be counted.
+
+    Returns:
+        np.ndarray of shape (N_SLOTS,)
+    """
+    return np.bincount(char_slots(x), minlength=N_SLOTS)
+
+
+def count_matrix(keys):
+    """ Count characters per alphabet slot for a list of strings
+    Args:
+        keys (list): list of str.
+
+    Returns:
+        np.ndarray of shape (len(keys), N_SLOTS). The dtype is the smallest
+        unsigned type that holds every count.
+    """
+    chunks = []
+    for start in range(0, len(keys), COUNT_CHUNK_SIZE):
+        chunk = keys[start:start+COUNT_CHUNK_SIZE]
+        lengths = np.fromiter(map(len, chunk), dtype=np.int64,
+                              count=len(chunk))
+        rows = np.repeat(np.arange(len(chunk)), lengths)
+        slots = char_slots(''.join(chunk))
+        chunks.append(np.bincount(rows*N_SLOTS + slots,
+                                  minlength=len(chunk)*N_SLOTS)\
+                        .reshape(len(chunk), N_SLOTS))
+    if not chunks:
+        return np.zeros((0, N_SLOTS), dtype=np.uint8)
+    counts = np.vstack(chunks)
+    dtype = np.uint8 if counts.max(initial=0) <= 255 else np.uint32
+    return counts.astype(dtype)
+
+
+def ratio_bound(common, total):
+    """ Upper bound of fuzz.ratio for strings sharing at most ``common``
+    characters
+    Args:
+        common (np.ndarray): number of characters two strings have in common.
+        total (np.ndarray): sum of the lengths of both strings.
+
+    Returns:
+        np.ndarray of int. fuzz.ratio of the two strings is never larger.
+    """
+    common = np.asarray(common)
+    total = np.asarray(total)
+    ratio = 100 * (2.0 * common / np.maximum(total, 1))
+    return np.where(total > 0, np.rint(ratio), 100).astype(np.int64)
+
+
+class CandidateIndex:
+
+    def __init__(self, keys, scorer=None, arrays=None, batch=None):
+        """ Length-bucketed index over reference strings
+        Args:
+            keys (iterable): reference strings. Their order is the scan order
+                             used to break ties, as in a linear scan.
+            scorer (callable): scorer(query, key) returning an int ratio.
+                               Default is fuzz.ratio.
+            arrays (dict): output of arrays() of an index over the same
+                           keys in the same order, e.g. loaded from a
+                           file. Nothing is counted again.
+            batch (BatchRatio): scores all candidates of a pass at once
+                                instead of one by one. It must give the
+                                same scores as scorer. By default it is
+                                built when scorer is fuzz.ratio and
+                                python-Levenshtein is installed, see
+                                batch_ratio.levenshtein_backend. Pass False
+                                to always score one by one.
+        """
+        self.scorer = fuzz.ratio if scorer is None else scorer
+
+        if arrays is not None:
+            self.keys = keys
+            self.positions = arrays['positions']
+            self.lengths = arrays['lengths']
+            self.counts = arrays['counts']
+        else:
+            self.keys = list(keys)
+            # Sort rows by length so that each length is one contiguous
+            # bucket
+            lengths = np.fromiter(map(len, self.keys), dtype=np.int64,
+                                  count=len(self.keys))
+            self.positions = np.argsort(lengths, kind='stable')
+            self.lengths = lengths[self.positions]
+            self.counts = count_matrix([self.keys[p] for p in self.positions])
+
+        self.bucket_lengths, starts = np.unique(self.lengths,
+                                                return_index=True)
+        self.bucket_ends = np.append(starts[1:], len(self.keys))
+        self.bucket_starts = starts
+        # Number of keys scored so far
+        self.n_scored = 0
+
+        if batch is None and scorer is None and levenshtein_backend():
+            batch = BatchRatio(self.keys)
+        self.batch = batch or None
+
+
+    def arrays(self):
+        """ Arrays needed to rebuild the index without counting
+        Returns:
+            dict of np.ndarray, see __init__
+        """
+        return {'positions': self.positions, 'lengths': self.lengths,
+                'counts': self.counts}
+
+
+    def __len__(self):
+        return len(self.keys)
+
+
+    def upper_bounds(self, query, rows):
+        """ Upper bounds of the ratio between query and the keys in rows
+        Args:
+            query (str): string to be matched.
+            rows (np.ndarray): rows of the index, in length order.
+
+        Returns:
+            np.ndarray of int, one bound per row
+        """
+        common = np.minimum(self.counts[rows], char_counts(query)).sum(axis=1)
+        return ratio_bound(common, self.lengths[rows] + len(query))
+
+
+    def select_rows(self, buckets):
+        """ Rows of all keys in the selected length buckets
+        Args:
+            buckets (np.ndarray): boolean mask over self.bucket_lengths
+
+        Returns:
+            np.ndarray of rows
+        """
+        selected = np.flatnonzero(buckets)
+        if len(selected) == 0:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate([np.arange(self.bucket_starts[b],
+                                         self.bucket_ends[b])
+                               for b in selected])
+
+
+    def candidates(self, query, buckets):
+        """ Keys of the selected length buckets with their upper bounds
+        Args:
+            query (str): string to be matched.
+            buckets (np.ndarray): boolean mask over self.bucket_lengths
+
+        Returns:
+            (positions, bounds), np.ndarray each, one entry per key
+        """
+        rows = self.select_rows(buckets)
+        return self.positions[rows], self.upper_bounds(query, rows)
+
+
+    def best_match(self, query, score_cutoff=0, seed_cutoff=90):
+        """ Find the key a linear scan with a strict ``>`` comparison would
+        keep, i.e. the first key in scan order with the highest score
+        Args:
+            query (str): string to be matched.
+            score_cutoff (int): only scores strictly larger are returned.
+            seed_cutoff (int): keys whose length alone allows this ratio are
+                               scored first, to tighten the bound quickly.
+
+        Returns:
+            (position, score). position is -1 if no key scores above
+            score_cutoff, in which case score is score_cutoff.
+        """
+        ans = self.top_k(query, 1, score_cutoff+1, seed_cutoff)
+        if ans:
+            return ans[0]
+        return (-1, score_cutoff)
+
+
+    def top_k(self, query, k, score_cutoff=0, seed_cutoff=90):
+        """ Find the k keys with the highest scores
+        Args:
+            query (str): string to be matched.
+            k (int): maximum number of keys returned.
+            score_cutoff (int): only scores at least this large are returned.
+            seed_cutoff (int): keys whose length alone allows this ratio are
+                               scored first, to tighten the bound quickly.
+
+        Returns:
+            list of (position, score), highest score first and ties in scan
+            order. Keys are only scored while their bound can still beat the
+            k-th best score, so the scan stops as soon as k keys score 100.
+        """
+        if k <= 0:
+            return []
+        # Min-heap of (score, -position), its root is the k-th best key
+        heap = []
+
+        def offer(score, pos):
+            if len(heap) < k:
+                heapq.heappush(heap, (score, -pos))
+            elif (score, -pos) > heap[0]:
+                heapq.heapreplace(heap, (score, -pos))
+        len_bounds = ratio_bound(
+            np.minimum(self.bucket_lengths, len(query)),
+            self.bucket_lengths + len(query))
+        pending = np.ones(len(self.bucket_lengths), dtype=bool)
+
+        for threshold in (seed_cutoff, 0):
+            # Lowest score that can still enter the heap
+            floor = heap[0][0] if len(heap) == k else score_cutoff
+            buckets = pending & (len_bounds >= max(threshold, floor))
+            if not buckets.any():
+                continue
+            pending &= ~buckets
+
+            positions, bounds = self.candidates(query, buckets)
+            keep = bounds >= floor
+            positions, bounds = positions[keep], bounds[keep]
+
+            if self.batch is not None:
+                # Score the whole pass at once, best first
+                scores = self.batch.scores(query, positions)
+                self.n_scored += len(positions)
+                for i in np.lexsort((positions, -scores))[:k]:
+                    if scores[i] < score_cutoff:
+                        break
+                    offer(int(scores[i]), int(positions[i]))
+                continue
+
+            # Most promising keys first, ties in scan order. Once a key
+            # cannot beat the root, no later key can.
+            for i in np.lexsort((positions, -bounds)):
+                pos, bound = int(positions[i]), int(bounds[i])
+                if len(heap) == k and (bound, -pos) < heap[0]:
+                    break
+                self.n_scored += 1
+                score = self.scorer(query, self.keys[pos])
+                if score >= score_cutoff:
+                    offer(score, pos)
+
+        return [(-pos, score) for score, pos in sorted(heap, reverse=True)]
+
+
+    def records(self, query, score_cutoff, stop):
+        """ Keys that improve the running best score in a linear scan
+        Args:
+            query (str): string to be matched.
+            score_cutoff (int): initial best score of the scan.
+            stop (int): scan stops before this position.
+
+        Returns:
+            list of (position, score) in scan order. Each score is strictly
+            larger than score_cutoff and every score before it.
+        """
+        positions, bounds = self.candidates(
+            query, np.ones(len(self.bucket_lengths), dtype=bool))
+        keep = (positions < stop) & (bounds > score_cutoff)
+        order = np.argsort(positions[keep])
+        ans = []
+        running = score_cutoff
+        for pos, bound in zip(positions[keep][order], bounds[keep][order]):
+            if bound <= running:
+                continue
+            self.n_scored += 1
+            score = self.scorer(query, self.keys[pos])
+            if score > running:
+                ans.append((int(pos), score))
+                running = score
+        return ans
+
+
+class DynamicCandidateIndex(CandidateIndex):
+
+    def __init__(self, keys=(), scorer=None):
+        """ CandidateIndex that keys can be added to and removed from
+        Args:
+            keys (iterable): initial reference strings.
+            scorer (callable): see CandidateIndex.
+
+        Every key lives in a slot, its position. Each length bucket holds
+        the slots of its keys, so add and remove only count the characters
+        of the keys they change and copy the slots of the buckets they
+        touch. Freed slots are reused by later keys. Candidates are always
+        scored one by one.
+        """
+        self.scorer = fuzz.ratio if scorer is None else scorer
+        self.batch = None
+        self.n_scored = 0
+        # Key of every slot, None for free slots
+        self.keys = []
+        self.free = []
+        self.counts = np.zeros((0, N_SLOTS), dtype=np.uint8)
+        # Length to np.ndarray of the slots of the keys of that length
+        self.buckets = {}
+        self.bucket_lengths = np.zeros(0, dtype=np.int64)
+        self.add(keys)
+
+
+    def __len__(self):
+        return len(self.keys) - len(self.free)
+
+
+    def add(self, keys):
+        """ Add keys to the index
+        Args:
+            keys (iterable): strings to be added.
+
+        Returns:
+            list of the positions of the keys
+        """
+        keys = list(keys)
+        slots = []
+        for key in keys:
+            if self.free:
+                slots.append(self.free.pop())
+                self.keys[slots[-1]] = key
+            else:
+                slots.append(len(self.keys))
+                self.keys.append(key)
+        if not keys:
+            return slots
+
+        counts = count_matrix(keys)
+        if len(self.keys) > len(self.counts) or \
+           counts.dtype.itemsize > self.counts.itemsize:
+            # Grow by doubling, so that adding keys one at a time stays
+            # linear in the number of keys
+            grown = np.zeros((max(len(self.keys), 2*len(self.counts)),
+                              N_SLOTS),
+                             dtype=np.promote_types(self.counts.dtype,
+                                                    counts.dtype))
+            grown[:len(self.counts)] = self.counts
+            self.counts = grown
+        self.counts[slots] = counts
+
+        by_length = {}
+        for key, slot in zip(keys, slots):
+            by_length.setdefault(len(key), []).append(slot)
+        for length, new in by_length.items():
+            old = self.buckets.get(length, np.zeros(0, dtype=np.int64))
+            self.buckets[length] = np.append(old, new)
+        self.bucket_lengths = np.array(sorted(self.buckets), dtype=np.int64)
+        return slots
+
+
+    def remove(self, positions):
+        """ Remove keys from the index
+        Args:
+            positions (iterable): positions of the keys, as returned by add.
+
+        Returns:
+            None
+        """
+        by_length = {}
+        for pos in positions:
+            key = self.keys[pos]
+            assert (key is not None), \
+                "Position {} holds no key!".format(pos)
+            by_length.setdefault(len(key), []).append(pos)
+            self.keys[pos] = None
+            self.free.append(pos)
+        for length, old in by_length.items():
+            slots = self.buckets[length]
+            slots = slots[~np.isin(slots, old)]
+            if len(slots):
+                self.buckets[length] = slots
+            else:
+                del self.buckets[length]
+        self.bucket_lengths = np.array(sorted(self.buckets), dtype=np.int64)
+
+
+    def candidates(self, query, buckets):
+        """ Keys of the selected length buckets with their upper bounds
+        Args:
+            query (str): string to be matched.
+            buckets (np.ndarray): boolean mask over self.bucket_lengths
+
+        Returns:
+            (positions, bounds), np.ndarray each, one entry per key
+        """
+        lengths = self.bucket_lengths[buckets]
+        if len(lengths) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        slots = [self.buckets[length] for length in lengths.tolist()]
+        positions = np.concatenate(slots)
+        common = np.minimum(self.counts[positions],
+                            char_counts(query)).sum(axis=1)
+        key_lengths = np.repeat(lengths, [len(x) for x in slots])
+        return positions, ratio_bound(common, key_lengths + len(query))
+
+
+class MatchIndex:
+
+    def __init__(self, standard_address_set, standard_name_set,
+                 address_arrays=None, name_arrays=None, address_keys=None,
+                 name_keys=None):
+        """ Candidate indexes for AddressParser.close_match
+        Args:
+            standard_address_set (iterable): all standard full addresses
+            standard_name_set (iterable): all standard full name
+            address_arrays (dict): arrays of a saved address index, see
+                                   CandidateIndex. standard_address_set
+                                   must then be in the order it was saved.
+            name_arrays (dict): arrays of a saved name index, same for
+                                standard_name_set.
+            address_keys (sequence): lower case "name suffix" of every
+                                     address, in order. Computed if None.
+            name_keys (sequence): lower case name of every name, in order.
+                                  Computed if None.
+
+        With saved arrays and keys, both sets are kept as given and only
+        need to support len and indexing, e.g. sequences reading a
+        memory-mapped file.
+        """
+        if address_arrays is None or address_keys is None:
+            self.addresses = list(standard_address_set)
+            address_keys = [(name+' '+suffix).lower()
+                            for name, suffix in self.addresses]
+        else:
+            self.addresses = standard_address_set
+        if name_arrays is None or name_keys is None:
+            self.names = list(standard_name_set)
+            name_keys = [name.lower() for name in self.names]
+        else:
+            self.names = standard_name_set
+        self.address_index = CandidateIndex(address_keys,
+                                            arrays=address_arrays)
+        self.name_index = CandidateIndex(name_keys, arrays=name_arrays)
+
+
+class ExactKeyIndex:
+
+    def __init__(self, standard_address_set, standard_name_set,
+                 name_to_suffix_dict, street_name_abbr_dict):
+        """ Hash index of normalized keys for exact matches in close_match
+        Args:
+            standard_address_set (iterable): all standard full addresses
+            standard_name_set (iterable): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+            street_name_abbr_dict (dict): suffix to its standard
+                                          abbreviation, see AddressParser.
+
+        Names are keyed in lower case without any whitespace, so
+        "Le Bost", "LE  BOST" and "Lebost" share a key, and suffixes by
+        their standard abbreviation, so "Drive" and "Dr" share a key.
+        Keys shared by different standard addresses (or names) are
+        ambiguous and never match.
+        """
+        self.street_name_abbr_dict = street_name_abbr_dict
+        self.addresses = {}
+        for name, suffix in standard_address_set:
+            key = (self.name_key(name), self.suffix_key(suffix))
+            if self.addresses.setdefault(key, (name, suffix)) != \
+               (name, suffix):
+                self.addresses[key] = None
+        self.names = {}
+        for name in standard_name_set:
+            suffixes = name_to_suffix_dict.get(name, ())
+            suffix = next(iter(suffixes)) if len(suffixes) == 1 else ''
+            key = self.name_key(name)
+            if self.names.setdefault(key, (name, suffix)) != (name, suffix):
+                self.names[key] = None
+
+
+    def name_key(self, name):
+        """ Lower case name without whitespace """
+        return ''.join(name.split()).casefold()
+
+
+    def suffix_key(self, suffix):
+        """ Lower case standard abbreviation of a suffix """
+        suffix = ''.join(suffix.split()).title()
+        return self.street_name_abbr_dict.get(suffix, suffix).casefold()
+
+
+    def lookup(self, street_name, street_suffix):
+        """ Find the standard address with the same keys
+        Args:
+            street_name (str): street name of address
+            street_suffix (str): street suffix of address
+
+        Returns:
+            (matched_name, matched_suffix), or None. Tried in the order of
+            the exact checks of close_match: name and suffix, name whose
+            last word is the suffix, then name and suffix as one name.
+            Without a suffix, the name alone is looked up, with the only
+            suffix of the name, or '', as suffix.
+        """
+        words = street_name.split()
+        name = ''.join(words).casefold()
+        suffix = self.suffix_key(street_suffix)
+        ans = self.addresses.get((name, suffix))
+        if ans is None and len(words) > 1:
+            ans = self.addresses.get((''.join(words[:-1]).casefold(),
+                                      self.suffix_key(words[-1])))
+        if ans is None:
+            ans = self.names.get(name + ''.join(street_suffix.split())\
+                                            .casefold())
+        return ans
@@ -0,0 +1,290 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import contextlib
+import functools
+import os
+import re
+import time
+
+# json and logging are only imported by the sinks, this module is imported
+# by the parser
+
+# Rates derived from counters: rate = numerator / denominator
+RATES = {'close_match.exact_hit_rate': ('close_match.exact_hits',
+                                        'close_match.calls'),
+         'close_match.fallback_rate': ('close_match.fallback_scans',
+                                       'close_match.calls'),
+         'close_match_df.unique_rate': ('close_match_df.unique_pairs',
+                                        'close_match_df.rows'),
+         'result_store.processed_rate': ('result_store.processed',
+                                         'result_store.rows')}
+
+# Instrumentation that timers and counters report to, None when turned off
+_active = None
+
+
+class Instrumentation:
+
+    def __init__(self, sinks=()):
+        """ Per-stage timers and counters
+        Args:
+            sinks (iterable): objects with a write(snapshot) method, see
+                              LoggingSink, JsonSink and PrometheusSink.
+                              flush writes the snapshot to each of them.
+
+        Nothing is recorded until it is enabled, see enable. Used as a
+        context manager, it is enabled inside the block and flushed at the
+        end of it.
+        """
+        self.sinks = list(sinks)
+        self.timers = {}
+        self.counters = {}
+        self._previous = []
+
+
+    def count(self, name, n=1):
+        """ Add n to counter name """
+        self.counters[name] = self.counters.get(name, 0) + n
+
+
+    def add_time(self, name, seconds, calls=1):
+        """ Add seconds spent in calls of stage name """
+        timer = self.timers.get(name)
+        if timer is None:
+            self.timers[name] = [calls, seconds]
+        else:
+            timer[0] += calls
+            timer[1] += seconds
+
+
+    @contextlib.contextmanager
+    def timer(self, name):
+        """ Time the block as one call of stage name """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(name, time.perf_counter() - start)
+
+
+    def snapshot(self):
+        """ Current values
+        Returns:
+            dict with 'timers' (stage to {'calls', 'seconds'}), 'counters'
+            (name to value) and 'rates' (see RATES, for the rates whose
+            denominator is positive)
+        """
+        rates = {}
+        for name, (numerator, denominator) in RATES.items():
+            if self.counters.get(denominator, 0) > 0:
+                rates[name] = self.counters.get(numerator, 0) \
+                              / self.counters[denominator]
+        return {'timers': {name: {'calls': calls, 'seconds': seconds}
+                           for name, (calls, seconds)
+                           in sorted(self.timers.items())},
+                'counters': dict(sorted(self.counters.items())),
+                'rates': rates}
+
+
+    def reset(self):
+        """ Set all timers and counters back to zero """
+        self.timers.clear()
+        self.counters.clear()
+
+
+    def flush(self):
+        """ Write the snapshot to every sink """
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            sink.write(snapshot)
+
+
+    def __enter__(self):
+        self._previous.append(active())
+        enable(self)
+        return self
+
+
+    def __exit__(self, *exc_info):
+        previous = self._previous.pop()
+        if previous is None:
+            disable()
+        else:
+            enable(previous)
+        self.flush()
+
+
+def active():
+    """ Instrumentation in use
+    Returns:
+        Instrumentation, or None if instrumentation is turned off
+    """
+    return _active
+
+
+def enable(instrumentation=None, sinks=()):
+    """ Turn instrumentation on
+    Args:
+        instrumentation (Instrumentation): created with sinks if None.
+        sinks (iterable): see Instrumentation.
+
+    Returns:
+        the enabled Instrumentation
+    """
+    global _active
+    if instrumentation is None:
+        instrumentation = Instrumentation(sinks)
+    _active = instrumentation
+    return instrumentation
+
+
+def disable():
+    """ Turn instrumentation off
+    Returns:
+        the Instrumentation that was in use, or None
+    """
+    global _active
+    ans, _active = _active, None
+    return ans
+
+
+def count(name, n=1):
+    """ Add n to counter name if instrumentation is on """
+    if _active is not None:
+        _active.count(name, n)
+
+
+def timer(name):
+    """ Context manager timing its block as stage name if instrumentation
+    is on, doing nothing otherwise
+    """
+    if _active is None:
+        return contextlib.nullcontext()
+    return _active.timer(name)
+
+
+def lap(name, start):
+    """ Record the time since start as one call of stage name if
+    instrumentation is on
+    Args:
+        name (str): stage name.
+        start (float): time.perf_counter() at the start of the stage.
+
+    Returns:
+        time.perf_counter() now, the start of the next stage
+    """
+    now = time.perf_counter()
+    if _active is not None:
+        _active.add_time(name, now - start)
+    return now
+
+
+def timed(name):
+    """ Decorator timing every call of a function as stage name, and
+    counting the rows of its first argument in counter name + '.rows'
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            inst = _active
+            if inst is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                inst.add_time(name, time.perf_counter() - start)
+                if args and hasattr(args[0], '__len__'):
+                    inst.count(name + '.rows', len(args[0]))
+        return wrapper
+    return decorator
+
+
+class LoggingSink:
+
+    def __init__(self, logger=None, level=None):
+        """ Log every snapshot as one line of JSON
+        Args:
+            logger (logging.Logger): logger of this module if None.
+            level (int): logging level, logging.INFO if None.
+        """
+        import logging
+        self.logger = logging.getLogger(__name__) if logger is None \
+                      else logger
+        self.level = logging.INFO if level is None else level
+
+
+    def write(self, snapshot):
+        import json
+        self.logger.log(self.level, "address_parser stats %s",
+                        json.dumps(snapshot, sort_keys=True))
+
+
+class JsonSink:
+
+    def __init__(self, file_name):
+        """ Append every snapshot to a file of JSON lines
+        Args:
+            file_name (str): file to append to.
+
+        Each line also holds the unix 'time' of the snapshot.
+        """
+        self.file_name = file_name
+
+
+    def write(self, snapshot):
+        import json
+        with open(self.file_name, 'a') as f:
+            f.write(json.dumps(dict(snapshot, time=time.time()),
+                               sort_keys=True) + '\n')
+
+
+class PrometheusSink:
+
+    def __init__(self, file_name, prefix='address_parser'):
+        """ Write the latest snapshot in the Prometheus text format, e.g.
+        for the textfile collector of node_exporter
+        Args:
+            file_name (str): file to write, replaced at every write.
+            prefix (str): prefix of every metric name.
+
+        Timers become the metrics <prefix>_stage_seconds_total and
+        <prefix>_stage_calls_total labelled by stage, counters become
+        <prefix>_<name>_total and rates <prefix>_<name>.
+        """
+        self.file_name = file_name
+        self.prefix = prefix
+
+
+    def metric_name(self, name):
+        return re.sub(r'[^a-zA-Z0-9_]', '_', self.prefix + '_' + name)
+
+
+    def format(self, snapshot):
+        """ Text of a snapshot in the Prometheus exposition format """
+        lines = []
+        for metric, key in (('stage_seconds_total', 'seconds'),
+                            ('stage_calls_total', 'calls')):
+            metric = self.metric_name(metric)
+            lines.append("# TYPE {} counter".format(metric))
+            for stage, timer in snapshot['timers'].items():
+                lines.append('{}{{stage="{}"}} {}'.format(metric, stage,
+                                                          timer[key]))
+        for name, value in snapshot['counters'].items():
+            metric = self.metric_name(name + '_total')
+            lines.append("# TYPE {} counter".format(metric))
+            lines.append("{} {}".format(metric, value))
+        for name, value in snapshot['rates'].items():
+            metric = self.metric_name(name)
+            lines.append("# TYPE {} gauge".format(metric))
+            lines.append("{} {}".format(metric, value))
+        return '\n'.join(lines) + '\n'
+
+
+    def write(self, snapshot):
+        # Readers never see a partly written file
+        temp_name = self.file_name + '.tmp'
+        with open(temp_name, 'w') as f:
+            f.write(self.format(snapshot))
+        os.replace(temp_name, self.file_name)
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import functools
+
+from .address_parser_class import AddressParser
+from .candidate_index import MatchIndex
+
+
+class StandardAddressMatcher:
+
+    def __init__(self, standard_address_set, standard_name_set,
+                 name_to_suffix_dict, parser=None, cache_size=None,
+                 index=None, normalized_exact=False):
+        """ Match addresses against a fixed set of standard addresses
+        Args:
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+            parser (AddressParser): parser to use. A new one is created
+                                    if None.
+            cache_size (int): if set, match remembers the results of up to
+                              cache_size distinct (name, suffix) pairs,
+                              least recently used first out.
+            index (MatchIndex): index of both sets, e.g. loaded with
+                                reference_file.load_reference. Built if
+                                None.
+            normalized_exact (bool): also match addresses that equal a
+                                     standard address up to case,
+                                     whitespace and suffix abbreviation
+                                     exactly, see
+                                     AddressParser.build_exact_index.
+
+        The reference strings are lowercased, concatenated and indexed once
+        here, so match only pays for the scoring.
+        """
+        self.parser = AddressParser() if parser is None else parser
+        self.standard_address_set = standard_address_set
+        self.standard_name_set = standard_name_set
+        self.name_to_suffix_dict = name_to_suffix_dict
+        if index is None:
+            index = MatchIndex(standard_address_set, standard_name_set)
+        self.index = index
+        self.exact_index = None
+        if normalized_exact:
+            self.exact_index = self.parser.build_exact_index(
+                standard_address_set, standard_name_set, name_to_suffix_dict)
+
+        self._match_cache = None
+        if cache_size:
+            self._match_cache = functools.lru_cache(maxsize=cache_size)(\
+                                            self._match)
+
+
+    def cache_info(self):
+        """ Statistics of the match cache
+        Returns:
+            functools._CacheInfo with hits, misses, maxsize and currsize,
+            or None if the matcher has no cache.
+        """
+        if self._match_cache is None:
+            return None
+        return self._match_cache.cache_info()
+
+
+    def cache_clear(self):
+        """ Empty the match cache and reset its statistics
+        """
+        if self._match_cache is not None:
+            self._match_cache.cache_clear()
+
+
+    def match(self, name, suffix):
+        """ Find closest match with standard addresses
+        Args:
+            name (str): street name of address
+            suffix (str): street suffix of address
+
+        Returns:
+            (matched_name, matched_suffix, ratio), same as
+            AddressParser.close_match
+        """
+        if self._match_cache is None:
+            return self._match(name, suffix)
+        # close_match only sees the stripped, title case values
+        return self._match_cache(self.parser.strip(name).title(),
+                                 self.parser.strip(suffix).title())
+
+
+    def _match(self, name, suffix):
+        return self.parser.close_match(name, suffix,
+                                       self.standard_address_set,
+                                       self.standard_name_set,
+                                       self.name_to_suffix_dict,
+                                       index=self.index,
+                                       exact_index=self.exact_index)
+
+
+    def close_match_topk(self, name, suffix, k=5, score_cutoff=0):
+        """ Find the k closest matches with standard addresses
+        Args:
+            name (str): street name of address
+            suffix (str): street suffix of address
+            k (int): maximum number of candidates returned
+            score_cutoff (int): candidates with a lower ratio are dropped
+
+        Returns:
+            list of (matched_name, matched_suffix, ratio), best first, see
+            AddressParser.close_match_topk
+        """
+        return self.parser.close_match_topk(name, suffix,
+                                            self.standard_address_set,
+                                            self.standard_name_set,
+                                            self.name_to_suffix_dict,
+                                            k=k, score_cutoff=score_cutoff,
+                                            index=self.index,
+                                            exact_index=self.exact_index)
+
+
+    def match_many(self, names, suffixes):
+        """ Find closest matches for many addresses
+        Args:
+            names (iterable): street names
+            suffixes (iterable): street suffixes, same length as names
+
+        Returns:
+            list of (matched_name, matched_suffix, ratio)
+        """
+        return [self.match(name, suffix)
+                for name, suffix in zip(names, suffixes)]
+
+
+class BlockedAddressMatcher:
+
+    def __init__(self, reference, name_col='Street Name',
+                 suffix_col='Street Suffix', number_col='Street Number',
+                 city_col='City', block_size=1000, parity=False,
+                 min_ratio=60, parser=None):
+        """ Match addresses only against standard streets of the same block
+        Args:
+            reference (pd.DataFrame): standard addresses, one row per
+                                      address or per street and number.
+            name_col (str): col containing the standard street name
+            suffix_col (str): col containing the standard street suffix
+            number_col (str): col containing the street number
+            city_col (str): col containing the city
+            block_size (int): street numbers are split into ranges of
+                              block_size numbers.
+            parity (bool): also split blocks into odd and even numbers.
+            min_ratio (int): if the best ratio in a block is lower, the
+                             address is matched again against all streets
+                             of the city, then against all streets, and a
+                             wider result is only kept when its ratio is
+                             higher. Below the default, the best street of
+                             the block is unrelated to the address, e.g. a
+                             street that only has parcels in a neighbouring
+                             block. A misspelled street of the block scores
+                             higher and stays in it. With 0 the first block
+                             always wins.
+            parser (AddressParser): parser to use. A new one is created
+                                    if None.
+
+        A block is (city, number range[, parity]). Addresses without a
+        number use the streets of their city, and addresses whose block
+        or city is not in reference use all streets. The matcher of a
+        block is built the first time it is needed.
+        """
+        self.parser = AddressParser() if parser is None else parser
+        self.block_size = block_size
+        self.parity = parity
+        self.min_ratio = min_ratio
+        self._matchers = {}
+
+        import pandas as pd
+        streets = pd.DataFrame({
+            'name': reference[name_col].fillna("").astype(object),
+            'suffix': reference[suffix_col].fillna("").astype(object),
+            'city': self.normalize_city(reference[city_col]),
+            'number': pd.to_numeric(reference[number_col],
+                                    errors='coerce')})
+        streets = streets[streets['name'] != ""]
+        has_number = streets['number'].notna()
+        blocks = streets[has_number].assign(
+            range=(streets.loc[has_number, 'number'] // block_size)\
+                    .astype('int64'),
+            parity=(streets.loc[has_number, 'number'] % 2).astype('int64')
+                   if parity else -1)
+
+        # Standard (name, suffix) pairs of every block, city and of all
+        self.streets = {}
+        for key, group in blocks.groupby(['city', 'range', 'parity'],
+                                         sort=False):
+            self.streets[key] = set(zip(group['name'], group['suffix']))
+        for city, group in streets.groupby('city', sort=False):
+            self.streets[(city,)] = set(zip(group['name'], group['suffix']))
+        self.streets[()] = set(zip(streets['name'], streets['suffix']))
+
+
+    def normalize_city(self, cities):
+        """ City names as used in block keys
+        Args:
+            cities (pd.Series): city names
+
+        Returns:
+            pd.Series of upper case, stripped str
+        """
+        return cities.fillna("").astype(object).str.strip().str.upper()
+
+
+    def block_keys(self, number, city):
+        """ Keys of the blocks an address is matched in, narrowest first
+        Args:
+            number (str or int): street number of address
+            city (str): city of address
+
+        Returns:
+            list of keys of self.streets
+        """
+        city = self.parser.strip(city).upper() if isinstance(city, str) \
+               else ""
+        keys = []
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            number = None
+        if number is not None:
+            keys.append((city, number // self.block_size,
+                         number % 2 if self.parity else -1))
+        keys.append((city,))
+        keys.append(())
+        return [key for key in keys if key in self.streets]
+
+
+    def get_matcher(self, key):
+        """ StandardAddressMatcher of a block, built once
+        Args:
+            key (tuple): key of self.streets
+
+        Returns:
+            StandardAddressMatcher
+        """
+        matcher = self._matchers.get(key)
+        if matcher is None:
+            standard_address_set = self.streets[key]
+            standard_name_set = set(name for name, _ in standard_address_set)
+            name_to_suffix_dict = {}
+            for name, suffix in standard_address_set:
+                name_to_suffix_dict.setdefault(name, set()).add(suffix)
+            matcher = StandardAddressMatcher(standard_address_set,
+                                             standard_name_set,
+                                             name_to_suffix_dict,
+                                             parser=self.parser)
+            self._matchers[key] = matcher
+        return matcher
+
+
+    def match(self, name, suffix, number=None, city=None):
+        """ Find closest match with the standard streets of the block
+        Args:
+            name (str): street name of address
+            suffix (str): street suffix of address
+            number (str or int): street number of address
+            city (str): city of address
+
+        Returns:
+            (matched_name, matched_suffix, ratio), same as
+            AddressParser.close_match
+        """
+        return self.match_in_blocks(name, suffix,
+                                    self.block_keys(number, city))
+
+
+    def match_in_blocks(self, name, suffix, keys):
+        """ Find closest match with the standard streets of given blocks
+        Args:
+            name (str): street name of address
+            suffix (str): street suffix of address
+            keys (list): keys of self.streets, narrowest first, as
+                         returned by block_keys
+
+        Returns:
+            (matched_name, matched_suffix, ratio), same as
+            AddressParser.close_match
+        """
+        ans = ("", "", 0)
+        for key in keys:
+            wider = self.get_matcher(key).match(name, suffix)
+            if wider[2] > ans[2]:
+                ans = wider
+            if ans[2] >= self.min_ratio:
+                break
+        return ans
+
+
+    def match_many(self, names, suffixes, numbers, cities):
+        """ Find closest matches for many addresses
+        Args:
+            names (iterable): street names
+            suffixes (iterable): street suffixes
+            numbers (iterable): street numbers
+            cities (iterable): cities
+
+        Returns:
+            list of (matched_name, matched_suffix, ratio)
+        """
+        return [self.match(name, suffix, number, city)
+                for name, suffix, number, city
+                in zip(names, suffixes, numbers, cities)]
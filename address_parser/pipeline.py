@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import numpy as np
+import pandas as pd
+
+from . import instrumentation
+from . import resource_manager
+from .address_methods import (factorize_pairs, fill_suffix_column,
+                              parse_street_series, street_key,
+                              unique_suffix_dict)
+from .matcher import StandardAddressMatcher
+from .reference_file import load_reference
+from .result_store import (RESULT_COLUMNS, ResultStore, address_hash,
+                           reference_version)
+
+# Rows read, processed and written at once
+CHUNK_SIZE = 100000
+
+
+class CsvChunkWriter:
+
+    def __init__(self, file_name):
+        """ Write chunks of a DataFrame to one csv file
+        Args:
+            file_name (str): output file. It is overwritten.
+        """
+        self.file_name = file_name
+        self.n_rows = 0
+
+
+    def write(self, df):
+        df.to_csv(self.file_name, mode='w' if self.n_rows == 0 else 'a',
+                  header=(self.n_rows == 0), index=False)
+        self.n_rows += len(df)
+
+
+    def close(self):
+        pass
+
+
+class ParquetChunkWriter:
+
+    def __init__(self, file_name):
+        """ Write chunks of a DataFrame to one parquet file, one row group
+        per chunk
+        Args:
+            file_name (str): output file. It is overwritten.
+
+        Requires pyarrow. The schema is taken from the first chunk, so every
+        chunk must have the same columns and compatible dtypes. Pass
+        ```dtype``` to the reader if a column can be empty in a whole chunk.
+        """
+        # !pip install -q pyarrow
+        import pyarrow
+        import pyarrow.parquet
+        self.pyarrow = pyarrow
+        self.file_name = file_name
+        self.writer = None
+        self.n_rows = 0
+
+
+    def write(self, df):
+        if self.writer is None:
+            table = self.pyarrow.Table.from_pandas(df, preserve_index=False)
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.file_name,
+                                                             table.schema)
+        else:
+            table = self.pyarrow.Table.from_pandas(df, preserve_index=False,
+                                                   schema=self.writer.schema)
+        self.writer.write_table(table)
+        self.n_rows += len(df)
+
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def get_chunk_writer(file_name, output_format=None):
+    """ Writer for the output of run_pipeline
+    Args:
+        file_name (str): output file.
+        output_format (str): 'csv' or 'parquet'. Guessed from the extension
+                             of file_name if None.
+
+    Returns:
+        CsvChunkWriter or ParquetChunkWriter
+    """
+    if output_format is None:
+        is_parquet = file_name.endswith(('.parquet', '.pq'))
+        output_format = 'parquet' if is_parquet else 'csv'
+    assert (output_format in ('csv', 'parquet')), \
+        "Unknown output format {}!".format(output_format)
+    if output_format == 'parquet':
+        return ParquetChunkWriter(file_name)
+    return CsvChunkWriter(file_name)
+
+
+def process_chunk(df, address_col, matcher, name_to_suffix_dict,
+                  vectorized=True, unique_suffixes=None):
+    """ Parse, fill suffix and close match the addresses of one chunk
+    Args:
+        df (pd.DataFrame): chunk of the input
+        address_col (str): col containing the full street address
+        matcher (StandardAddressMatcher)
+        name_to_suffix_dict (dict): name to suffix dict
+        vectorized (bool): parse with batch_parser.parse_street_batch
+        unique_suffixes (dict): see address_methods.fill_suffix_column
+
+    Returns:
+        df with the columns 'Street Number', 'Street Name', 'Street Prefix',
+        'Street Suffix', 'Other Address', 'Suggested Name',
+        'Suggested Suffix' and 'Matching Ratio'
+    """
+    df = df.copy()
+    parse_street_series(df[address_col], target_df=df, vectorized=vectorized)
+    df['Street Suffix'] = fill_suffix_column(df, name_to_suffix_dict,
+                                             'Street Name', 'Street Suffix',
+                                             unique_suffixes=unique_suffixes)
+    # Every distinct street of the chunk is matched once, as close_match
+    # sees it
+    names = street_key(df['Street Name'])
+    suffixes = street_key(df['Street Suffix'])
+    codes, first = factorize_pairs(names, suffixes)
+    matched = matcher.match_many(names.to_numpy(dtype=object)[first],
+                                 suffixes.to_numpy(dtype=object)[first])
+    if matched:
+        names, suffixes, ratios = zip(*matched)
+    else:
+        names, suffixes, ratios = (), (), ()
+    df['Suggested Name'] = np.array(names, dtype=object)[codes]
+    df['Suggested Suffix'] = np.array(suffixes, dtype=object)[codes]
+    df['Matching Ratio'] = pd.Series(np.array(ratios, dtype='int64')[codes],
+                                     index=df.index)
+    return df
+
+
+def process_chunk_cached(df, address_col, matcher, name_to_suffix_dict,
+                         store, vectorized=True, unique_suffixes=None):
+    """ process_chunk, reusing the results stored for known addresses
+    Args:
+        df (pd.DataFrame): chunk of the input
+        address_col (str): col containing the full street address
+        matcher (StandardAddressMatcher)
+        name_to_suffix_dict (dict): name to suffix dict
+        store (ResultStore): results of the reference data of matcher
+        vectorized (bool): parse with batch_parser.parse_street_batch
+        unique_suffixes (dict): see address_methods.fill_suffix_column
+
+    Returns:
+        same as process_chunk. Only the distinct addresses without a stored
+        result are processed, and their results are stored.
+    """
+    keys = list(map(address_hash, df[address_col].to_numpy(dtype=object)))
+    results = store.get(keys)
+    # First row of every new address
+    new = {}
+    for i, key in enumerate(keys):
+        if key not in results:
+            new.setdefault(key, i)
+    instrumentation.count('result_store.rows', len(keys))
+    instrumentation.count('result_store.processed', len(new))
+
+    if new:
+        processed = process_chunk(df.iloc[list(new.values())], address_col,
+                                  matcher, name_to_suffix_dict, vectorized,
+                                  unique_suffixes)
+        rows = list(zip(*(processed[col].tolist() for col in RESULT_COLUMNS)))
+        store.put(new, rows)
+        results.update(zip(new, rows))
+
+    df = df.copy()
+    columns = list(zip(*(results[key] for key in keys))) or \
+              [() for _ in RESULT_COLUMNS]
+    for col, values in zip(RESULT_COLUMNS, columns):
+        if col == 'Matching Ratio':
+            df[col] = pd.Series(values, index=df.index, dtype='int64')
+        else:
+            df[col] = np.array(values, dtype=object)
+    return df
+
+
+def run_pipeline(input_file, output_file, standard_address_set=None,
+                 standard_name_set=None, name_to_suffix_dict=None,
+                 address_col='Address_x', path="resources",
+                 chunk_size=CHUNK_SIZE, output_format=None, vectorized=True,
+                 cache_size=None, result_store=None, reference_file=None,
+                 **kwargs):
+    """ Parse and close match a file chunk by chunk
+    Args:
+        input_file (str): csv or Excel file containing addresses
+        output_file (str): csv or parquet file to write the results to
+        standard_address_set (set): all standard full addresses
+        standard_name_set (set): all standard full name
+        name_to_suffix_dict (dict): name to suffix dict
+        address_col (str): col containing the full street address
+        path (str): path to ```input_file```, as in resource_manager.load_df
+        chunk_size (int): number of rows held in memory at once
+        output_format (str): 'csv' or 'parquet'. Guessed from the extension
+                             of output_file if None.
+        vectorized (bool): parse with batch_parser.parse_street_batch
+        cache_size (int): size of the close match cache, see
+                          StandardAddressMatcher
+        result_store (str): SQLite file of results, see ResultStore. If
+                            set, addresses already processed with the
+                            same reference data are not processed again,
+                            and the results of new ones are added to it.
+        reference_file (str): file written by
+                              reference_file.compile_reference, used
+                              instead of the three reference arguments.
+                              It is mapped, not loaded, so pipelines
+                              running side by side share its pages.
+        **kwargs: kwargs to be passeed into pd.read_csv
+
+    Returns:
+        number of rows written
+
+    Only one chunk is in memory at a time, besides the matcher built once
+    from the standard addresses, so memory use does not grow with the size
+    of input_file (except for Excel files, which are read whole).
+    """
+    if reference_file is not None:
+        reference = load_reference(reference_file)
+        matcher = reference.matcher(cache_size=cache_size)
+        standard_address_set = reference.standard_address_set
+        standard_name_set = reference.standard_name_set
+        name_to_suffix_dict = reference.name_to_suffix_dict
+    else:
+        assert (standard_address_set is not None), \
+            "Either the reference sets or reference_file are needed!"
+        matcher = StandardAddressMatcher(standard_address_set,
+                                         standard_name_set,
+                                         name_to_suffix_dict,
+                                         cache_size=cache_size)
+    suffix_dict = unique_suffix_dict(name_to_suffix_dict)
+    store = None
+    if result_store is not None:
+        store = ResultStore(result_store,
+                            reference_version(standard_address_set,
+                                              standard_name_set,
+                                              name_to_suffix_dict))
+    writer = get_chunk_writer(output_file, output_format)
+    try:
+        for chunk in resource_manager.load_df_chunks(input_file, path,
+                                                     chunk_size, **kwargs):
+            if store is None:
+                writer.write(process_chunk(chunk, address_col, matcher,
+                                           name_to_suffix_dict, vectorized,
+                                           suffix_dict))
+            else:
+                writer.write(process_chunk_cached(chunk, address_col,
+                                                  matcher,
+                                                  name_to_suffix_dict, store,
+                                                  vectorized, suffix_dict))
+    finally:
+        writer.close()
+        if store is not None:
+            store.close()
+    return writer.n_rows
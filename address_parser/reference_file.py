@@ -0,0 +1,409 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import collections.abc
+import hashlib
+import json
+import mmap
+import numpy as np
+import os
+import struct
+
+from .candidate_index import MatchIndex
+from .matcher import StandardAddressMatcher
+
+# File layout:
+#   MAGIC, then FORMAT_VERSION and the header length as little endian uint32,
+#   then a JSON header describing every array (dtype, shape, offset),
+#   then the raw arrays, each aligned to ALIGNMENT bytes.
+MAGIC = b'APREF\x00\x00\x00'
+FORMAT_VERSION = 2
+ALIGNMENT = 64
+
+
+def build_string_table(strings):
+    """ Encode strings into one buffer
+    Args:
+        strings (list): list of str without NUL characters.
+
+    Returns:
+        (data, offsets). data is a np.ndarray of uint8 holding every string
+        in UTF-8 followed by a NUL byte, string i is
+        data[offsets[i]:offsets[i+1]-1].
+    """
+    encoded = [x.encode('utf-8') + b'\x00' for x in strings]
+    assert all(e.count(b'\x00') == 1 for e in encoded), \
+        "Strings must not contain NUL characters!"
+    offsets = np.zeros(len(encoded)+1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b''.join(encoded), dtype=np.uint8), offsets
+
+
+class StringTable:
+
+    def __init__(self, data, offsets):
+        """ Read-only sequence of the strings of build_string_table
+        Args:
+            data (np.ndarray): uint8 buffer, may be memory-mapped.
+            offsets (np.ndarray): start of every string, and the end.
+        """
+        self.data = data
+        self.offsets = offsets
+
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError("StringTable index out of range")
+        return self.data[self.offsets[i]:self.offsets[i+1]-1].tobytes()\
+                   .decode('utf-8')
+
+
+    def to_list(self):
+        """ Decode all strings at once
+        Returns:
+            list of str
+        """
+        if len(self) == 0:
+            return []
+        return self.data.tobytes().decode('utf-8')[:-1].split('\x00')
+
+
+def key_hash(key):
+    """ Hash of a string, or of a tuple of strings, as saved in the file
+    Args:
+        key (str or tuple): string or tuple of strings.
+
+    Returns:
+        int, the same in every process
+    """
+    if isinstance(key, tuple):
+        key = '\x00'.join(key)
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8', 'surrogatepass'),
+                                          digest_size=8).digest(), 'little')
+
+
+def build_hash_table(keys):
+    """ Sorted hashes of keys, to look them up without decoding the file
+    Args:
+        keys (list): list of str, or of tuples of str.
+
+    Returns:
+        (hashes, order). hashes is the sorted np.ndarray of uint64 of
+        key_hash of every key, order[i] the position of the key of
+        hashes[i].
+    """
+    hashes = np.fromiter(map(key_hash, keys), dtype=np.uint64,
+                         count=len(keys))
+    order = np.argsort(hashes, kind='stable').astype(np.int32)
+    return hashes[order], order
+
+
+class StringRows(collections.abc.Sequence):
+
+    def __init__(self, strings, columns, as_key=False):
+        """ Read-only sequence of rows of string ids, decoded on access
+        Args:
+            strings (StringTable): strings the ids point to.
+            columns (list): np.ndarray of string ids of every column.
+            as_key (bool): rows are the lower case strings of all columns
+                           joined by a space, as in MatchIndex, instead of
+                           the string of one column or the tuple of them.
+        """
+        self.strings = strings
+        self.columns = columns
+        self.as_key = as_key
+
+
+    def __len__(self):
+        return len(self.columns[0])
+
+
+    def __getitem__(self, i):
+        row = tuple(self.strings[int(column[i])] for column in self.columns)
+        if self.as_key:
+            return ' '.join(row).lower()
+        return row if len(row) > 1 else row[0]
+
+
+class HashedRows:
+
+    def __init__(self, rows, hashes, order):
+        """ Look up rows by value, through the hash table of
+        build_hash_table
+        Args:
+            rows (StringRows): rows the table was built from.
+            hashes (np.ndarray): sorted hashes.
+            order (np.ndarray): position of the row of every hash.
+        """
+        self.rows = rows
+        self.hashes = hashes
+        self.order = order
+
+
+    def find(self, value):
+        """ Position of a row
+        Args:
+            value (str or tuple): row to look for.
+
+        Returns:
+            int, position in rows, or -1 if no row equals value
+        """
+        try:
+            h = np.uint64(key_hash(value))
+        except (AttributeError, TypeError):
+            return -1
+        i = int(np.searchsorted(self.hashes, h))
+        while i < len(self.hashes) and self.hashes[i] == h:
+            pos = int(self.order[i])
+            if self.rows[pos] == value:
+                return pos
+            i += 1
+        return -1
+
+
+class CompiledSet(collections.abc.Set):
+
+    def __init__(self, table):
+        """ Read-only set of the rows of a HashedRows
+        Args:
+            table (HashedRows)
+
+        Membership only decodes the rows with the hash of the value.
+        Iterating decodes every row.
+        """
+        self.table = table
+
+
+    def __contains__(self, value):
+        return self.table.find(value) >= 0
+
+
+    def __iter__(self):
+        return iter(self.table.rows)
+
+
+    def __len__(self):
+        return len(self.table.rows)
+
+
+class CompiledSuffixDict(collections.abc.Mapping):
+
+    def __init__(self, table, strings, offsets, suffixes):
+        """ Read-only name to suffix dict of a compiled reference
+        Args:
+            table (HashedRows): the names of the dict.
+            strings (StringTable): strings the ids point to.
+            offsets (np.ndarray): suffixes of name i are
+                                  suffixes[offsets[i]:offsets[i+1]].
+            suffixes (np.ndarray): string ids of the suffixes.
+
+        Looking up a name decodes its suffixes only.
+        """
+        self.table = table
+        self.strings = strings
+        self.offsets = offsets
+        self.suffixes = suffixes
+
+
+    def __getitem__(self, name):
+        pos = self.table.find(name)
+        if pos < 0:
+            raise KeyError(name)
+        return set(self.strings[int(i)] for i in
+                   self.suffixes[self.offsets[pos]:self.offsets[pos+1]])
+
+
+    def __iter__(self):
+        return iter(self.table.rows)
+
+
+    def __len__(self):
+        return len(self.table.rows)
+
+
+def compile_reference(file_name, standard_address_set, standard_name_set,
+                      name_to_suffix_dict):
+    """ Write the reference data of close_match to a binary file
+    Args:
+        file_name (str): file to write, it is overwritten.
+        standard_address_set (set): all standard full addresses
+        standard_name_set (set): all standard full name
+        name_to_suffix_dict (dict): name to suffix dict
+
+    Returns:
+        None
+
+    The file holds one table of all distinct strings, the addresses, names
+    and suffixes of each name as ids into it, hash tables of the
+    addresses, names and dict names, and the arrays of the MatchIndex of
+    both sets, so loading it neither parses, counts nor decodes.
+    """
+    index = MatchIndex(standard_address_set, standard_name_set)
+    dict_names = list(name_to_suffix_dict)
+
+    # One id per distinct string
+    strings = {}
+    for name, suffix in index.addresses:
+        strings.setdefault(name, len(strings))
+        strings.setdefault(suffix, len(strings))
+    for name in index.names + dict_names:
+        strings.setdefault(name, len(strings))
+    suffix_lists = [list(name_to_suffix_dict[name]) for name in dict_names]
+    for suffixes in suffix_lists:
+        for suffix in suffixes:
+            strings.setdefault(suffix, len(strings))
+    data, offsets = build_string_table(list(strings))
+
+    def ids(values):
+        return np.array([strings[x] for x in values], dtype=np.int32)
+
+    suffix_offsets = np.zeros(len(dict_names)+1, dtype=np.int64)
+    np.cumsum([len(x) for x in suffix_lists], out=suffix_offsets[1:])
+    arrays = {'strings': data,
+              'string_offsets': offsets,
+              'address_names': ids(name for name, _ in index.addresses),
+              'address_suffixes': ids(suffix for _, suffix
+                                      in index.addresses),
+              'names': ids(index.names),
+              'dict_names': ids(dict_names),
+              'dict_suffix_offsets': suffix_offsets,
+              'dict_suffixes': ids(x for suffixes in suffix_lists
+                                   for x in suffixes)}
+    for prefix, keys in (('address_', index.addresses),
+                         ('name_', index.names), ('dict_', dict_names)):
+        arrays[prefix+'hashes'], arrays[prefix+'order'] = \
+            build_hash_table(keys)
+    for prefix, candidate_index in (('address_index_', index.address_index),
+                                    ('name_index_', index.name_index)):
+        for key, value in candidate_index.arrays().items():
+            arrays[prefix+key] = value
+
+    # Place the arrays one after the other, aligned
+    layout = {}
+    offset = 0
+    for key, value in arrays.items():
+        arrays[key] = np.ascontiguousarray(value)
+        layout[key] = [arrays[key].dtype.str, list(arrays[key].shape), offset]
+        offset += -(-arrays[key].nbytes // ALIGNMENT) * ALIGNMENT
+    header = json.dumps({'arrays': layout}).encode('utf-8')
+    start = -(-(len(MAGIC) + 8 + len(header)) // ALIGNMENT) * ALIGNMENT
+
+    with open(file_name, 'wb') as handle:
+        handle.write(MAGIC)
+        handle.write(struct.pack('<II', FORMAT_VERSION, len(header)))
+        handle.write(header)
+        for key, value in arrays.items():
+            handle.seek(start + layout[key][2])
+            handle.write(value.tobytes())
+        handle.truncate(start + offset)
+
+
+class CompiledReference:
+
+    def __init__(self, file_name):
+        """ Reference data of close_match, memory-mapped from a file written
+        by compile_reference
+        Args:
+            file_name (str): compiled reference file.
+
+        Nothing but the header is read here. The pages of the file are
+        shared by every process that maps it. standard_address_set,
+        standard_name_set and name_to_suffix_dict are read-only views of
+        the file, and the MatchIndex reads its arrays from it, so a
+        matcher only decodes the strings it looks up or scores.
+        """
+        assert (os.path.exists(file_name)), \
+            "Reference {} does not exist! ".format(file_name)
+        with open(file_name, 'rb') as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0,
+                                   access=mmap.ACCESS_READ)
+        buffer = np.frombuffer(self._mmap, dtype=np.uint8)
+        assert (buffer[:len(MAGIC)].tobytes() == MAGIC), \
+            "{} is not a compiled reference file!".format(file_name)
+        version, header_len = struct.unpack(
+            '<II', buffer[len(MAGIC):len(MAGIC)+8].tobytes())
+        assert (version == FORMAT_VERSION), \
+            "{} has format version {}, expected {}. Compile it again."\
+            .format(file_name, version, FORMAT_VERSION)
+        header_end = len(MAGIC) + 8 + header_len
+        header = json.loads(buffer[len(MAGIC)+8:header_end].tobytes())
+        start = -(-header_end // ALIGNMENT) * ALIGNMENT
+
+        self.file_name = file_name
+        self.arrays = {}
+        for key, (dtype, shape, offset) in header['arrays'].items():
+            dtype = np.dtype(dtype)
+            nbytes = dtype.itemsize * int(np.prod(shape))
+            self.arrays[key] = buffer[start+offset:start+offset+nbytes]\
+                                 .view(dtype).reshape(shape)
+        self.strings = StringTable(self.arrays['strings'],
+                                   self.arrays['string_offsets'])
+        self.addresses = StringRows(self.strings,
+                                    [self.arrays['address_names'],
+                                     self.arrays['address_suffixes']])
+        self.names = StringRows(self.strings, [self.arrays['names']])
+        self.standard_address_set = CompiledSet(HashedRows(
+            self.addresses, self.arrays['address_hashes'],
+            self.arrays['address_order']))
+        self.standard_name_set = CompiledSet(HashedRows(
+            self.names, self.arrays['name_hashes'],
+            self.arrays['name_order']))
+        self.name_to_suffix_dict = CompiledSuffixDict(
+            HashedRows(StringRows(self.strings, [self.arrays['dict_names']]),
+                       self.arrays['dict_hashes'],
+                       self.arrays['dict_order']),
+            self.strings, self.arrays['dict_suffix_offsets'],
+            self.arrays['dict_suffixes'])
+        self._index = None
+
+
+    def match_index(self):
+        """ MatchIndex of the reference, reading the saved arrays
+        Returns:
+            MatchIndex. Its strings are decoded when a candidate is scored.
+        """
+        if self._index is None:
+            self._index = MatchIndex(
+                self.addresses, self.names,
+                address_arrays={key: self.arrays['address_index_'+key]
+                                for key in ('positions', 'lengths', 'counts')},
+                name_arrays={key: self.arrays['name_index_'+key]
+                             for key in ('positions', 'lengths', 'counts')},
+                address_keys=StringRows(self.strings,
+                                        self.addresses.columns, as_key=True),
+                name_keys=StringRows(self.strings, self.names.columns,
+                                     as_key=True))
+        return self._index
+
+
+    def matcher(self, parser=None, cache_size=None):
+        """ StandardAddressMatcher of the reference
+        Args:
+            parser (AddressParser): parser to use.
+            cache_size (int): see StandardAddressMatcher.
+
+        Returns:
+            StandardAddressMatcher
+        """
+        return StandardAddressMatcher(self.standard_address_set,
+                                      self.standard_name_set,
+                                      self.name_to_suffix_dict,
+                                      parser=parser, cache_size=cache_size,
+                                      index=self.match_index())
+
+
+def load_reference(file_name):
+    """ Memory-map a file written by compile_reference
+    Args:
+        file_name (str): compiled reference file.
+
+    Returns:
+        CompiledReference
+    """
+    return CompiledReference(file_name)
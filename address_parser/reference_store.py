@@ -0,0 +1,178 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import collections
+
+from .candidate_index import DynamicCandidateIndex
+from .matcher import StandardAddressMatcher
+
+
+class ReferenceStore:
+
+    def __init__(self, pairs=()):
+        """ Standard addresses that can be updated in place
+        Args:
+            pairs (iterable): (name, suffix) of every reference row, e.g.
+                              every parcel. A pair stays a standard address
+                              until all its rows are removed.
+
+        The store keeps standard_address_set, standard_name_set,
+        name_to_suffix_dict and its unique_suffix_dict, and the candidate
+        indexes of both sets, up to date with every add and remove. Each
+        update only touches the streets it changes. The store can be
+        passed as the index of close_match or StandardAddressMatcher
+        together with its own sets, which are updated in place. It gives
+        the same ratios as close_match without index, but its candidates
+        are scanned in the order of the slots they were added to, so on
+        equal ratios it may return another street than the scan of the
+        sets.
+        """
+        # Number of rows of every pair
+        self.row_counts = collections.Counter()
+        self.standard_address_set = set()
+        self.standard_name_set = set()
+        self.name_to_suffix_dict = {}
+        # Name to its only suffix, see address_methods.unique_suffix_dict
+        self.unique_suffixes = {}
+
+        # Same layout as MatchIndex, positions index the slots of the
+        # candidate indexes
+        self.addresses = []
+        self.names = []
+        self.address_index = DynamicCandidateIndex()
+        self.name_index = DynamicCandidateIndex()
+        self._address_slots = {}
+        self._name_slots = {}
+        self.add(pairs)
+
+
+    @classmethod
+    def from_frame(cls, df, name_col='Street Name',
+                   suffix_col='Street Suffix'):
+        """ Store of the streets of a DataFrame
+        Args:
+            df (pd.DataFrame): one row per reference address, e.g. parcels.
+            name_col (str): col containing Street Name
+            suffix_col (str): col containing Street Suffix
+
+        Returns:
+            ReferenceStore. Rows with a missing name or suffix are left
+            out, as in get_combinations_as_set.
+        """
+        df = df[[name_col, suffix_col]].dropna()
+        return cls(zip(df[name_col], df[suffix_col]))
+
+
+    def __len__(self):
+        return len(self.standard_address_set)
+
+
+    def __contains__(self, pair):
+        return tuple(pair) in self.standard_address_set
+
+
+    def add(self, pairs):
+        """ Add reference rows
+        Args:
+            pairs (iterable): (name, suffix) of every row.
+
+        Returns:
+            list of the (name, suffix) that became standard addresses
+        """
+        new = []
+        for pair, n in collections.Counter(map(tuple, pairs)).items():
+            if self.row_counts[pair] == 0:
+                new.append(pair)
+            self.row_counts[pair] += n
+
+        new_names = []
+        for name, suffix in new:
+            self.standard_address_set.add((name, suffix))
+            if name not in self.name_to_suffix_dict:
+                self.name_to_suffix_dict[name] = set()
+                self.standard_name_set.add(name)
+                new_names.append(name)
+            self.name_to_suffix_dict[name].add(suffix)
+            self._update_unique_suffix(name)
+
+        self._index(self.address_index, self.addresses, self._address_slots,
+                    new, [(name+' '+suffix).lower() for name, suffix in new])
+        self._index(self.name_index, self.names, self._name_slots,
+                    new_names, [name.lower() for name in new_names])
+        return new
+
+
+    def remove(self, pairs):
+        """ Remove reference rows
+        Args:
+            pairs (iterable): (name, suffix) of every row. Each must have
+                              been added at least as many times.
+
+        Returns:
+            list of the (name, suffix) that are no longer standard addresses
+        """
+        gone = []
+        for pair, n in collections.Counter(map(tuple, pairs)).items():
+            assert (self.row_counts[pair] >= n), \
+                "Cannot remove {} rows of {}, the store has {}!"\
+                .format(n, pair, self.row_counts[pair])
+            self.row_counts[pair] -= n
+            if self.row_counts[pair] == 0:
+                del self.row_counts[pair]
+                gone.append(pair)
+
+        gone_names = []
+        for name, suffix in gone:
+            self.standard_address_set.discard((name, suffix))
+            suffixes = self.name_to_suffix_dict[name]
+            suffixes.discard(suffix)
+            if not suffixes:
+                del self.name_to_suffix_dict[name]
+                self.standard_name_set.discard(name)
+                gone_names.append(name)
+            self._update_unique_suffix(name)
+
+        self._unindex(self.address_index, self.addresses,
+                      self._address_slots, gone)
+        self._unindex(self.name_index, self.names, self._name_slots,
+                      gone_names)
+        return gone
+
+
+    def _update_unique_suffix(self, name):
+        suffixes = self.name_to_suffix_dict.get(name, ())
+        if len(suffixes) == 1 and next(iter(suffixes)) != "":
+            self.unique_suffixes[name] = next(iter(suffixes))
+        else:
+            self.unique_suffixes.pop(name, None)
+
+
+    def _index(self, index, values, slots, new, keys):
+        for value, slot in zip(new, index.add(keys)):
+            if slot == len(values):
+                values.append(value)
+            else:
+                values[slot] = value
+            slots[value] = slot
+
+
+    def _unindex(self, index, values, slots, gone):
+        positions = [slots.pop(value) for value in gone]
+        index.remove(positions)
+        for pos in positions:
+            values[pos] = None
+
+
+    def matcher(self, parser=None):
+        """ StandardAddressMatcher over the store, following its updates
+        Args:
+            parser (AddressParser): parser to use.
+
+        Returns:
+            StandardAddressMatcher. It has no match cache, whose results
+            would outlive updates.
+        """
+        return StandardAddressMatcher(self.standard_address_set,
+                                      self.standard_name_set,
+                                      self.name_to_suffix_dict,
+                                      parser=parser, index=self)
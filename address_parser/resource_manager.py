@@ -1,16 +1,16 @@
 # -*- coding: utf-8 -*-
 
 ### Import libraries
-from fuzzywuzzy import fuzz
-import numpy as np
 import os
-import pandas as pd
 import pickle
 import re
-import sys
 
-# !pip install -q fuzzywuzzy
-# !pip install -q fuzzywuzzy[speedup]
+# pandas is imported by the functions reading DataFrames, so that loading
+# the pickled resources of the parser does not import it.
+
+# Resources loaded by load_resource, shared by the whole process.
+# Maps absolute path to (mtime, data).
+_resource_cache = {}
 
 
 def load_mile_road_dict():
@@ -57,32 +57,75 @@ def save_resource(data, file_name,
     with open(os.path.join(data_path,file_name), 'wb') as handle:
         pickle.dump(data, handle,
                     protocol=pickle.HIGHEST_PROTOCOL)
+    clear_resource_cache(file_name, file_path)
+
+
+def resource_path(file_name, rel_path="resources"):
+    """ Absolute path of a resource
+    Args:
+        file_name (str): full file name.
+        rel_path (str): path to ```file_name```, relative to the package
+                        root. Default value is ```resources```.
+
+    Returns:
+        str
+    """
+    current_dir, _ = os.path.split(__file__)
+    return os.path.abspath(os.path.join(current_dir+"/../", rel_path,
+                                        file_name))
 
 
-def load_resource(file_name, rel_path="resources"):
+def load_resource(file_name, rel_path="resources", use_cache=True):
     """ Load resource
     Args:
         file_name (str): full file name. This should be included in
                          ```resources``` directory.
         rel_path (str): path to ```file_name```.  Default value
                         is ```resources```.
+        use_cache (bool): return the object loaded earlier in this process
+                          if the file has not been modified since. The
+                          object is shared, so do not modify it.
 
     Returns:
         data: the data consistant with pickle file data.
     """
     # Get directory
-    current_dir, _ = os.path.split(__file__)
-    data_path = os.path.join(current_dir+"/../", rel_path, file_name)
+    data_path = resource_path(file_name, rel_path)
 
     # Read resource file
     assert (os.path.exists(data_path)), \
         "Resource {} does not exist! ".format(data_path)
 
+    mtime = os.path.getmtime(data_path)
+    if use_cache:
+        cached = _resource_cache.get(data_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
     with open(data_path, 'rb') as handle:
         data = pickle.load(handle)
 
+    if use_cache:
+        _resource_cache[data_path] = (mtime, data)
     return data
 
+
+def clear_resource_cache(file_name=None, rel_path="resources"):
+    """ Drop resources loaded by load_resource from the cache
+    Args:
+        file_name (str): resource to drop. All resources are dropped
+                         if None.
+        rel_path (str): path to ```file_name```.  Default value
+                        is ```resources```.
+
+    Returns:
+        None
+    """
+    if file_name is None:
+        _resource_cache.clear()
+    else:
+        _resource_cache.pop(resource_path(file_name, rel_path), None)
+
 def compile_re(pattern):
     """ Compile a regular expression with pattern
     Args:
@@ -133,17 +176,12 @@ def load_df(file_name, path="resources", **kwargs):
         data: the data from the csv file
     """
     # Get directory
-    if os.path.exists(path):
-        # this is an absolute path
-        data_path = os.path.join(path, file_name)
-    else:
-        # this is a relative path
-        current_dir, _ = os.path.split(__file__)
-        data_path = os.path.join(current_dir+"/../", path, file_name)
+    data_path = df_path(file_name, path)
 
     # Read resource file
     assert (os.path.exists(data_path)), \
         "Resource {} does not exist! ".format(data_path)
+    import pandas as pd
     if file_name.endswith('.csv'):
         df = pd.read_csv(data_path, **kwargs)
     else:
@@ -152,6 +190,53 @@ def load_df(file_name, path="resources", **kwargs):
     return df
 
 
+def df_path(file_name, path="resources"):
+    """ Path of a data file, as resolved by load_df
+    Args:
+        file_name (str): full file name.
+        path (str): absolute path, or path relative to the package root.
+
+    Returns:
+        str
+    """
+    if os.path.exists(path):
+        # this is an absolute path
+        return os.path.join(path, file_name)
+    # this is a relative path
+    current_dir, _ = os.path.split(__file__)
+    return os.path.join(current_dir+"/../", path, file_name)
+
+
+def load_df_chunks(file_name, path="resources", chunk_size=100000, **kwargs):
+    """ Load a csv or Excel file chunk by chunk
+    Args:
+        file_name (str): full file name.
+        path (str): path to ```file_name```, as in load_df.
+        chunk_size (int): number of rows per chunk.
+        **kwargs: kwargs to be passeed into pd.read_csv
+
+    Returns:
+        an iterator of pd.DataFrame with at most chunk_size rows each.
+        The index keeps counting across chunks. Excel files cannot be
+        read partially, so they are loaded whole and then sliced. Dtypes
+        of csv columns are inferred per chunk, pass ```dtype``` to keep
+        them the same in every chunk.
+    """
+    data_path = df_path(file_name, path)
+    assert (os.path.exists(data_path)), \
+        "Resource {} does not exist! ".format(data_path)
+
+    import pandas as pd
+    if file_name.endswith('.csv'):
+        with pd.read_csv(data_path, chunksize=chunk_size, **kwargs) as reader:
+            for chunk in reader:
+                yield chunk
+    else:
+        df = pd.read_excel(data_path, **kwargs)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start+chunk_size]
+
+
 def load_sample(file_name="addresses.csv",
                 rel_path="resources/datasets"):
     """ Load resource
@@ -172,6 +257,6 @@ def load_sample(file_name="addresses.csv",
     assert (os.path.exists(data_path)), \
         "Resource {} does not exist! ".format(data_path)
 
-
+    import pandas as pd
     sample = pd.read_csv(data_path)
     return sample
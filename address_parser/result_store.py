@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import hashlib
+import sqlite3
+
+from .address_parser_class import PARSED_COLUMNS
+
+# Columns of a stored result, in the order of pipeline.process_chunk
+RESULT_COLUMNS = PARSED_COLUMNS + ['Suggested Name', 'Suggested Suffix',
+                                   'Matching Ratio']
+# Part of every reference version. Increase it when a change of the parser
+# or matcher changes their results, so that stored results are not reused.
+RESULT_FORMAT = 1
+# Keys looked up per SQL statement
+LOOKUP_BATCH_SIZE = 500
+
+
+def reference_version(standard_address_set, standard_name_set,
+                      name_to_suffix_dict):
+    """ Version of the reference data, the same in every process
+    Args:
+        standard_address_set (set): all standard full addresses
+        standard_name_set (set): all standard full name
+        name_to_suffix_dict (dict): name to suffix dict
+
+    Returns:
+        str, hex digest of RESULT_FORMAT and the sorted contents
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(str(RESULT_FORMAT).encode('utf-8'))
+    for part in (sorted(map(repr, standard_address_set)),
+                 sorted(map(repr, standard_name_set)),
+                 sorted(repr((name, sorted(suffixes))) for name, suffixes
+                        in name_to_suffix_dict.items())):
+        digest.update(b'\x1e' + '\x1f'.join(part).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def address_hash(address):
+    """ Key of a raw address
+    Args:
+        address (str): raw address, or a missing value.
+
+    Returns:
+        bytes, 16 byte digest. Missing values get keys no string has.
+    """
+    if isinstance(address, str):
+        data = b'\x01' + address.encode('utf-8', 'surrogatepass')
+    else:
+        data = b'\x00' + repr(address).encode('utf-8')
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class ResultStore:
+
+    def __init__(self, file_name, version):
+        """ SQLite file of the results of pipeline.process_chunk
+        Args:
+            file_name (str): SQLite file, created if it does not exist.
+            version (str): version of the reference data, see
+                           reference_version. Only results stored with the
+                           same version are found.
+
+        Results are keyed by version and address_hash of the raw address.
+        Results of other versions stay in the file until prune.
+        """
+        self.file_name = file_name
+        self.version = version
+        self.connection = sqlite3.connect(file_name)
+        columns = ', '.join('c{} {}'.format(i, 'INTEGER' if col ==
+                                            'Matching Ratio' else 'TEXT')
+                            for i, col in enumerate(RESULT_COLUMNS))
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (version TEXT NOT NULL, "
+            "address BLOB NOT NULL, {}, PRIMARY KEY (version, address)) "
+            "WITHOUT ROWID".format(columns))
+        self.connection.commit()
+
+
+    def __len__(self):
+        return self.connection.execute(
+            "SELECT COUNT(*) FROM results WHERE version = ?",
+            (self.version,)).fetchone()[0]
+
+
+    def get(self, keys):
+        """ Stored results of addresses
+        Args:
+            keys (iterable): address_hash of every address.
+
+        Returns:
+            dict from key to the tuple of RESULT_COLUMNS, for the keys that
+            are stored
+        """
+        keys = list(set(keys))
+        columns = ', '.join('c{}'.format(i)
+                            for i in range(len(RESULT_COLUMNS)))
+        ans = {}
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            batch = keys[start:start+LOOKUP_BATCH_SIZE]
+            cursor = self.connection.execute(
+                "SELECT address, {} FROM results WHERE version = ? AND "
+                "address IN ({})".format(columns, ', '.join('?' * len(batch))),
+                [self.version] + batch)
+            for row in cursor:
+                ans[row[0]] = row[1:]
+        return ans
+
+
+    def put(self, keys, results):
+        """ Store results of addresses, replacing stored ones
+        Args:
+            keys (iterable): address_hash of every address.
+            results (iterable): tuple of RESULT_COLUMNS of every address.
+
+        Returns:
+            None
+        """
+        self.connection.executemany(
+            "INSERT OR REPLACE INTO results VALUES ({})"\
+            .format(', '.join('?' * (len(RESULT_COLUMNS) + 2))),
+            ((self.version, key) + tuple(result)
+             for key, result in zip(keys, results)))
+        self.connection.commit()
+
+
+    def prune(self):
+        """ Delete the results of all other versions
+        Returns:
+            number of results deleted
+        """
+        n = self.connection.execute("DELETE FROM results WHERE version != ?",
+                                    (self.version,)).rowcount
+        self.connection.commit()
+        return n
+
+
+    def close(self):
+        self.connection.close()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,327 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+import asyncio
+import collections
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import json
+import numpy as np
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from .address_methods import _init_match_worker, _match_chunk
+from .address_parser_class import AddressParser, PARSED_COLUMNS
+from .matcher import StandardAddressMatcher
+from .reference_file import load_reference
+
+# Number of latencies kept for the percentiles
+LATENCY_WINDOW = 100000
+
+
+class AddressService:
+
+    def __init__(self, standard_address_set=None, standard_name_set=None,
+                 name_to_suffix_dict=None, max_batch=64, batch_window=0.002,
+                 n_workers=1, use_processes=False, index=None,
+                 reference_file=None):
+        """ Long-lived parser and matcher for online lookups
+        Args:
+            standard_address_set (set): all standard full addresses
+            standard_name_set (set): all standard full name
+            name_to_suffix_dict (dict): name to suffix dict
+            max_batch (int): most close matches scored in one batch
+            batch_window (float): seconds a close match waits for other
+                                  requests to share its batch
+            n_workers (int): number of threads or processes scoring batches
+            use_processes (bool): score batches in worker processes, each
+                                  with its own matcher, instead of threads
+                                  sharing this one
+            index (MatchIndex): prebuilt index of the sets, used by the
+                                matcher of this process only. Worker
+                                processes cannot share it, pass
+                                reference_file for that.
+            reference_file (str): file written by
+                                  reference_file.compile_reference, used
+                                  instead of the three reference
+                                  arguments and index. This process and
+                                  every worker process map it, so they
+                                  share one copy of its pages.
+
+        The parser and matcher are built and warmed here. Parsing runs in
+        the event loop, close matches are queued, grouped into batches and
+        scored in the worker pool.
+        """
+        self.parser = AddressParser()
+        if reference_file is not None:
+            self.matcher = load_reference(reference_file).matcher(
+                parser=self.parser)
+            initargs = (None, None, None, reference_file)
+        else:
+            assert (standard_address_set is not None), \
+                "Either the reference sets or reference_file are needed!"
+            self.matcher = StandardAddressMatcher(standard_address_set,
+                                                  standard_name_set,
+                                                  name_to_suffix_dict,
+                                                  parser=self.parser,
+                                                  index=index)
+            initargs = (standard_address_set, standard_name_set,
+                        name_to_suffix_dict)
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        if use_processes:
+            self.executor = ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_match_worker,
+                initargs=initargs)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=n_workers)
+        self.use_processes = use_processes
+
+        self.latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.n_requests = 0
+        self.n_batches = 0
+        self._queue = None
+        self._batcher = None
+        self._scoring = set()
+
+        # Warm up
+        self.lookup_sync("1 Main Street")
+
+
+    def lookup_sync(self, address):
+        """ Parse and close match an address in the calling thread
+        Args:
+            address (str): address to be looked up.
+
+        Returns:
+            dict, see lookup
+        """
+        number, name, prefix, suffix, other = self.parser.parse_street(address)
+        matched = self.matcher.match(name, suffix)
+        return self._result((number, name, prefix, suffix, other), matched)
+
+
+    def _result(self, parsed, matched):
+        return dict(zip(PARSED_COLUMNS + ['Suggested Name',
+                                          'Suggested Suffix',
+                                          'Matching Ratio'],
+                        tuple(parsed) + tuple(matched)))
+
+
+    async def start(self):
+        """ Start the batching task in the running event loop
+        """
+        if self._batcher is None:
+            self._queue = asyncio.Queue()
+            self._batcher = asyncio.ensure_future(self._run_batches())
+
+
+    async def close(self):
+        """ Stop the batching task and the worker pool
+        """
+        if self._batcher is not None:
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+            self._batcher = None
+        self.executor.shutdown(wait=True)
+
+
+    async def match(self, name, suffix):
+        """ Close match a street, batched with concurrent requests
+        Args:
+            name (str): street name of address
+            suffix (str): street suffix of address
+
+        Returns:
+            (matched_name, matched_suffix, ratio)
+        """
+        await self.start()
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((name, suffix, future))
+        return await future
+
+
+    async def lookup(self, address):
+        """ Parse and close match an address
+        Args:
+            address (str): address to be looked up.
+
+        Returns:
+            dict with the keys 'Street Number', 'Street Name',
+            'Street Prefix', 'Street Suffix', 'Other Address',
+            'Suggested Name', 'Suggested Suffix' and 'Matching Ratio'
+        """
+        start = time.perf_counter()
+        parsed = self.parser.parse_street(address)
+        matched = await self.match(parsed[1], parsed[3])
+        self.latencies.append(time.perf_counter() - start)
+        self.n_requests += 1
+        return self._result(parsed, matched)
+
+
+    async def _run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.batch_window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(),
+                                                        timeout))
+                except asyncio.TimeoutError:
+                    break
+            self.n_batches += 1
+            # Score in the pool, while the next batch is collected
+            task = asyncio.ensure_future(self._score(batch))
+            self._scoring.add(task)
+            task.add_done_callback(self._scoring.discard)
+
+
+    async def _score(self, batch):
+        names = [name for name, _, _ in batch]
+        suffixes = [suffix for _, suffix, _ in batch]
+        loop = asyncio.get_running_loop()
+        try:
+            if self.use_processes:
+                columns = await loop.run_in_executor(self.executor,
+                                                     _match_chunk, names,
+                                                     suffixes)
+                matched = list(zip(*columns))
+            else:
+                matched = await loop.run_in_executor(self.executor,
+                                                     self.matcher.match_many,
+                                                     names, suffixes)
+        except Exception as error:
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for (_, _, future), result in zip(batch, matched):
+            if not future.done():
+                future.set_result(result)
+
+
+    def stats(self):
+        """ Latency and batching statistics
+        Returns:
+            dict with the number of requests and batches, the mean batch
+            size, and the p50, p99 and max latency in milliseconds over
+            the last LATENCY_WINDOW requests
+        """
+        latencies = np.asarray(self.latencies) * 1000
+        ans = {'requests': self.n_requests, 'batches': self.n_batches,
+               'mean_batch_size': self.n_requests / max(self.n_batches, 1)}
+        for key, q in (('p50_ms', 50), ('p99_ms', 99), ('max_ms', 100)):
+            ans[key] = float(np.percentile(latencies, q)) \
+                       if len(latencies) else None
+        return ans
+
+
+async def handle_http(service, reader, writer):
+    """ Serve HTTP/1.1 requests of one connection
+    Args:
+        service (AddressService)
+        reader (asyncio.StreamReader)
+        writer (asyncio.StreamWriter)
+
+    Endpoints:
+        GET /lookup?address=...   parse and close match an address
+        GET /parse?address=...    parse only
+        GET /stats                AddressService.stats
+    """
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line:
+                break
+            keep_alive = True
+            while True:
+                header = await reader.readline()
+                if header in (b'\r\n', b'\n', b''):
+                    break
+                key, _, value = header.decode('latin-1').partition(':')
+                if key.strip().lower() == 'connection' and \
+                   value.strip().lower() == 'close':
+                    keep_alive = False
+
+            try:
+                method, target, _ = request_line.decode('latin-1').split()
+                url = urlsplit(target)
+                query = parse_qs(url.query)
+                address = query.get('address', [""])[0]
+                if method != 'GET':
+                    status, body = 405, {'error': 'Only GET is supported'}
+                elif url.path == '/lookup':
+                    status, body = 200, await service.lookup(address)
+                elif url.path == '/parse':
+                    status, body = 200, \
+                        service.parser.parse(address).to_dict()
+                elif url.path == '/stats':
+                    status, body = 200, service.stats()
+                else:
+                    status, body = 404, {'error': 'Not found'}
+            except Exception as error:
+                status, body = 400, {'error': str(error)}
+
+            data = json.dumps(body).encode('utf-8')
+            writer.write("HTTP/1.1 {} {}\r\nContent-Type: application/json"
+                         "\r\nContent-Length: {}\r\n\r\n"\
+                         .format(status, 'OK' if status == 200 else 'Error',
+                                 len(data)).encode('latin-1') + data)
+            await writer.drain()
+            if not keep_alive:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass
+    finally:
+        writer.close()
+
+
+async def start_server(service, host='127.0.0.1', port=8080, path=None):
+    """ Start serving HTTP on a TCP port or a Unix socket
+    Args:
+        service (AddressService)
+        host (str): address to listen on
+        port (int): TCP port, 0 picks a free one
+        path (str): Unix socket path. Used instead of host and port if set.
+
+    Returns:
+        asyncio.Server
+    """
+    await service.start()
+
+    def handler(reader, writer):
+        return handle_http(service, reader, writer)
+
+    if path is not None:
+        return await asyncio.start_unix_server(handler, path=path)
+    return await asyncio.start_server(handler, host=host, port=port)
+
+
+def serve(service, host='127.0.0.1', port=8080, path=None):
+    """ Serve HTTP until interrupted
+    Args:
+        service (AddressService)
+        host (str): address to listen on
+        port (int): TCP port
+        path (str): Unix socket path. Used instead of host and port if set.
+
+    Returns:
+        None
+    """
+    async def run():
+        server = await start_server(service, host, port, path)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            await service.close()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
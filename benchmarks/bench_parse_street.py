@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+""" Compare AddressParser.parse_street with its previous implementation
+
+Usage:
+    python benchmarks/bench_parse_street.py [n_addresses]
+"""
+
+### Import libraries
+import os, sys
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                ".."))
+
+from address_parser import AddressParser
+
+NAMES = ["Barclay", "Le Bost", "Newburg", "Glen Haven", "Ten Mile",
+         "Grand River", "Woodward", "Michigan", "Main", "Haggerty",
+         "Old Orchard", "Twelve Oaks", "Meadowbrook"]
+SUFFIXES = ["Drive", "Dr.", "Road", "Rd", "Street", "St.", "Court", "Ct",
+            "Avenue", "Ave", "Boulevard", "Blvd", "Lane", "Trail", ""]
+PREFIXES = ["", "", "", "W", "E.", "North", "S"]
+UNITS = ["", "", "", "Unit 12", "#4", "Apt. 3-B", "Suite 200"]
+
+
+def legacy_parse_street(parser, address):
+    """ parse_street as it was before the single-pass classifier """
+    if not address:
+        return ("", "", "", "", "")
+
+    address = address.replace('.',' ').replace('#',' ').replace('-',' ')
+
+    street_number, street_name, street_prefix, street_suffix, other = \
+                  None, "", '', "", ""
+
+    all_componenets = address.strip().split()
+    N = len(all_componenets)
+
+    last_suffix_pos = None
+    for i,c in enumerate(all_componenets[::-1]):
+        if parser.to_first_upper(c) in parser.street_name_abbr_dict:
+          last_suffix_pos = N-1-i
+          break
+
+    for i,c in enumerate(all_componenets):
+        if c.isnumeric():
+            if i+1<N and all_componenets[i+1] == "Mile":
+                street_name += parser.mile_road_dict[c.strip()]+' '
+            elif i==0:
+                street_number = c
+            else:
+                other += c+' '
+        else:
+            if c.upper() in ["E","W","S","N", "EAST", "WEST", "NORTH",
+                             "SOUTH"]:
+                if street_prefix == "":
+                    street_prefix = c[0].upper()
+                else:
+                    other += (c+' ')
+                continue
+
+            if (last_suffix_pos is not None) and i > last_suffix_pos:
+                other += (c+' ')
+                continue
+
+            if (i==last_suffix_pos):
+                if (street_name==""):
+                    street_name += (c+' ')
+                else:
+                    street_suffix = parser.to_first_upper(c)
+                continue
+            street_name += (c+' ')
+
+    return tuple(map(parser.strip,
+            [street_number, street_name, street_prefix, street_suffix, other]))
+
+
+def gen_addresses(n, seed=0):
+    """ Random Michigan style street addresses """
+    rng = random.Random(seed)
+    ans = []
+    for _ in range(n):
+        parts = [str(rng.randint(1, 99999)), rng.choice(PREFIXES),
+                 rng.choice(NAMES), rng.choice(SUFFIXES), rng.choice(UNITS)]
+        ans.append(' '.join(p for p in parts if p))
+    return ans
+
+
+def main(n=100000):
+    parser = AddressParser()
+    addresses = gen_addresses(n)
+
+    for address in addresses:
+        assert (parser.parse_street(address) ==
+                legacy_parse_street(parser, address)), address
+
+    legacy = min(timeit.repeat(
+        lambda: [legacy_parse_street(parser, a) for a in addresses],
+        number=1, repeat=3))
+    current = min(timeit.repeat(
+        lambda: [parser.parse_street(a) for a in addresses],
+        number=1, repeat=3))
+    print("addresses:   {}".format(n))
+    print("legacy:      {:.3f} us/address".format(1e6*legacy/n))
+    print("current:     {:.3f} us/address".format(1e6*current/n))
+    print("speedup:     {:.2f}x".format(legacy/current))
+
+
+if __name__ == '__main__':
+    main(*map(int, sys.argv[1:]))
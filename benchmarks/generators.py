@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+""" Seeded generators of synthetic Michigan style address data
+
+Every generator takes a seed and returns the same data for the same
+arguments, so benchmark runs can be compared with each other.
+"""
+
+### Import libraries
+import numpy as np
+import pandas as pd
+import random
+
+# Common Michigan street names, extended with synthetic ones
+STREET_NAMES = ["Barclay", "Le Bost", "Newburg", "Glen Haven", "Grand River",
+                "Woodward", "Michigan", "Main", "Haggerty", "Old Orchard",
+                "Twelve Oaks", "Meadowbrook", "Telegraph", "Gratiot",
+                "Jefferson", "Van Dyke", "Orchard Lake", "Beck", "Wixom",
+                "Novi", "Taft", "Napier", "Garfield", "Dequindre"]
+SYLLABLES = ["al", "ber", "by", "ca", "den", "der", "el", "field", "gate",
+             "ham", "ing", "kin", "la", "ley", "mont", "mor", "ner", "ton",
+             "ridge", "ro", "sel", "ster", "ver", "wood", "win", "york"]
+MILE_NUMBERS = [str(i) for i in range(1, 21)]
+
+# Standard suffix followed by the spellings found in transaction data
+SUFFIX_VARIANTS = {"Drive": ["Drive", "Dr", "Dr.", "DRIVE", "drive"],
+                   "Road": ["Road", "Rd", "Rd.", "ROAD"],
+                   "Street": ["Street", "St", "St.", "STREET"],
+                   "Court": ["Court", "Ct", "Ct.", "Crt"],
+                   "Avenue": ["Avenue", "Ave", "Ave.", "Av"],
+                   "Boulevard": ["Boulevard", "Blvd", "Blvd."],
+                   "Lane": ["Lane", "Ln", "Ln."],
+                   "Circle": ["Circle", "Cir", "Cir."],
+                   "Trail": ["Trail", "Trl"],
+                   "Way": ["Way"]}
+PREFIXES = ["W", "E", "N", "S", "W.", "East", "North", "SOUTH"]
+UNITS = ["Unit {}", "Apt {}", "Apt. {}", "#{}", "Suite {}", "Lot {}"]
+CITIES = ["Novi", "Wixom", "Northville", "Farmington Hills", "Troy",
+          "Southfield", "Livonia", "Walled Lake", "Commerce Township"]
+
+
+def gen_street_names(n, seed=0):
+    """ Distinct street names, the common ones first
+    Args:
+        n (int): number of names.
+        seed (int): random seed.
+
+    Returns:
+        list of str
+    """
+    rng = random.Random(seed)
+    names = list(STREET_NAMES[:n])
+    seen = set(names)
+    while len(names) < n:
+        name = ''.join(rng.choice(SYLLABLES)
+                       for _ in range(rng.randint(2, 3))).title()
+        if rng.random() < 0.2:
+            name += ' ' + rng.choice(["Lake", "Hills", "Park", "Pointe"])
+        if name not in seen:
+            seen.add(name)
+            names.append(name)
+    return names
+
+
+def gen_reference(n, seed=0):
+    """ Reference sets in the form used by AddressParser.close_match
+    Args:
+        n (int): number of standard addresses.
+        seed (int): random seed.
+
+    Returns:
+        (standard_address_set, standard_name_set, name_to_suffix_dict)
+    """
+    rng = random.Random(seed)
+    names = gen_street_names(max(n*2//3, 1), seed)
+    suffixes = list(SUFFIX_VARIANTS)
+    standard_address_set = set()
+    while len(standard_address_set) < n:
+        standard_address_set.add((rng.choice(names), rng.choice(suffixes)))
+    standard_name_set = set(name for name, _ in standard_address_set)
+    name_to_suffix_dict = {}
+    for name, suffix in standard_address_set:
+        name_to_suffix_dict.setdefault(name, set()).add(suffix)
+    return standard_address_set, standard_name_set, name_to_suffix_dict
+
+
+def add_typo(rng, x):
+    """ Drop, replace, insert or swap one character of x """
+    if len(x) < 2:
+        return x
+    i = rng.randrange(len(x) - 1)
+    op = rng.randrange(4)
+    if op == 0:
+        return x[:i] + x[i+1:]
+    if op == 1:
+        return x[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + x[i+1:]
+    if op == 2:
+        return x[:i] + rng.choice("abcdefghijklmnopqrstuvwxyz") + x[i:]
+    return x[:i] + x[i+1] + x[i] + x[i+2:]
+
+
+def gen_addresses(n, seed=0, reference=None, typo_rate=0.1):
+    """ Street addresses as typed in transaction data
+    Args:
+        n (int): number of addresses.
+        seed (int): random seed.
+        reference (tuple): output of gen_reference. Addresses are drawn
+                           from its standard addresses. Default is a
+                           reference of 1000 addresses.
+        typo_rate (float): share of street names with a typo.
+
+    Returns:
+        list of str, e.g. "24160 W Le Bsot Dr. Unit 3"
+    """
+    rng = random.Random(seed)
+    if reference is None:
+        reference = gen_reference(1000, seed)
+    addresses = sorted(reference[0])
+    ans = []
+    for _ in range(n):
+        r = rng.random()
+        if r < 0.05:
+            name = "{} Mile".format(rng.choice(MILE_NUMBERS))
+            suffix = rng.choice(SUFFIX_VARIANTS["Road"])
+        else:
+            name, suffix = rng.choice(addresses)
+            if rng.random() < typo_rate:
+                name = add_typo(rng, name)
+            suffix = rng.choice(SUFFIX_VARIANTS[suffix]) \
+                     if rng.random() < 0.9 else ""
+        parts = [str(rng.randint(1, 99999))]
+        if rng.random() < 0.15:
+            parts.append(rng.choice(PREFIXES))
+        parts.append(name)
+        if suffix:
+            parts.append(suffix)
+        if rng.random() < 0.1:
+            parts.append(rng.choice(UNITS).format(rng.randint(1, 400)))
+        ans.append(' '.join(parts))
+    return ans
+
+
+def gen_pins(n, seed=0, mult_rate=0.05):
+    """ Parcel numbers as typed in transaction data
+    Args:
+        n (int): number of PINs.
+        seed (int): random seed.
+        mult_rate (float): share of PINs listing several parcels,
+                           e.g. "2215200012,013,014".
+
+    Returns:
+        list of str
+    """
+    rng = random.Random(seed)
+    ans = []
+    for _ in range(n):
+        pin = "22{:08d}".format(rng.randrange(10**8))
+        r = rng.random()
+        if r < 0.3:
+            # County prefix, removed by clean_PIN_by_row
+            pin = "50" + pin
+        elif r < 0.32:
+            pin = rng.choice(["TBDNEWCONSTRCT.", "ATLISTINGOFFICE"])
+        elif r < 0.32 + mult_rate:
+            extra = rng.randint(1, 3)
+            pin += ''.join("{}{:03d}".format(rng.choice([",", "/", " & "]),
+                                             rng.randrange(1000))
+                           for _ in range(extra))
+        ans.append(pin)
+    return ans
+
+
+def gen_transactions(n, seed=0, reference=None):
+    """ Transaction data in the layout of resources/datasets/addresses.csv
+    Args:
+        n (int): number of rows.
+        seed (int): random seed.
+        reference (tuple): output of gen_reference, see gen_addresses.
+
+    Returns:
+        pd.DataFrame with the columns 'Address_x', 'City' and 'PIN'
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Address_x': gen_addresses(n, seed, reference),
+        'City': np.asarray(CITIES, dtype=object)[
+                    rng.integers(len(CITIES), size=n)],
+        'PIN': gen_pins(n, seed)})
+
+
+def gen_parcels(n, seed=0, n_streets=None):
+    """ Parcel table, one row per parcel of a standard street
+    Args:
+        n (int): number of rows.
+        seed (int): random seed.
+        n_streets (int): number of standard addresses, default n // 100.
+
+    Returns:
+        pd.DataFrame with the columns 'Street Number', 'Street Name',
+        'Street Suffix' and 'City'
+    """
+    rng = np.random.default_rng(seed)
+    if n_streets is None:
+        n_streets = max(n // 100, 1)
+    standard_address_set, _, _ = gen_reference(n_streets, seed)
+    streets = sorted(standard_address_set)
+    names = np.asarray([name for name, _ in streets], dtype=object)
+    suffixes = np.asarray([suffix for _, suffix in streets], dtype=object)
+    rows = rng.integers(len(streets), size=n)
+    return pd.DataFrame({
+        'Street Number': rng.integers(1, 10000, size=n).astype(str)\
+                            .astype(object),
+        'Street Name': names[rows],
+        'Street Suffix': suffixes[rows],
+        'City': np.asarray(CITIES, dtype=object)[
+                    rng.integers(len(CITIES), size=n)]})
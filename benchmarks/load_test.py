@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+""" Load test of the lookup service
+
+Usage:
+    python benchmarks/load_test.py [--requests 20000] [--concurrency 64]
+        [--reference-size 10000] [--max-batch 64] [--batch-window 0.002]
+        [--workers 1] [--processes] [--direct]
+
+Starts an AddressService on a free local port, sends lookups of synthetic
+addresses from concurrent keep-alive HTTP clients (or calls the service
+directly with --direct), and prints the throughput together with client
+and server side latency percentiles.
+"""
+
+### Import libraries
+import argparse
+import asyncio
+import json
+import os, sys
+import time
+from urllib.parse import quote
+
+bench_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(bench_folder, ".."))
+sys.path.insert(0, bench_folder)
+
+import numpy as np
+
+from address_parser import service
+import generators
+
+
+async def http_client(port, addresses, latencies):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        for address in addresses:
+            start = time.perf_counter()
+            writer.write("GET /lookup?address={} HTTP/1.1\r\nHost: x\r\n\r\n"
+                         .format(quote(address)).encode())
+            await writer.drain()
+            await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                if line.lower().startswith(b'content-length'):
+                    length = int(line.split(b':')[1])
+            json.loads(await reader.readexactly(length))
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+
+async def direct_client(app, addresses, latencies):
+    for address in addresses:
+        start = time.perf_counter()
+        await app.lookup(address)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    reference = generators.gen_reference(args.reference_size, args.seed)
+    addresses = generators.gen_addresses(args.requests, args.seed+1,
+                                         reference, typo_rate=0.3)
+    app = service.AddressService(*reference, max_batch=args.max_batch,
+                                 batch_window=args.batch_window,
+                                 n_workers=args.workers,
+                                 use_processes=args.processes)
+    server = None
+    if not args.direct:
+        server = await service.start_server(app, port=0)
+        port = server.sockets[0].getsockname()[1]
+
+    latencies = []
+    chunks = [addresses[i::args.concurrency]
+              for i in range(args.concurrency)]
+    start = time.perf_counter()
+    if args.direct:
+        await asyncio.gather(*[direct_client(app, chunk, latencies)
+                               for chunk in chunks])
+    else:
+        await asyncio.gather(*[http_client(port, chunk, latencies)
+                               for chunk in chunks])
+    seconds = time.perf_counter() - start
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+    stats = app.stats()
+    await app.close()
+
+    latencies = np.asarray(latencies) * 1000
+    print("requests:          {}".format(len(latencies)))
+    print("concurrency:       {}".format(args.concurrency))
+    print("throughput:        {:.0f} requests/s".format(
+            len(latencies)/seconds))
+    print("client p50/p99:    {:.2f} / {:.2f} ms".format(
+            np.percentile(latencies, 50), np.percentile(latencies, 99)))
+    print("server p50/p99:    {:.2f} / {:.2f} ms".format(
+            stats['p50_ms'], stats['p99_ms']))
+    print("mean batch size:   {:.1f}".format(stats['mean_batch_size']))
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    args.add_argument('--requests', type=int, default=20000)
+    args.add_argument('--concurrency', type=int, default=64)
+    args.add_argument('--reference-size', type=int, default=10000)
+    args.add_argument('--max-batch', type=int, default=64)
+    args.add_argument('--batch-window', type=float, default=0.002)
+    args.add_argument('--workers', type=int, default=1)
+    args.add_argument('--processes', action='store_true',
+                      help="score batches in worker processes")
+    args.add_argument('--direct', action='store_true',
+                      help="call the service without HTTP")
+    args.add_argument('--seed', type=int, default=0)
+    asyncio.run(run(args.parse_args(argv)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+""" Time parsing, matching, PIN expansion and reference building on
+synthetic data
+
+Usage:
+    python benchmarks/run_benchmarks.py [--sizes 10000 1000000 10000000]
+        [--reference-sizes 100 1000 10000] [--match-queries 1000]
+        [--output results.json]
+
+Results are written as JSON, one record per timed step, together with the
+versions and git commit they were measured on. Compare two runs with
+    python benchmarks/run_benchmarks.py --compare old.json new.json
+"""
+
+### Import libraries
+import argparse
+import datetime
+import json
+import os, sys
+import platform
+import subprocess
+import time
+
+bench_folder = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(bench_folder, ".."))
+sys.path.insert(0, bench_folder)
+
+import numpy as np
+import pandas as pd
+
+from address_parser import address_methods as am
+from address_parser import AddressParser, StandardAddressMatcher
+import generators
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"],
+                                       cwd=bench_folder,
+                                       stderr=subprocess.DEVNULL)\
+                         .decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def timed(results, name, rows, func, **params):
+    """ Run func once and record its wall time
+    Args:
+        results (list): records are appended to it.
+        name (str): name of the step.
+        rows (int): number of rows func processes.
+        func (callable): called without arguments.
+        **params: recorded with the timing.
+
+    Returns:
+        output of func
+    """
+    start = time.perf_counter()
+    ans = func()
+    seconds = time.perf_counter() - start
+    results.append({'name': name, 'rows': rows, 'seconds': seconds,
+                    'rows_per_second': rows/seconds if seconds else None,
+                    'params': params})
+    print("{:<25} {:>10} rows {:>10.3f} s  {}".format(name, rows, seconds,
+                                                     params or ''))
+    return ans
+
+
+def bench_parse(results, n, seed):
+    addresses = generators.gen_addresses(n, seed)
+    parser = AddressParser()
+    timed(results, 'parse_street', n,
+          lambda: [parser.parse_street(a) for a in addresses])
+    # Distinct addresses, and every address 10 times as in transaction data
+    rng = np.random.default_rng(seed)
+    repeated = np.asarray(addresses[:max(n//10, 1)], dtype=object)
+    for distinct, series in ((True, pd.Series(addresses)),
+                             (False, pd.Series(rng.choice(repeated, n)))):
+        start = len(results)
+        timed(results, 'parse_street_series', n,
+              lambda: list(am.parse_street_series(series)),
+              distinct=distinct)
+        timed(results, 'parse_street_series', n,
+              lambda: am.parse_street_series(series, vectorized=True,
+                                             dedupe=False),
+              vectorized=True, dedupe=False, distinct=distinct)
+        timed(results, 'parse_street_series', n,
+              lambda: am.parse_street_series(series, vectorized=True),
+              vectorized=True, dedupe=True, distinct=distinct)
+        row_wise, plain, dedupe = [r['seconds'] for r in results[start:]]
+        print("{:<25} vectorized is {:.1f}x row-wise, {:.1f}x with dedupe,"
+              " the target is 10x".format('speedup', row_wise/plain,
+                                          row_wise/dedupe))
+
+
+def bench_match(results, reference_sizes, n_queries, seed):
+    parser = AddressParser()
+    for size in reference_sizes:
+        reference = generators.gen_reference(size, seed)
+        queries = [parser.parse_street(a)[1:4:2] for a in
+                   generators.gen_addresses(n_queries, seed+1, reference,
+                                            typo_rate=0.5)]
+        matcher = timed(results, 'StandardAddressMatcher', size,
+                        lambda: StandardAddressMatcher(*reference),
+                        reference_size=size)
+        timed(results, 'close_match', n_queries,
+              lambda: [matcher.match(name, suffix)
+                       for name, suffix in queries],
+              reference_size=size, indexed=True)
+        # The exhaustive scan is quadratic, only time a few queries
+        n_scan = max(1, min(n_queries, 200000 // size))
+        timed(results, 'close_match', n_scan,
+              lambda: [parser.close_match(name, suffix, *reference)
+                       for name, suffix in queries[:n_scan]],
+              reference_size=size, indexed=False)
+
+
+def bench_pin(results, n, seed):
+    df = generators.gen_transactions(n, seed)
+    df = am.gen_raw_index(df)
+    df = am.gen_PIN_len(df)
+    timed(results, 'explode_PIN', n, lambda: am.explode_PIN(df))
+    df = timed(results, 'gen_mult_PIN_list', n,
+               lambda: am.gen_mult_PIN_list(df))
+    timed(results, 'split_PIN_list', n, lambda: am.split_PIN_list(df))
+
+
+def bench_reference(results, n, seed):
+    parcels = generators.gen_parcels(n, seed)
+    cols = ['Street Name', 'Street Suffix']
+    # Baselines: the groupby implementations the helpers replaced
+    baselines = {
+        'get_combinations_as_df':
+            lambda df: df[cols].groupby(cols).size().reset_index(),
+        'get_combinations_as_set':
+            lambda df: set(df[cols].groupby(cols).size().index),
+        'get_combinations_as_dict':
+            lambda df: df[cols].groupby(cols[0])[cols[1:]]\
+                               .agg(lambda x: set(x))[cols[1]].to_dict()}
+    for categorical in (False, True):
+        df = parcels
+        if categorical:
+            df = parcels.astype({col: 'category' for col in cols})
+        for name, baseline in baselines.items():
+            # groupby cannot aggregate categoricals into sets
+            if not (categorical and name == 'get_combinations_as_dict'):
+                timed(results, name, n, lambda: baseline(df),
+                      method='groupby', categorical=categorical)
+            timed(results, name, n, lambda: getattr(am, name)(df, cols),
+                  method='codes', categorical=categorical)
+
+
+def compare(old_file, new_file):
+    """ Print the speedup of every step measured in both files """
+    with open(old_file) as f:
+        old = json.load(f)
+    with open(new_file) as f:
+        new = json.load(f)
+
+    def key(record):
+        return (record['name'], record['rows'],
+                json.dumps(record['params'], sort_keys=True))
+
+    old_seconds = {key(r): r['seconds'] for r in old['results']}
+    for record in new['results']:
+        if key(record) in old_seconds:
+            print("{:<25} {:>10} rows {:>8.2f}x  {}".format(
+                record['name'], record['rows'],
+                old_seconds[key(record)]/record['seconds'],
+                record['params'] or ''))
+
+
+def main(argv=None):
+    args = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    args.add_argument('--sizes', type=int, nargs='+', default=[10000],
+                      help="rows of parsing, PIN and reference "
+                           "benchmarks")
+    args.add_argument('--reference-sizes', type=int, nargs='+',
+                      default=[100, 1000, 10000],
+                      help="standard addresses of matching benchmarks")
+    args.add_argument('--match-queries', type=int, default=1000)
+    args.add_argument('--seed', type=int, default=0)
+    args.add_argument('--output', default=None,
+                      help="default is benchmarks/results/<time>.json")
+    args.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'))
+    args = args.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    started = datetime.datetime.now(datetime.timezone.utc)
+    results = []
+    for n in args.sizes:
+        bench_parse(results, n, args.seed)
+        bench_pin(results, n, args.seed)
+        bench_reference(results, n, args.seed)
+    bench_match(results, args.reference_sizes, args.match_queries,
+                args.seed)
+
+    output = args.output
+    if output is None:
+        os.makedirs(os.path.join(bench_folder, "results"), exist_ok=True)
+        output = os.path.join(bench_folder, "results", "{}.json".format(
+                                started.strftime("%Y%m%dT%H%M%SZ")))
+    with open(output, 'w') as f:
+        json.dump({'meta': {'started': started.isoformat(),
+                            'git_commit': git_commit(),
+                            'python': platform.python_version(),
+                            'platform': platform.platform(),
+                            'cpu_count': os.cpu_count(),
+                            'numpy': np.__version__,
+                            'pandas': pd.__version__,
+                            'seed': args.seed},
+                   'results': results}, f, indent=2)
+    print("Results written to {}".format(output))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+
+### Import libraries
+
+# Standard addresses shared by the tests
+STREETS = [("Barclay", "Drive"), ("Newburg", "Road"), ("Newburg", "Court"),
+           ("Glen Haven", "Circle"), ("Le Bost", "Drive")]
+
+
+def reference(*streets):
+    """ Reference data of STREETS and more streets
+    Args:
+        streets (tuple): (name, suffix) of every street to add.
+
+    Returns:
+        tuple of standard_address_set, standard_name_set, name_to_suffix_dict
+    """
+    standard_address_set = set(STREETS) | set(streets)
+    name_to_suffix_dict = {}
+    for name, suffix in standard_address_set:
+        name_to_suffix_dict.setdefault(name, set()).add(suffix)
+    return (standard_address_set, set(name_to_suffix_dict),
+            name_to_suffix_dict)
+
+
+REFERENCE = reference()
+STANDARD_ADDRESS_SET, STANDARD_NAME_SET, NAME_TO_SUFFIX_DICT = REFERENCE
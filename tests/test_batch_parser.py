@@ -0,0 +1,114 @@
+from address_parser.address_parser_class import AddressParser, PARSED_COLUMNS
+from address_parser.batch_parser import ParsedColumns, parse_street_batch
+import address_parser.address_methods as am
+import address_parser.resource_manager as resource_manager
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+import random
+import unittest
+
+
+WORDS = ["Main", "Michigan", "Ave", "avenue", "ST", "Street", "Dr.", "N",
+         "E", "w", "South", "north", "Mile", "12", "5", "20", "#", "-",
+         "Unit", "Road", "rd", "Glen", "Haven", "Court", "1000", "of",
+         "East-Stone", "Trail.#9", "\t", "ſouth", "½", "éast", "x\x1fy"]
+
+
+def make_addresses(seed, n):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.randint(0, 7)))
+            for _ in range(n)]
+
+
+class TestBatchParser(unittest.TestCase):
+
+    @parameterized.expand([
+    ["Regular",
+        "1000 Michigan Avenue",
+        ("1000", "Michigan", "", 'Avenue', "") ],
+    ["Multiple suffix",
+        "1000 Michigan Avenue Road",
+        ("1000", "Michigan Avenue", "","Road", "") ],
+    ["Empty string 0",
+        "",
+        ("","","","","")],
+    ["Empty string 1",
+        " ",
+        ("","","","","")],
+    ["Extra numerical values and dots",
+        "56 Test Dr. unit 571",
+        ("56", "Test", "", "Dr", "unit 571")],
+    ["With prefix",
+        "32 East-Stone Trail.#9",
+        ("32", "Stone", "E", "Trail", '9')],
+    ["No street number",
+        "Best of America 1000 Dr cat 506",
+        ("", "Best of America", "", "Dr", "1000 cat 506") ],
+    ["Mile road",
+        "46011 12 Mile Road",
+        ("46011", "Twelve Mile", "", "Road", "") ],
+    ["Not ASCII",
+        "12 Éast Rue Dr",
+        ("12", "Éast Rue", "", "Dr", "") ],
+    ])
+    def test_split(self, name_of_test, input, output):
+        ans = parse_street_batch([input, "1 Main St", input])
+        self.assertEqual(tuple(c[0] for c in ans), output)
+        self.assertEqual(tuple(c[2] for c in ans), output)
+
+    @parameterized.expand([
+        ["One chunk", 0, 100000],
+        ["Small chunks", 1, 7],
+    ])
+    def test_same_as_parse_street(self, name_of_test, seed, chunk_size):
+        parser = AddressParser()
+        addresses = []
+        for address in make_addresses(seed, 3000):
+            try:
+                parser.parse_street(address)
+                addresses.append(address)
+            except KeyError:
+                # "25 Mile" is not in mile_road_dict
+                pass
+        ans = parse_street_batch(addresses, parser, chunk_size=chunk_size)
+        self.assertEqual(list(zip(*ans)),
+                         [parser.parse_street(x) for x in addresses])
+
+    def test_parsed_columns(self):
+        addresses = ["21839 Barclay Drive", "100 W. Main St", "", "11 Street"]
+        ans = parse_street_batch(addresses)
+        self.assertEqual(ans.n_rows, 4)
+        self.assertEqual(ans.row(1), AddressParser().parse("100 W. Main St"))
+        df = ans.to_frame(pd.Index([5, 6, 7, 8]))
+        self.assertEqual(list(df.columns), PARSED_COLUMNS)
+        self.assertEqual(list(df.index), [5, 6, 7, 8])
+        for col, column in zip(PARSED_COLUMNS, ans):
+            self.assertEqual(list(df[col]), list(column))
+            self.assertTrue(np.shares_memory(df[col].to_numpy(), column))
+        df = ans.to_frame(categorical=['Street Suffix'])
+        self.assertEqual(df['Street Suffix'].dtype, 'category')
+        self.assertEqual(list(df['Street Suffix']), ["Drive", "St", "", ""])
+        both = ParsedColumns.concat([ans, ans])
+        self.assertEqual(both.n_rows, 8)
+        self.assertEqual(both.row(5), ans.row(1))
+        self.assertEqual(ParsedColumns.concat([]).n_rows, 0)
+
+    def test_raises_like_parse_street(self):
+        with self.assertRaises(KeyError):
+            parse_street_batch(["1 Main St", "100 25 Mile Rd"])
+        with self.assertRaises(AttributeError):
+            parse_street_batch(["1 Main St", 5])
+
+    def test_parse_street_series(self):
+        df = resource_manager.load_sample()
+        series = pd.concat([df['Address_x'], pd.Series([np.nan])],
+                           ignore_index=True)
+        expected = am.parse_street_series(series, pd.DataFrame())
+        ans = am.parse_street_series(series, pd.DataFrame(), vectorized=True)
+        for col in expected.columns:
+            self.assertEqual(list(ans[col]), list(expected[col]))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+from address_parser.batch_ratio import BatchRatio, levenshtein_backend
+from address_parser.candidate_index import CandidateIndex
+from fuzzywuzzy import fuzz
+from parameterized import parameterized
+import random
+import unittest
+
+
+def indel_ratio(x, y):
+    """ Reference ratio, computed with the textbook LCS table """
+    if x == y:
+        return 100
+    if not x or not y:
+        return 0
+    previous = [0] * (len(y)+1)
+    for a in x:
+        current = [0]
+        for j, b in enumerate(y):
+            current.append(previous[j]+1 if a == b
+                           else max(previous[j+1], current[j]))
+        previous = current
+    total = len(x) + len(y)
+    return int(round(100 * (1 - (total - 2*previous[-1]) / total)))
+
+
+def make_keys(seed, n):
+    rng = random.Random(seed)
+    alphabet = 'abcdeABCDE é'
+    keys = []
+    for _ in range(n):
+        length = rng.choice([0, 1, 3, 8, 15, 30, 63, 64, 65, 90])
+        keys.append(''.join(rng.choice(alphabet) for _ in range(length)))
+    return keys
+
+
+class TestBatchRatio(unittest.TestCase):
+
+    @parameterized.expand([
+        [1, "Main"],
+        [2, ""],
+        [3, "abcde abcde"],
+        [4, "zzz"],
+        [5, "é" * 70],
+        [6, "aBcDe" * 13],
+    ])
+    def test_scores(self, seed, query):
+        keys = make_keys(seed, 200)
+        batch = BatchRatio(keys, scorer=indel_ratio)
+        self.assertEqual(batch.scores(query).tolist(),
+                         [indel_ratio(query, key) for key in keys])
+
+
+    def test_rows(self):
+        keys = make_keys(7, 100)
+        batch = BatchRatio(keys, scorer=indel_ratio)
+        rows = [5, 3, 99, 3]
+        self.assertEqual(batch.scores("abc", rows).tolist(),
+                         [indel_ratio("abc", keys[i]) for i in rows])
+
+
+    def test_candidate_index(self):
+        keys = list(dict.fromkeys(make_keys(8, 300)))
+        batched = CandidateIndex(keys, scorer=indel_ratio,
+                                 batch=BatchRatio(keys, scorer=indel_ratio))
+        plain = CandidateIndex(keys, scorer=indel_ratio, batch=False)
+        for query in make_keys(9, 30):
+            for k, cutoff in ((1, 0), (5, 0), (3, 60)):
+                self.assertEqual(batched.top_k(query, k, cutoff),
+                                 plain.top_k(query, k, cutoff))
+
+
+    @unittest.skipUnless(levenshtein_backend(),
+                         "fuzz.ratio is the indel ratio with "
+                         "python-Levenshtein only")
+    def test_fuzz_ratio(self):
+        keys = make_keys(10, 300)
+        batch = BatchRatio(keys)
+        for query in make_keys(11, 20):
+            self.assertEqual(batch.scores(query).tolist(),
+                             [fuzz.ratio(query, key) for key in keys])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+from address_parser.matcher import BlockedAddressMatcher
+import address_parser.address_methods as am
+import address_parser.instrumentation as instrumentation
+import pandas as pd
+from parameterized import parameterized
+import unittest
+
+
+REFERENCE = pd.DataFrame(
+    [("Main", "Street", 120, "Novi"), ("Maine", "Street", 4100, "Novi"),
+     ("Main", "Street", 121, "Wixom"), ("Barclay", "Drive", 21839, "Novi"),
+     ("Newburg", "Road", 45, "Novi"), ("Newburg", "Court", 46, "Novi"),
+     ("Oak", "Lane", None, "Troy")],
+    columns=['Street Name', 'Street Suffix', 'Street Number', 'City'])
+
+
+class TestBlockedAddressMatcher(unittest.TestCase):
+
+    def test_blocks(self):
+        matcher = BlockedAddressMatcher(REFERENCE, parity=True)
+        self.assertEqual(matcher.streets[("NOVI", 0, 0)],
+                         {("Main", "Street"), ("Newburg", "Court")})
+        self.assertEqual(matcher.streets[("NOVI", 0, 1)],
+                         {("Newburg", "Road")})
+        self.assertEqual(matcher.streets[("TROY",)], {("Oak", "Lane")})
+        self.assertEqual(len(matcher.streets[()]), 6)
+        self.assertEqual(matcher.block_keys("130", " novi "),
+                         [("NOVI", 0, 0), ("NOVI",), ()])
+        self.assertEqual(matcher.block_keys(None, "Detroit"), [()])
+        self.assertEqual(matcher.block_keys("12A", "Troy"), [("TROY",), ()])
+
+    @parameterized.expand([
+        ["Number range", "Mane", "St", "4150", "Novi", ("Maine", "Street")],
+        ["Other range", "Mane", "St", "150", "Novi", ("Main", "Street")],
+        ["Parity", "Newburg", "", "47", "Novi", ("Newburg", "Road")],
+        ["No number", "Oak", "", "", "Troy", ("Oak", "Lane")],
+        ["Unknown city", "Barclay", "Dr", "1", "Detroit",
+         ("Barclay", "Drive")],
+    ])
+    def test_match(self, name_of_test, name, suffix, number, city, expected):
+        matcher = BlockedAddressMatcher(REFERENCE, parity=True)
+        self.assertEqual(matcher.match(name, suffix, number, city)[:2],
+                         expected)
+
+    def test_min_ratio_falls_back(self):
+        matcher = BlockedAddressMatcher(REFERENCE)
+        self.assertEqual(matcher.match("Barclay", "Drive", "120", "Novi"),
+                         ("Barclay", "Drive", 100))
+        # A misspelled street of the block is kept unless the threshold
+        # is high enough to reach a better street elsewhere in the city
+        self.assertEqual(matcher.match("Mane", "St", "150", "Novi"),
+                         ("Main", "Street", 75))
+        matcher = BlockedAddressMatcher(REFERENCE, min_ratio=90)
+        self.assertEqual(matcher.match("Mane", "St", "150", "Novi"),
+                         ("Maine", "Street", 89))
+        # A wider result is only kept when it is better
+        self.assertEqual(matcher.match_in_blocks("Newburg", "Road",
+                                                 [("NOVI", 0, -1), ()]),
+                         ("Newburg", "Road", 100))
+        self.assertEqual(matcher.match_in_blocks("Oak", "Ln",
+                                                 [("TROY",), ("NOVI",)]),
+                         matcher.match("Oak", "Ln", "", "Troy"))
+        matcher = BlockedAddressMatcher(REFERENCE, min_ratio=0)
+        self.assertLess(matcher.match("Barclay", "Drive", "120", "Novi")[2],
+                        90)
+
+    def test_neighbouring_block(self):
+        reference = pd.DataFrame(
+            [("Barclay", "Drive", 21839, "Novi"),
+             ("Newburg", "Road", 22050, "Novi")],
+            columns=['Street Name', 'Street Suffix', 'Street Number', 'City'])
+        matcher = BlockedAddressMatcher(reference)
+        self.assertEqual(matcher.match("Barclay", "Drive", "22100", "Novi"),
+                         ("Barclay", "Drive", 100))
+
+    def test_close_match_blocked_df(self):
+        df = pd.DataFrame([("Mane", "St", "4150", "Novi"),
+                           ("Oak", "", "", "Troy")],
+                          columns=['Name', 'Suffix', 'Number', 'City'])
+        names, suffixes, ratios = am.close_match_blocked_df(
+            df, 'Name', 'Suffix', 'Number', 'City', REFERENCE)
+        self.assertEqual(names.tolist(), ["Maine", "Oak"])
+        self.assertEqual(suffixes.tolist(), ["Street", "Lane"])
+        self.assertEqual(ratios.dtype, 'int64')
+
+    def test_close_match_blocked_df_duplicates(self):
+        df = pd.DataFrame([("Mane", "St", "150", "Novi"),
+                           ("MANE ", "st", "170", " novi"),
+                           ("Mane", "St", "4150", "Novi"),
+                           ("Mane", "St", None, "Novi"),
+                           ("Barclay", "Dr", "1", "Detroit"),
+                           ("barclay", "Dr", "2", "Troy"),
+                           ("", "", "12A", None)],
+                          columns=['Name', 'Suffix', 'Number', 'City'])
+        matcher = BlockedAddressMatcher(REFERENCE)
+        expected = [matcher.match(*row) for row in df.itertuples(
+                        index=False)]
+        with instrumentation.Instrumentation() as inst:
+            ans = am.close_match_blocked_df(df, 'Name', 'Suffix', 'Number',
+                                            'City', REFERENCE)
+        self.assertEqual(list(zip(*ans)), expected)
+        self.assertEqual(inst.counters['close_match_blocked_df.unique_pairs'],
+                         6)
+
+
+if __name__ == '__main__':
+    unittest.main()
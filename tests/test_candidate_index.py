@@ -0,0 +1,110 @@
+from address_parser.address_parser_class import AddressParser
+from address_parser.candidate_index import CandidateIndex, ratio_bound
+from fuzzywuzzy import fuzz
+from parameterized import parameterized
+import random
+import unittest
+
+
+NAMES = ["Barclay", "Le Bost", "Newburry", "Bayview", "Crosswinds",
+         "Glen Haven", "Veranda", "Chase", "Nine Mile", "Dunhill",
+         "Garfield", "Moorgate", "Addington", "Devonshire", "Willingham",
+         "Westmont", "Montebello", "Bennington", "Aspen", "Cardinal",
+         "Ten Mile", "Taft", "Beck", "Meadowbrook", "Haggerty", "Wixom"]
+SUFFIXES = ["Drive", "Court", "Road", "Street", "Lane", "Circle", "Way"]
+
+
+def make_reference(seed, n):
+    rng = random.Random(seed)
+    standard_address_set = set()
+    while len(standard_address_set) < n:
+        standard_address_set.add((rng.choice(NAMES), rng.choice(SUFFIXES)))
+    standard_name_set = set(name for name, _ in standard_address_set)
+    name_to_suffix_dict = {}
+    for name, suffix in standard_address_set:
+        name_to_suffix_dict.setdefault(name, set()).add(suffix)
+    return standard_address_set, standard_name_set, name_to_suffix_dict
+
+
+def make_typo(rng, x):
+    x = list(x)
+    for _ in range(rng.randint(0, 3)):
+        i = rng.randrange(len(x))
+        op = rng.choice(['drop', 'swap', 'add'])
+        if op == 'drop' and len(x) > 1:
+            del x[i]
+        elif op == 'swap':
+            x[i] = rng.choice('abcdefghijklmnopqrstuvwxyz ')
+        else:
+            x.insert(i, rng.choice('abcdefghijklmnopqrstuvwxyz'))
+    return ''.join(x)
+
+
+class TestCandidateIndex(unittest.TestCase):
+
+    def test_ratio_bound(self):
+        rng = random.Random(0)
+        for _ in range(500):
+            a = make_typo(rng, rng.choice(NAMES)).lower()
+            b = make_typo(rng, rng.choice(NAMES)).lower()
+            common = sum(min(a.count(c), b.count(c)) for c in set(a))
+            assert (fuzz.ratio(a, b) <= ratio_bound(common, len(a)+len(b)))
+
+    def test_best_match_ties_in_scan_order(self):
+        index = CandidateIndex(["abd", "abc", "abe", "abc"])
+        self.assertEqual(index.best_match("abc"), (1, 100))
+        self.assertEqual(index.best_match("abx"), (0, 67))
+        self.assertEqual(index.best_match("abx", score_cutoff=67), (-1, 67))
+
+    def test_best_match_empty(self):
+        self.assertEqual(CandidateIndex([]).best_match("abc"), (-1, 0))
+        self.assertEqual(CandidateIndex(["xyz"]).best_match("abc"), (-1, 0))
+
+    @parameterized.expand([
+        ["Top 1", 1, 0],
+        ["Top 5", 5, 0],
+        ["Top 5 with cutoff", 5, 60],
+        ["More than keys", 100, 0],
+    ])
+    def test_top_k_same_as_sort(self, name_of_test, k, score_cutoff):
+        rng = random.Random(k)
+        keys = [make_typo(rng, rng.choice(NAMES)).lower() for _ in range(80)]
+        index = CandidateIndex(keys)
+        for _ in range(50):
+            query = make_typo(rng, rng.choice(NAMES)).lower()
+            scores = [(-fuzz.ratio(query, key), pos)
+                      for pos, key in enumerate(keys)]
+            expected = [(pos, -score) for score, pos in sorted(scores)
+                        if -score >= score_cutoff][:k]
+            self.assertEqual(index.top_k(query, k, score_cutoff), expected)
+
+    def test_top_k_stops_at_perfect_scores(self):
+        calls = []
+        def scorer(query, key):
+            calls.append(key)
+            return fuzz.ratio(query, key)
+        index = CandidateIndex(["abc", "abd", "abc", "xbc"], scorer=scorer)
+        self.assertEqual(index.top_k("abc", 2), [(0, 100), (2, 100)])
+        self.assertEqual(calls, ["abc", "abc"])
+        self.assertEqual(index.top_k("abc", 0), [])
+
+    @parameterized.expand([
+        ["Small reference", 0, 10],
+        ["Medium reference", 1, 60],
+        ["Large reference", 2, 150],
+    ])
+    def test_close_match_same_as_linear_scan(self, name_of_test, seed, n):
+        reference = make_reference(seed, n)
+        parser = AddressParser()
+        index = parser.build_match_index(reference[0], reference[1])
+        rng = random.Random(seed)
+        for _ in range(60):
+            name = make_typo(rng, rng.choice(NAMES))
+            suffix = rng.choice(SUFFIXES + [""])
+            self.assertEqual(
+                parser.close_match(name, suffix, *reference, index=index),
+                parser.close_match(name, suffix, *reference))
+
+
+if __name__ == '__main__':
+    unittest.main()
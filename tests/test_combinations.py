@@ -0,0 +1,72 @@
+import address_parser.address_methods as am
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+import unittest
+
+
+def make_df(kind):
+    df = pd.DataFrame({'name': ["Main", "Oak", "Main", None, "Oak", "Elm",
+                                "Main", "Elm"],
+                       'suffix': ["St", "Rd", "St", "St", None, "Dr", "Rd",
+                                  "Dr"],
+                       'number': [1, 2, 1, 3, 2, 5, 1, 5]})
+    if kind == 'object':
+        df = df.astype({'name': object, 'suffix': object})
+    elif kind == 'category':
+        df = df.astype({'name': 'category', 'suffix': 'category'})
+    return df
+
+
+class TestCombinations(unittest.TestCase):
+
+    @parameterized.expand([
+        ["str"],
+        ["object"],
+        ["category"],
+    ])
+    def test_same_as_groupby(self, kind):
+        df = make_df(kind)
+        for cols in (['name', 'suffix'], ['suffix', 'number'],
+                     ['name', 'suffix', 'number'], ['number']):
+            pd.testing.assert_frame_equal(
+                am.get_combinations_as_df(df, cols),
+                df[cols].groupby(cols).size().reset_index())
+            self.assertEqual(am.get_combinations_as_set(df, cols),
+                             set(df[cols].groupby(cols).size().index))
+
+    @parameterized.expand([
+        ["str"],
+        ["object"],
+        ["category"],
+    ])
+    def test_dict(self, kind):
+        ans = am.get_combinations_as_dict(make_df(kind), ['name', 'suffix'])
+        self.assertEqual(list(ans), ["Elm", "Main", "Oak"])
+        self.assertEqual(ans["Elm"], {"Dr"})
+        self.assertEqual(ans["Main"], {"St", "Rd"})
+        self.assertEqual(len(ans["Oak"]), 2)
+        self.assertIn("Rd", ans["Oak"])
+
+    def test_combination_codes(self):
+        codes, uniques, counts = am.combination_codes(make_df('str'),
+                                                      ['name', 'suffix'])
+        self.assertEqual([(uniques[0][i], uniques[1][j]) for i, j in codes],
+                         [("Elm", "Dr"), ("Main", "Rd"), ("Main", "St"),
+                          ("Oak", "Rd")])
+        self.assertEqual(counts.tolist(), [2, 1, 2, 1])
+
+    def test_many_columns(self):
+        # The product of the numbers of values does not fit in int64
+        rng = np.random.default_rng(0)
+        df = pd.DataFrame({str(j): rng.integers(0, 10**6, size=50)
+                           for j in range(5)})
+        df = pd.concat([df, df.iloc[:7]], ignore_index=True)
+        cols = list(df.columns)
+        pd.testing.assert_frame_equal(
+            am.get_combinations_as_df(df, cols),
+            df.groupby(cols).size().reset_index())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+from address_parser.address_parser_class import AddressParser
+import address_parser.address_methods as am
+import pandas as pd
+from parameterized import parameterized
+import unittest
+from .reference import reference
+
+
+NAME_TO_SUFFIX_DICT = reference(("Broadway", ""))[2]
+
+DF = pd.DataFrame({
+    'Street Name': ["Barclay", "Barclay", "Newburg", "Newbrg", "Xyz", "",
+                    "Glen Havn", "Broadway", None],
+    'Street Suffix': ["Court", "", "", "", "", "", "", "", ""],
+    'Suggested Name': ["Barclay", "Barclay", "Newburg", "Newburg", "",
+                       "Le Bost", "Glen Haven", "Broadway", "Le Bost"],
+    'Suggested Suffix': ["Drive", "Drive", " Road ", "", "Way", "Drive",
+                         "Circle", " Ave", None]})
+
+
+def fill_by_row(df, *args):
+    ans = []
+    for _, row in df.iterrows():
+        x = am.gen_fill_suffix_row(row, NAME_TO_SUFFIX_DICT, *args)
+        ans.append(x(row) if callable(x) else x)
+    return ans
+
+
+class TestFillSuffix(unittest.TestCase):
+
+    def test_fill_suffix_ambiguous(self):
+        parser = AddressParser()
+        self.assertEqual(parser.fill_suffix("Newburg", NAME_TO_SUFFIX_DICT),
+                         "")
+        self.assertEqual(parser.fill_suffix("Xyz", NAME_TO_SUFFIX_DICT), "")
+        self.assertEqual(parser.fill_suffix("Barclay", NAME_TO_SUFFIX_DICT),
+                         "Drive")
+
+    def test_unique_suffix_dict(self):
+        self.assertEqual(am.unique_suffix_dict(NAME_TO_SUFFIX_DICT),
+                         {"Barclay": "Drive", "Glen Haven": "Circle",
+                          "Le Bost": "Drive"})
+
+    @parameterized.expand([
+        ["street_only", ('Street Name', 'Street Suffix')],
+        ["suggested", ('Street Name', 'Street Suffix', 'Suggested Name',
+                       'Suggested Suffix')],
+    ])
+    def test_same_as_row(self, name_of_test, cols):
+        df = DF.dropna()
+        ans = am.fill_suffix_column(df, NAME_TO_SUFFIX_DICT, *cols)
+        self.assertEqual(list(ans), fill_by_row(df, *cols))
+        self.assertTrue(ans.index.equals(df.index))
+
+    def test_fill_suffix_column(self):
+        ans = am.fill_suffix_column(DF, NAME_TO_SUFFIX_DICT, 'Street Name',
+                                    'Street Suffix', 'Suggested Name',
+                                    'Suggested Suffix')
+        self.assertEqual(list(ans), ["Court", "Drive", "Road", "", "Way",
+                                     "Drive", "Circle", "Ave", "Drive"])
+        # A precomputed unique_suffix_dict gives the same result, also if
+        # it maps a name to ""
+        unique = am.unique_suffix_dict(NAME_TO_SUFFIX_DICT)
+        for d in (unique, dict(unique, Broadway="")):
+            self.assertEqual(list(am.fill_suffix_column(
+                                 DF, NAME_TO_SUFFIX_DICT, 'Street Name',
+                                 'Street Suffix', 'Suggested Name',
+                                 'Suggested Suffix', unique_suffixes=d)),
+                             list(ans))
+        # Suffixes can be any collection
+        for container in (frozenset, list, tuple):
+            d = {name: container(sorted(suffixes))
+                 for name, suffixes in NAME_TO_SUFFIX_DICT.items()}
+            self.assertEqual(list(am.fill_suffix_column(
+                                 DF, d, 'Street Name', 'Street Suffix',
+                                 'Suggested Name', 'Suggested Suffix')),
+                             list(ans))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import address_parser
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HEAVY_MODULES = ['pandas', 'numpy', 'fuzzywuzzy']
+
+
+def run_fresh(code):
+    """ Time code in a new interpreter
+    Returns:
+        (seconds, heavy modules loaded by code)
+    """
+    script = ("import sys, time, json\n"
+              "start = time.perf_counter()\n"
+              "{}\n"
+              "print(json.dumps([time.perf_counter() - start,\n"
+              "    [m for m in {!r} if m in sys.modules]]))".format(
+                  code, HEAVY_MODULES))
+    output = subprocess.check_output([sys.executable, "-W", "ignore", "-c",
+                                      script], cwd=ROOT)
+    return json.loads(output.decode().splitlines()[-1])
+
+
+class TestImport(unittest.TestCase):
+
+    def test_parser_import_is_light(self):
+        seconds, loaded = run_fresh(
+            "from address_parser import AddressParser\n"
+            "AddressParser().parse_street('24160 W Le Bost Dr. Unit 3')")
+        self.assertEqual(loaded, [])
+        # Importing and using the parser is faster than importing pandas
+        pandas_seconds, _ = run_fresh("import pandas")
+        self.assertLess(seconds, pandas_seconds)
+
+    def test_heavy_modules_load_on_first_use(self):
+        _, loaded = run_fresh(
+            "from address_parser import AddressParser\n"
+            "AddressParser().close_match('Main', 'St', {('Main', 'Street')},"
+            " {'Main'}, {'Main': {'Street'}})")
+        self.assertEqual(loaded, ['fuzzywuzzy'])
+        _, loaded = run_fresh("import address_parser\n"
+                              "address_parser.address_methods")
+        self.assertEqual(loaded, HEAVY_MODULES)
+
+    def test_lazy_attributes(self):
+        from address_parser.address_parser_class import AddressParser
+        from address_parser.matcher import StandardAddressMatcher
+        self.assertIs(address_parser.AddressParser, AddressParser)
+        self.assertIs(address_parser.StandardAddressMatcher,
+                      StandardAddressMatcher)
+        self.assertIn('load_reference', dir(address_parser))
+        with self.assertRaises(AttributeError):
+            address_parser.no_such_name
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,114 @@
+import address_parser.address_methods as am
+from address_parser.address_parser_class import AddressParser
+import address_parser.instrumentation as instrumentation
+from address_parser.matcher import StandardAddressMatcher
+import json
+import os
+import pandas as pd
+from parameterized import parameterized
+import tempfile
+import unittest
+from .reference import STANDARD_ADDRESS_SET, STANDARD_NAME_SET, REFERENCE
+
+
+# exact, close full address, name only fallback
+QUERIES = [("Barclay", "Drive"), ("Glen Havn", "Circle"), ("Newbrg", "")]
+
+
+class ListSink:
+
+    def __init__(self):
+        self.snapshots = []
+
+    def write(self, snapshot):
+        self.snapshots.append(snapshot)
+
+
+class TestInstrumentation(unittest.TestCase):
+
+    def tearDown(self):
+        instrumentation.disable()
+
+    def test_off_by_default(self):
+        parser = AddressParser()
+        parser.parse_street("1 Main Street")
+        self.assertIsNone(instrumentation.active())
+
+    def test_close_match_counters(self):
+        parser = AddressParser()
+        for index in (None, parser.build_match_index(STANDARD_ADDRESS_SET,
+                                                     STANDARD_NAME_SET)):
+            with instrumentation.Instrumentation() as inst:
+                for name, suffix in QUERIES:
+                    parser.close_match(name, suffix, *REFERENCE, index=index)
+            snapshot = inst.snapshot()
+            counters = snapshot['counters']
+            self.assertEqual(counters['close_match.calls'], 3)
+            self.assertEqual(counters['close_match.exact_hits'], 1)
+            self.assertEqual(counters['close_match.fallback_scans'], 1)
+            self.assertGreater(counters['fuzzy_comparisons'], 0)
+            self.assertAlmostEqual(
+                snapshot['rates']['close_match.exact_hit_rate'], 1/3)
+            self.assertEqual(snapshot['timers']['close_match.exact']
+                             ['calls'], 3)
+            self.assertEqual(snapshot['timers']['close_match.address_scan']
+                             ['calls'], 2)
+            self.assertEqual(snapshot['timers']['close_match.name_scan']
+                             ['calls'], 1)
+        self.assertIsNone(instrumentation.active())
+        # Linear scan compares with every standard address and name
+        parser2 = AddressParser()
+        with instrumentation.Instrumentation() as inst:
+            parser2.close_match("Newbrg", "", *REFERENCE)
+        self.assertEqual(inst.counters['fuzzy_comparisons'],
+                         len(STANDARD_ADDRESS_SET) + len(STANDARD_NAME_SET))
+
+    def test_helpers_and_sinks(self):
+        sink = ListSink()
+        df = pd.DataFrame({'Address_x': ["24160 Barclay Dr", "5 Newburg"]})
+        with tempfile.TemporaryDirectory() as folder:
+            json_file = os.path.join(folder, "stats.jsonl")
+            prom_file = os.path.join(folder, "stats.prom")
+            inst = instrumentation.enable(sinks=[
+                sink, instrumentation.JsonSink(json_file),
+                instrumentation.PrometheusSink(prom_file)])
+            am.parse_street_series(df['Address_x'], target_df=df)
+            StandardAddressMatcher(*REFERENCE).match("Barclay", "Drive")
+            inst.flush()
+            instrumentation.disable()
+
+            self.assertEqual(len(sink.snapshots), 1)
+            snapshot = sink.snapshots[0]
+            self.assertEqual(snapshot['counters']['parse_street_series.rows'],
+                             2)
+            self.assertEqual(snapshot['timers']['parse_street.tokenize']
+                             ['calls'], 2)
+            with open(json_file) as f:
+                line = json.loads(f.readline())
+            self.assertEqual(line['counters'], snapshot['counters'])
+            with open(prom_file) as f:
+                text = f.read()
+            self.assertIn('address_parser_close_match_calls_total 1\n', text)
+            self.assertIn('address_parser_stage_calls_total'
+                          '{stage="parse_street_series"} 1\n', text)
+
+        # Nothing is recorded once it is turned off
+        am.parse_street_series(df['Address_x'])
+        self.assertEqual(inst.counters['parse_street_series.rows'], 2)
+
+    @parameterized.expand([
+        ["Python", False],
+        ["Vectorized", True],
+    ])
+    def test_dedupe_counts_one_call(self, name_of_test, vectorized):
+        series = pd.Series(["24160 Barclay Dr", "5 Newburg"] * 500)
+        with instrumentation.Instrumentation() as inst:
+            am.parse_street_series(series, vectorized=vectorized,
+                                   dedupe=True)
+        self.assertEqual(inst.snapshot()['timers']['parse_street_series']
+                         ['calls'], 1)
+        self.assertEqual(inst.counters['parse_street_series.rows'], 1000)
+
+
+if __name__ == '__main__':
+    unittest.main()
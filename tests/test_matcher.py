@@ -0,0 +1,91 @@
+from address_parser.address_parser_class import AddressParser
+from address_parser.matcher import StandardAddressMatcher
+import address_parser.address_methods as am
+import pandas as pd
+from parameterized import parameterized
+import unittest
+from .reference import reference
+
+
+REFERENCE = reference(("Nine Mile", "Road"))
+
+QUERIES = [("Barclay", "Drive"), ("barclay drive", ""), ("Newburry", ""),
+           ("Lebost", ""), ("Glen Havn", "Cir"), ("", ""), ("Nine", "Mile"),
+           ("Xyz", "Way")]
+
+
+class TestStandardAddressMatcher(unittest.TestCase):
+
+    def test_match(self):
+        matcher = StandardAddressMatcher(*REFERENCE)
+        parser = AddressParser()
+        for name, suffix in QUERIES:
+            self.assertEqual(matcher.match(name, suffix),
+                             parser.close_match(name, suffix, *REFERENCE))
+
+    def test_match_many(self):
+        matcher = StandardAddressMatcher(*REFERENCE)
+        names, suffixes = zip(*QUERIES)
+        self.assertEqual(matcher.match_many(names, suffixes),
+                         [matcher.match(n, s) for n, s in QUERIES])
+
+    def test_close_match_topk(self):
+        matcher = StandardAddressMatcher(*REFERENCE)
+        self.assertEqual(matcher.close_match_topk("barclay", "drive"),
+                         [("Barclay", "Drive", 100)])
+        self.assertEqual(matcher.close_match_topk("Newburry", "Rd", k=2),
+                         [("Newburg", "", 80), ("Newburg", "Road", 78)])
+        self.assertEqual(matcher.close_match_topk("Glen Havn", "Cir", k=2),
+                         [("Glen Haven", "Circle", 95),
+                          ("Le Bost", "Drive", 38)])
+        self.assertEqual(matcher.close_match_topk("Glen Havn", "Cir",
+                                                  score_cutoff=40),
+                         [("Glen Haven", "Circle", 95)])
+        for name, suffix in QUERIES:
+            ans = matcher.close_match_topk(name, suffix, k=3, score_cutoff=40)
+            self.assertLessEqual(len(ans), 3)
+            self.assertTrue(all(r >= 40 for _, _, r in ans))
+            self.assertEqual([r for _, _, r in ans],
+                             sorted([r for _, _, r in ans], reverse=True))
+            if ans:
+                self.assertEqual(ans[0][2], matcher.match(name, suffix)[2])
+
+    @parameterized.expand([
+        ["case", "BARCLAY", "DRIVE", ("Barclay", "Drive", 100)],
+        ["spaces", "Le  Bost", "Drive", ("Le Bost", "Drive", 100)],
+        ["joined", "Lebost", "Dr", ("Le Bost", "Drive", 100)],
+        ["abbreviation", "Glen Haven", "Cir", ("Glen Haven", "Circle", 100)],
+        ["suffix_in_name", "Glenhaven Cir", "", ("Glen Haven", "Circle", 100)],
+        ["name_only", "NineMile", "", ("Nine Mile", "Road", 100)],
+        ["name_with_suffixes", "newburg", "", ("Newburg", "", 100)],
+        ["unknown_suffix", "Barclay", "Way", None],
+        ["typo", "Barcley", "Drive", None],
+    ])
+    def test_normalized_exact(self, name_of_test, name, suffix, expected):
+        matcher = StandardAddressMatcher(*REFERENCE, normalized_exact=True)
+        if expected is None:
+            # Falls through to the fuzzy match
+            expected = StandardAddressMatcher(*REFERENCE).match(name, suffix)
+        self.assertEqual(matcher.match(name, suffix), expected)
+
+    def test_normalized_exact_ambiguous(self):
+        reference = ({("Le Bost", "Drive"), ("Lebost", "Drive")},
+                     {"Le Bost", "Lebost"},
+                     {"Le Bost": {"Drive"}, "Lebost": {"Drive"}})
+        matcher = StandardAddressMatcher(*reference, normalized_exact=True)
+        self.assertIsNone(matcher.exact_index.lookup("LEBOST", "Dr"))
+        self.assertEqual(matcher.match("Lebost", "Drive"),
+                         ("Lebost", "Drive", 100))
+
+    def test_gen_close_match_row(self):
+        df = pd.DataFrame(QUERIES, columns=['Street Name', 'Street Suffix'])
+        ans = df.apply(am.gen_close_match_row('Street Name', 'Street Suffix',
+                                              *REFERENCE), axis=1)
+        parser = AddressParser()
+        self.assertEqual(list(ans),
+                         [parser.close_match(n, s, *REFERENCE)
+                          for n, s in QUERIES])
+
+
+if __name__ == '__main__':
+    unittest.main()
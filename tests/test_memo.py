@@ -0,0 +1,61 @@
+from address_parser.address_parser_class import AddressParser
+from address_parser.matcher import StandardAddressMatcher
+import address_parser.address_methods as am
+import address_parser.resource_manager as resource_manager
+import pandas as pd
+from parameterized import parameterized
+import unittest
+
+
+REFERENCE = ({("Barclay", "Drive"), ("Newburg", "Road"),
+              ("Newburg", "Court"), ("Le Bost", "Drive")},
+             {"Barclay", "Newburg", "Le Bost"},
+             {"Barclay": {"Drive"}, "Newburg": {"Road", "Court"},
+              "Le Bost": {"Drive"}})
+
+
+class TestMemo(unittest.TestCase):
+
+    def test_parse_street_cache(self):
+        parser = AddressParser(cache_size=2)
+        plain = AddressParser()
+        self.assertIsNone(plain.cache_info())
+        addresses = ["1 Main St", "1  Main St.", "2 Oak Dr", "1 Main St",
+                     "3 Elm Rd", "2 Oak Dr", ""]
+        for address in addresses:
+            self.assertEqual(parser.parse_street(address),
+                             plain.parse_street(address))
+        info = parser.cache_info()
+        self.assertEqual((info.hits, info.misses, info.currsize), (2, 4, 2))
+        parser.cache_clear()
+        self.assertEqual(parser.cache_info().currsize, 0)
+
+    def test_match_cache(self):
+        matcher = StandardAddressMatcher(*REFERENCE, cache_size=10)
+        plain = StandardAddressMatcher(*REFERENCE)
+        queries = [("Newburry", ""), (" newburry ", ""), ("Lebost", "Dr"),
+                   ("Newburry", "")]
+        for name, suffix in queries:
+            self.assertEqual(matcher.match(name, suffix),
+                             plain.match(name, suffix))
+        info = matcher.cache_info()
+        self.assertEqual((info.hits, info.misses), (2, 2))
+
+    @parameterized.expand([
+        ["Python", False],
+        ["Vectorized", True],
+    ])
+    def test_parse_street_series_dedupe(self, name_of_test, vectorized):
+        series = resource_manager.load_sample()['Address_x']
+        series = pd.concat([series, series.iloc[::-2], pd.Series([None])],
+                           ignore_index=True)
+        expected = list(zip(*am.parse_street_series(series)))
+        ans = am.parse_street_series(series, vectorized=vectorized,
+                                     dedupe=True)
+        self.assertEqual(list(zip(*ans)), expected)
+        self.assertEqual(am.parse_street_series(series.iloc[:0],
+                                                dedupe=True)[0].size, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import address_parser.address_methods as am
+import numpy as np
+import pandas as pd
+import unittest
+
+
+PARCELS = pd.DataFrame({
+    'PIN': ["2215200012", "2215200013", "2215200014", "2215200015",
+            "2215200016", "2215200017"],
+    'Address': ["21839 Barclay Drive", "24160 Le Bost Dr", "100 W Main St",
+                "45 Newburg Road", "45 Newburg Court", "7 Glen Haven Cir"],
+    'Owner': ["A", "B", "C", "D", "E", "F"]})
+
+
+class TestMergeParcels(unittest.TestCase):
+
+    def test_hash_join(self):
+        li, ri = am.hash_join(pd.Series(["a", "b", None, "a"]),
+                              pd.Series(["a", None, "c", "a"]))
+        self.assertEqual(list(zip(li, ri)), [(0, 0), (0, 3), (3, 0), (3, 3)])
+        li, ri = am.hash_join(pd.Series([], dtype=object),
+                              pd.Series(["a"]))
+        self.assertEqual((len(li), len(ri)), (0, 0))
+
+    def test_merge_parcels(self):
+        transactions = pd.DataFrame({
+            'PIN': ["502215200012", "2215200013,014", "TBDNEWCONSTRCT.",
+                    "ATLISTINGOFFICE", "ATLISTINGOFFICE", np.nan, "99"],
+            'Address_x': ["21839 Barclay Drive", "24160 Lebost",
+                          "100 West Main Street", "45 Newburg Rd.",
+                          "7 Glen Havn Circle", "1 Nowhere Ln", ""],
+            'Owner': ["a", "b", "c", "d", "e", "f", "g"]},
+            index=list("abcdefg"))
+        transactions = am.gen_PIN_len(transactions)
+        ans = am.merge_parcels(transactions, PARCELS)
+
+        self.assertEqual(ans['Owner_x'].tolist(),
+                         ["a", "b", "b", "c", "d", "e", "f", "g"])
+        self.assertEqual(ans['Owner_y'].fillna("").tolist(),
+                         ["A", "B", "C", "C", "D", "F", "", ""])
+        self.assertEqual(ans['Match Tier'].tolist(),
+                         ["pin", "pin", "pin", "address", "address",
+                          "fuzzy", "unmatched", "unmatched"])
+        self.assertEqual(ans['Matching Ratio'].tolist()[:5], [100]*5)
+        self.assertGreaterEqual(ans['Matching Ratio'].iloc[5], 90)
+        self.assertEqual(ans['Matching Ratio'].tolist()[6:], [0, 0])
+        self.assertEqual(list(ans.columns),
+                         ['PIN_x', 'Address_x', 'Owner_x', 'PIN_len', 'PIN_y',
+                          'Address', 'Owner_y', 'Match Tier',
+                          'Matching Ratio'])
+
+    def test_merge_parcels_without_fuzzy(self):
+        transactions = pd.DataFrame({'PIN': ["x"],
+                                     'Address_x': ["7 Glen Havn Circle"]})
+        ans = am.merge_parcels(transactions, PARCELS, fuzzy=False)
+        self.assertEqual(ans['Match Tier'].tolist(), ["unmatched"])
+
+    def test_merge_parcels_empty(self):
+        transactions = pd.DataFrame({'PIN': pd.Series([], dtype=object),
+                                     'Address_x': pd.Series([], dtype=object)})
+        ans = am.merge_parcels(transactions, PARCELS)
+        self.assertEqual(len(ans), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
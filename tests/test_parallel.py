@@ -0,0 +1,79 @@
+from address_parser.address_parser_class import AddressParser
+import address_parser.address_methods as am
+import address_parser.instrumentation as instrumentation
+import address_parser.resource_manager as resource_manager
+import pandas as pd
+from parameterized import parameterized
+import unittest
+from .reference import reference
+
+
+REFERENCE = reference(("Westmont", "Court"))
+
+
+class TestParallel(unittest.TestCase):
+
+    def test_split_chunks(self):
+        self.assertEqual(am.split_chunks(10, 2), [(0, 2), (2, 4), (4, 6),
+                                                  (6, 8), (8, 10)])
+        self.assertEqual(am.split_chunks(5, 1, chunk_size=3),
+                         [(0, 3), (3, 5)])
+        self.assertEqual(am.split_chunks(0, 4), [])
+
+    @parameterized.expand([
+        ["Python", False, 2],
+        ["Vectorized", True, 3],
+    ])
+    def test_parse_street_series(self, name_of_test, vectorized, n_jobs):
+        series = resource_manager.load_sample()['Address_x']
+        expected = list(zip(*am.parse_street_series(series)))
+        ans = am.parse_street_series(series, vectorized=vectorized,
+                                     n_jobs=n_jobs, chunk_size=4)
+        self.assertEqual(list(zip(*ans)), expected)
+        self.assertTrue(ans[0].index.equals(series.index))
+
+    def test_close_match_df(self):
+        df = resource_manager.load_sample()
+        df['Street Suffix'] = df['Street Suffix'].fillna("")
+        parser = AddressParser()
+        expected = [parser.close_match(name, suffix, *REFERENCE)
+                    for name, suffix in zip(df['Street Name'],
+                                            df['Street Suffix'])]
+        for n_jobs in (1, 2):
+            ans = am.close_match_df(df, 'Street Name', 'Street Suffix',
+                                    *REFERENCE, n_jobs=n_jobs, chunk_size=5)
+            self.assertEqual(list(zip(*ans)), expected)
+        target = am.close_match_df(df, 'Street Name', 'Street Suffix',
+                                   *REFERENCE, target_df=pd.DataFrame())
+        self.assertEqual(list(target['Matching Ratio']),
+                         [x[2] for x in expected])
+
+    def test_factorize_pairs(self):
+        names = pd.Series(["A", "B", "A", None, "A", None])
+        suffixes = pd.Series(["x", "x", "x", "y", "y", "y"])
+        codes, first = am.factorize_pairs(names, suffixes)
+        self.assertEqual(sorted(first.tolist()), [0, 1, 3, 4])
+        self.assertEqual([first[c] for c in codes], [0, 1, 0, 3, 4, 3])
+
+    def test_close_match_df_duplicates(self):
+        df = pd.DataFrame({'Street Name': ["Newburry", "Barcley", "NEWBURRY",
+                                           "Newburry", "barcley", "newburry "],
+                           'Street Suffix': ["Road", "Drive", "road", "Court",
+                                             " Drive", "Road"]},
+                          index=[10, 11, 12, 13, 14, 15])
+        parser = AddressParser()
+        expected = [parser.close_match(name, suffix, *REFERENCE)
+                    for name, suffix in zip(df['Street Name'],
+                                            df['Street Suffix'])]
+        with instrumentation.Instrumentation() as inst:
+            ans = am.close_match_df(df, 'Street Name', 'Street Suffix',
+                                    *REFERENCE)
+        self.assertEqual(list(zip(*ans)), expected)
+        self.assertTrue(ans[2].index.equals(df.index))
+        self.assertEqual(inst.counters['close_match_df.unique_pairs'], 3)
+        self.assertEqual(inst.snapshot()['rates']
+                         ['close_match_df.unique_rate'], 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+from address_parser.address_parser_class import AddressParser
+from parameterized import parameterized
+import unittest
+
+
+class TestParseStreet(unittest.TestCase):
+
+    @parameterized.expand([
+        ["Empty", "", ("", "", "", "", "")],
+        ["None", None, ("", "", "", "", "")],
+        ["Full", "21839 Barclay Drive", ("21839", "Barclay", "", "Drive", "")],
+        ["Abbreviated suffix", "24160 Le Bost dr.",
+         ("24160", "Le Bost", "", "Dr", "")],
+        ["Prefix", "100 W. Main St", ("100", "Main", "W", "St", "")],
+        ["Two directions", "100 N Main St E", ("100", "Main", "N", "St", "E")],
+        ["Unit", "11 Michigan Ave Unit 12",
+         ("11", "Michigan", "", "Ave", "Unit 12")],
+        ["Suffix as name", "11 Street", ("11", "Street", "", "", "")],
+        ["Mile road", "43000 W 9 Mile Rd", ("43000", "Nine Mile", "W", "Rd", "")],
+        ["Number in name", "5 Main 7 Court", ("5", "Main", "", "Court", "7")],
+        ["Separators", "12-B#3 Oak", ("12", "B Oak", "", "", "3")],
+    ])
+    def test_parse_street(self, name_of_test, address, expected):
+        self.assertEqual(AddressParser().parse_street(address), expected)
+
+    def test_parse(self):
+        parser = AddressParser()
+        ans = parser.parse("43000 W 9 Mile Rd Apt 2")
+        self.assertEqual(ans, parser.parse_street("43000 W 9 Mile Rd Apt 2"))
+        self.assertEqual((ans.street_number, ans.street_name,
+                          ans.street_prefix, ans.street_suffix, ans.other),
+                         ("43000", "Nine Mile", "W", "Rd", "Apt 2"))
+        self.assertEqual(ans.to_dict()['Street Name'], "Nine Mile")
+        self.assertFalse(hasattr(ans, '__dict__'))
+
+    def test_unknown_mile_road(self):
+        with self.assertRaises(KeyError):
+            AddressParser().parse_street("100 25 Mile Rd")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import address_parser.address_methods as am
+import numpy as np
+import pandas as pd
+from parameterized import parameterized
+import unittest
+
+
+PINS = ["502215200012", "2215200012", "5022152000", "2215200012,013",
+        "2215200012/013 & 014", "22-15-200-012", "TBDNEWCONSTRCT.",
+        "ATLISTINGOFFICE", "", "abc½", "0,", "1,12345", "x9y",
+        "٣٤", "50123456789", 502215200012, 5.02e11, np.nan, None]
+
+
+def legacy(df):
+    df = am.gen_PIN_len(df.copy())
+    return am.split_PIN_list(am.gen_mult_PIN_list(df))
+
+
+class TestExplodePIN(unittest.TestCase):
+
+    @parameterized.expand([
+        ["Object PINs", pd.Series(PINS, dtype=object)],
+        ["Integer PINs", pd.Series([502215200012, 2215200012, 12])],
+        ["Float PINs", pd.Series([5.02e11, np.nan, 1.0])],
+        ["String PINs", pd.Series(["2215200012", "1,2", "x"], dtype=str)],
+    ])
+    def test_same_as_legacy(self, name_of_test, pins):
+        df = pd.DataFrame({'Address_x': ["{} Main St".format(i)
+                                         for i in range(len(pins))],
+                           'PIN': pins}, index=np.arange(len(pins))[::-1])
+        df = am.gen_PIN_len(df)
+        before = df.copy()
+        ans = am.explode_PIN(df)
+        pd.testing.assert_frame_equal(df, before)
+        pd.testing.assert_frame_equal(ans.astype(object),
+                                      legacy(df).astype(object))
+
+    def test_empty(self):
+        df = am.gen_PIN_len(pd.DataFrame({'PIN': pd.Series([], dtype=object)}))
+        ans = am.explode_PIN(df)
+        self.assertEqual(list(ans.columns), ['PIN', 'PIN_len', 'temp'])
+        self.assertEqual(len(ans), 0)
+
+    def test_without_PIN_len(self):
+        df = pd.DataFrame({'PIN': ["502215200012", "1,2"]})
+        self.assertEqual(am.explode_PIN(df)['temp'].tolist(),
+                         ["502215200012", "1", "2"])
+
+    def test_drop_prefix(self):
+        values = np.array(["502215200012", "50", "5"])
+        self.assertEqual(am.drop_prefix(values, 2).tolist(),
+                         ["2215200012", "", ""])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import address_parser.address_parser_class as apc
+import address_parser.address_methods as am
+import address_parser.instrumentation as instrumentation
+import address_parser.pipeline as pipeline
+from address_parser.result_store import ResultStore, reference_version
+import os
+import pandas as pd
+from parameterized import parameterized
+import tempfile
+import unittest
+from .reference import reference
+
+
+REFERENCE = reference(("Westmont", "Court"))
+STANDARD_ADDRESS_SET, STANDARD_NAME_SET, NAME_TO_SUFFIX_DICT = REFERENCE
+SAMPLE_PATH = apc.resource_manager.resource_path("", "resources/datasets")
+
+
+class TestPipeline(unittest.TestCase):
+
+    def expected(self):
+        df = apc.resource_manager.load_df("addresses.csv", SAMPLE_PATH,
+                                          dtype=str)
+        am.parse_street_series(df['Address_x'], target_df=df)
+        parser = apc.AddressParser()
+        df['Street Suffix'] = [
+            suffix or parser.fill_suffix(name, NAME_TO_SUFFIX_DICT) or ""
+            for name, suffix in zip(df['Street Name'], df['Street Suffix'])]
+        am.close_match_df(df, 'Street Name', 'Street Suffix', *REFERENCE,
+                          target_df=df)
+        return df
+
+    @parameterized.expand([
+        ["One chunk", 1000, True],
+        ["Small chunks", 7, True],
+        ["Python parser", 5, False],
+    ])
+    def test_run_pipeline_csv(self, name_of_test, chunk_size, vectorized):
+        with tempfile.TemporaryDirectory() as tmp:
+            output_file = os.path.join(tmp, "out.csv")
+            expected_file = os.path.join(tmp, "expected.csv")
+            n_rows = pipeline.run_pipeline("addresses.csv", output_file,
+                                           *REFERENCE, path=SAMPLE_PATH,
+                                           chunk_size=chunk_size,
+                                           vectorized=vectorized, dtype=str)
+            expected = self.expected()
+            expected.to_csv(expected_file, index=False)
+            self.assertEqual(n_rows, len(expected))
+            pd.testing.assert_frame_equal(pd.read_csv(output_file),
+                                          pd.read_csv(expected_file))
+
+    def test_run_pipeline_incremental(self):
+        expected = self.expected()
+        with tempfile.TemporaryDirectory() as tmp:
+            input_file = os.path.join(tmp, "in.csv")
+            output_file = os.path.join(tmp, "out.csv")
+            store_file = os.path.join(tmp, "results.sqlite")
+            expected_file = os.path.join(tmp, "expected.csv")
+
+            def run(df, reference=REFERENCE):
+                df.to_csv(input_file, index=False)
+                with instrumentation.Instrumentation() as inst:
+                    pipeline.run_pipeline(input_file, output_file, *reference,
+                                          path=tmp, chunk_size=7,
+                                          result_store=store_file, dtype=str)
+                return inst.counters['result_store.processed']
+
+            raw = expected[['Address_x']]
+            n_distinct = raw['Address_x'].nunique()
+            self.assertEqual(run(raw.iloc[:10]),
+                             raw.iloc[:10]['Address_x'].nunique())
+            self.assertEqual(run(raw), n_distinct
+                             - raw.iloc[:10]['Address_x'].nunique())
+            self.assertEqual(run(raw), 0)
+            expected[['Address_x'] + pipeline.RESULT_COLUMNS]\
+                .to_csv(expected_file, index=False)
+            pd.testing.assert_frame_equal(pd.read_csv(output_file),
+                                          pd.read_csv(expected_file))
+
+            # Other reference data, other results
+            reference = (STANDARD_ADDRESS_SET - {("Barclay", "Drive")},
+                         STANDARD_NAME_SET, NAME_TO_SUFFIX_DICT)
+            self.assertEqual(run(raw, reference), n_distinct)
+            with ResultStore(store_file,
+                             reference_version(*reference)) as store:
+                self.assertEqual(len(store), n_distinct)
+                self.assertEqual(store.prune(), n_distinct)
+                self.assertEqual(len(store), n_distinct)
+
+    def test_load_df_chunks(self):
+        chunks = list(apc.resource_manager.load_df_chunks(
+                        "addresses.csv", SAMPLE_PATH, chunk_size=4,
+                        dtype=str))
+        df = apc.resource_manager.load_df("addresses.csv", SAMPLE_PATH,
+                                          dtype=str)
+        self.assertTrue(all(len(chunk) <= 4 for chunk in chunks))
+        pd.testing.assert_frame_equal(pd.concat(chunks), df)
+
+    def test_get_chunk_writer(self):
+        self.assertIsInstance(pipeline.get_chunk_writer("a.csv"),
+                              pipeline.CsvChunkWriter)
+        with self.assertRaises(AssertionError):
+            pipeline.get_chunk_writer("a.csv", output_format="xlsx")
+
+
+if __name__ == '__main__':
+    unittest.main()
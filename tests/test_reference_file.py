@@ -0,0 +1,123 @@
+from address_parser.address_parser_class import AddressParser
+import address_parser.address_methods as am
+import address_parser.pipeline as pipeline
+import address_parser.reference_file as reference_file
+import address_parser.resource_manager as resource_manager
+import address_parser.service as service
+import asyncio
+import os
+import pandas as pd
+import random
+import tempfile
+import unittest
+from .reference import reference
+
+
+REFERENCE = reference(("Café", "Way"))
+STANDARD_ADDRESS_SET, STANDARD_NAME_SET, NAME_TO_SUFFIX_DICT = REFERENCE
+
+
+class TestReferenceFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.file_name = os.path.join(self.tmp.name, "reference.bin")
+        reference_file.compile_reference(self.file_name, *REFERENCE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        reference = reference_file.load_reference(self.file_name)
+        self.assertEqual(reference.standard_address_set, STANDARD_ADDRESS_SET)
+        self.assertEqual(reference.standard_name_set, STANDARD_NAME_SET)
+        self.assertEqual(reference.name_to_suffix_dict, NAME_TO_SUFFIX_DICT)
+        self.assertEqual(sorted(reference.strings.to_list()),
+                         sorted(reference.strings))
+
+    def test_matcher(self):
+        matcher = reference_file.load_reference(self.file_name).matcher()
+        parser = AddressParser()
+        rng = random.Random(0)
+        for _ in range(50):
+            name = ''.join(rng.choice("abcdefghilnorstuvwé ")
+                           for _ in range(rng.randint(0, 12)))
+            suffix = rng.choice(["", "Dr", "Road", "Way", "Cir"])
+            self.assertEqual(matcher.match(name, suffix)[2],
+                             parser.close_match(name, suffix, *REFERENCE)[2])
+        self.assertEqual(matcher.match("Cafe", "Way"),
+                         parser.close_match("Cafe", "Way", *REFERENCE))
+
+    def test_lookups(self):
+        reference = reference_file.load_reference(self.file_name)
+        self.assertIn(("Café", "Way"), reference.standard_address_set)
+        self.assertNotIn(("Café", "Road"), reference.standard_address_set)
+        self.assertNotIn(("Café", "Way", "x"), reference.standard_address_set)
+        self.assertNotIn(None, reference.standard_name_set)
+        self.assertIn("Newburg", reference.standard_name_set)
+        self.assertEqual(reference.name_to_suffix_dict["Newburg"],
+                         {"Road", "Court"})
+        with self.assertRaises(KeyError):
+            reference.name_to_suffix_dict["Newburry"]
+        self.assertEqual(len(reference.name_to_suffix_dict),
+                         len(NAME_TO_SUFFIX_DICT))
+
+    def test_worker_processes(self):
+        df = resource_manager.load_sample()
+        expected = am.close_match_df(df, 'Street Name', 'Street Suffix',
+                                     *REFERENCE)
+        ans = am.close_match_df(df, 'Street Name', 'Street Suffix',
+                                n_jobs=2, chunk_size=5,
+                                reference_file=self.file_name)
+        for column, expected_column in zip(ans, expected):
+            pd.testing.assert_series_equal(column, expected_column)
+
+        addresses = ["21839 Barclay Drive", "24160 Lebost", "5 Cafe Way"]
+        app = service.AddressService(n_workers=2, use_processes=True,
+                                     reference_file=self.file_name)
+
+        async def run():
+            try:
+                return await asyncio.gather(*[app.lookup(a)
+                                              for a in addresses])
+            finally:
+                await app.close()
+
+        baseline = service.AddressService(*REFERENCE)
+        self.assertEqual(asyncio.run(run()),
+                         [baseline.lookup_sync(a) for a in addresses])
+
+    def test_run_pipeline(self):
+        input_file = os.path.join(self.tmp.name, "addresses.csv")
+        pd.DataFrame({'Address_x': ["21839 Barclay Drive", "24160 Lebost",
+                                    "5 Cafe Way", "7 Glen Havn Cir"]})\
+          .to_csv(input_file, index=False)
+        outputs = []
+        for i, kwargs in enumerate([{'reference_file': self.file_name},
+                                    dict(zip(('standard_address_set',
+                                              'standard_name_set',
+                                              'name_to_suffix_dict'),
+                                             REFERENCE))]):
+            outputs.append(os.path.join(self.tmp.name, "{}.csv".format(i)))
+            pipeline.run_pipeline("addresses.csv", outputs[-1],
+                                  path=self.tmp.name, chunk_size=2, **kwargs)
+        pd.testing.assert_frame_equal(pd.read_csv(outputs[0]),
+                                      pd.read_csv(outputs[1]))
+
+    def test_empty(self):
+        reference_file.compile_reference(self.file_name, set(), set(), {})
+        reference = reference_file.load_reference(self.file_name)
+        self.assertEqual(reference.standard_address_set, set())
+        self.assertEqual(reference.matcher().match("Barclay", "Dr"),
+                         ("", "", 0))
+
+    def test_bad_file(self):
+        with open(self.file_name, 'r+b') as handle:
+            handle.seek(len(reference_file.MAGIC))
+            handle.write(b'\x63\x00\x00\x00')
+        with self.assertRaises(AssertionError):
+            reference_file.load_reference(self.file_name)
+
+
+if __name__ == '__main__':
+    unittest.main()
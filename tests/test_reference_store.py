@@ -0,0 +1,123 @@
+from address_parser.address_parser_class import AddressParser
+import address_parser.address_methods as am
+from address_parser.candidate_index import CandidateIndex, \
+                                           DynamicCandidateIndex
+from address_parser.reference_store import ReferenceStore
+import collections
+import pandas as pd
+from parameterized import parameterized
+import random
+import unittest
+
+
+NAMES = ["Barclay", "Le Bost", "Newburry", "Bayview", "Crosswinds",
+         "Glen Haven", "Veranda", "Chase", "Nine Mile", "Dunhill",
+         "Garfield", "Moorgate", "Addington", "Devonshire", "Willingham"]
+SUFFIXES = ["Drive", "Court", "Road", "Street", "Lane"]
+QUERIES = [("Barcley", "Drive"), ("Newburg", "Road"), ("Le Bost", ""),
+           ("Nine Mle", "Rd"), ("Glen Havn", "Circle"), ("Chase", "Lane"),
+           ("Moregate", ""), ("Devonshir", "Court")]
+
+
+def random_rows(rng, n):
+    return [(rng.choice(NAMES), rng.choice(SUFFIXES)) for _ in range(n)]
+
+
+class TestDynamicCandidateIndex(unittest.TestCase):
+
+    def test_add_remove(self):
+        rng = random.Random(0)
+        keys = [name.lower() for name in NAMES]
+        index = DynamicCandidateIndex(keys)
+        removed = index.add(["zzz", "barclay dr"])
+        index.remove(removed + [3])
+        self.assertEqual(len(index), len(NAMES) - 1)
+        # Freed slots are reused
+        self.assertEqual(index.add(["x" * 300]), [3])
+
+        live = [key if key is not None else "\x00" * 500
+                for key in index.keys]
+        static = CandidateIndex(live, batch=False)
+        for _ in range(30):
+            query = rng.choice(keys)[:-1] + rng.choice("xyz")
+            for k in (1, 3):
+                self.assertEqual(index.top_k(query, k),
+                                 static.top_k(query, k))
+            self.assertEqual(index.records(query, 0, len(live)),
+                             static.records(query, 0, len(live)))
+
+
+class TestReferenceStore(unittest.TestCase):
+
+    @parameterized.expand([
+        [1],
+        [2],
+        [3],
+    ])
+    def test_updates(self, seed):
+        rng = random.Random(seed)
+        parser = AddressParser()
+        rows = random_rows(rng, 30)
+        store = ReferenceStore(rows)
+        matcher = store.matcher(parser)
+        for _ in range(10):
+            added = random_rows(rng, rng.randint(0, 8))
+            removed = rng.sample(rows, rng.randint(0, min(8, len(rows))))
+            store.add(added)
+            store.remove(removed)
+            rows = list((collections.Counter(rows + added)
+                         - collections.Counter(removed)).elements())
+
+            df = pd.DataFrame(rows, columns=['Street Name', 'Street Suffix'])
+            self.assertEqual(store.standard_address_set,
+                             set(map(tuple, rows)))
+            self.assertEqual(store.standard_name_set,
+                             set(name for name, _ in rows))
+            if rows:
+                self.assertEqual(store.name_to_suffix_dict,
+                                 am.get_combinations_as_dict(
+                                     df, ['Street Name', 'Street Suffix']))
+            self.assertEqual(store.unique_suffixes,
+                             am.unique_suffix_dict(store.name_to_suffix_dict))
+
+            # Same as a linear scan in the order of the slots
+            addresses = [x for x in store.addresses if x is not None]
+            names = [x for x in store.names if x is not None]
+            for name, suffix in QUERIES:
+                self.assertEqual(matcher.match(name, suffix),
+                                 parser.close_match(
+                                     name, suffix, addresses, names,
+                                     store.name_to_suffix_dict))
+                # The scan of the sets may break ties differently
+                self.assertEqual(matcher.match(name, suffix)[2],
+                                 parser.close_match(
+                                     name, suffix,
+                                     store.standard_address_set,
+                                     store.standard_name_set,
+                                     store.name_to_suffix_dict)[2])
+
+    def test_row_counts(self):
+        store = ReferenceStore([("Barclay", "Drive"), ("Barclay", "Drive"),
+                                ("Barclay", "Court")])
+        self.assertEqual(store.unique_suffixes, {})
+        self.assertEqual(store.remove([("Barclay", "Drive")]), [])
+        self.assertIn(("Barclay", "Drive"), store)
+        self.assertEqual(store.remove([("Barclay", "Court")]),
+                         [("Barclay", "Court")])
+        self.assertEqual(store.unique_suffixes, {"Barclay": "Drive"})
+        store.remove([("Barclay", "Drive")])
+        self.assertEqual(len(store), 0)
+        self.assertEqual(store.name_to_suffix_dict, {})
+        self.assertEqual(len(store.name_index), 0)
+        with self.assertRaises(AssertionError):
+            store.remove([("Barclay", "Drive")])
+
+    def test_from_frame(self):
+        df = pd.DataFrame({'Street Name': ["Barclay", "Chase", None],
+                           'Street Suffix': ["Drive", None, "Road"]})
+        store = ReferenceStore.from_frame(df)
+        self.assertEqual(store.standard_address_set, {("Barclay", "Drive")})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from address_parser.address_parser_class import AddressParser
+import address_parser.address_parser_class as address_parser_class
+import os
+import shutil
+import tempfile
+import unittest
+
+
+# The module used by AddressParser, which owns the cache
+resource_manager = address_parser_class.resource_manager
+
+
+class TestResourceCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.rel_path = os.path.relpath(self.dir, resource_manager.
+                                        resource_path("", ""))
+
+    def tearDown(self):
+        resource_manager.clear_resource_cache()
+        shutil.rmtree(self.dir)
+
+    def save(self, data):
+        with open(os.path.join(self.dir, "data.pickle"), 'wb') as handle:
+            resource_manager.pickle.dump(data, handle)
+
+    def test_parsers_share_dictionaries(self):
+        a, b = AddressParser(), AddressParser()
+        self.assertIs(a.street_name_abbr_dict, b.street_name_abbr_dict)
+        self.assertIs(a.mile_road_dict, b.mile_road_dict)
+
+    def test_cache_hit(self):
+        self.save({'a': 1})
+        first = resource_manager.load_resource("data.pickle", self.rel_path)
+        second = resource_manager.load_resource("data.pickle", self.rel_path)
+        self.assertIs(first, second)
+        third = resource_manager.load_resource("data.pickle", self.rel_path,
+                                               use_cache=False)
+        self.assertIsNot(first, third)
+        self.assertEqual(first, third)
+
+    def test_reload_when_modified(self):
+        self.save({'a': 1})
+        path = os.path.join(self.dir, "data.pickle")
+        resource_manager.load_resource("data.pickle", self.rel_path)
+        self.save({'a': 2})
+        os.utime(path, (0, os.path.getmtime(path) + 10))
+        self.assertEqual(
+            resource_manager.load_resource("data.pickle", self.rel_path),
+            {'a': 2})
+
+    def test_clear_resource_cache(self):
+        self.save({'a': 1})
+        first = resource_manager.load_resource("data.pickle", self.rel_path)
+        resource_manager.clear_resource_cache("data.pickle", self.rel_path)
+        self.assertIsNot(
+            resource_manager.load_resource("data.pickle", self.rel_path),
+            first)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import address_parser.service as service
+import asyncio
+import json
+import unittest
+from .reference import REFERENCE
+
+
+ADDRESSES = ["21839 Barclay Drive", "24160 Lebost", "45 Newburry Rd",
+             "7 Glen Havn Cir Unit 4", ""] * 20
+
+
+class TestAddressService(unittest.TestCase):
+
+    def test_lookup_batches_requests(self):
+        # A window far longer than queueing all requests takes. Batches
+        # of 25 fill up and are sent without waiting for it to end.
+        app = service.AddressService(*REFERENCE, max_batch=25,
+                                     batch_window=1.0)
+
+        async def run():
+            try:
+                return await asyncio.gather(*[app.lookup(a)
+                                              for a in ADDRESSES])
+            finally:
+                await app.close()
+
+        ans = asyncio.run(run())
+        self.assertEqual(ans, [app.lookup_sync(a) for a in ADDRESSES])
+        stats = app.stats()
+        self.assertEqual(stats['requests'], len(ADDRESSES))
+        self.assertLess(stats['batches'], stats['requests'])
+        self.assertLessEqual(stats['p50_ms'], stats['p99_ms'])
+
+    def test_http(self):
+        app = service.AddressService(*REFERENCE)
+
+        async def get(reader, writer, target):
+            writer.write("GET {} HTTP/1.1\r\nHost: x\r\n\r\n"
+                         .format(target).encode())
+            await writer.drain()
+            status = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line == b'\r\n':
+                    break
+                if line.lower().startswith(b'content-length'):
+                    length = int(line.split(b':')[1])
+            return status.split()[1], json.loads(await reader.readexactly(
+                                                    length))
+
+        async def run():
+            server = await service.start_server(app, port=0)
+            port = server.sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection('127.0.0.1', port)
+            try:
+                return [await get(reader, writer, target) for target in
+                        ["/lookup?address=24160+Lebost",
+                         "/parse?address=1%20Main%20St", "/stats", "/x"]]
+            finally:
+                writer.close()
+                server.close()
+                await server.wait_closed()
+                await app.close()
+
+        lookup, parse, stats, missing = asyncio.run(run())
+        self.assertEqual(lookup, (b'200', app.lookup_sync("24160 Lebost")))
+        self.assertEqual(parse[1]['Street Name'], "Main")
+        self.assertEqual(stats[1]['requests'], 1)
+        self.assertEqual(missing[0], b'404')
+
+
+if __name__ == '__main__':
+    unittest.main()